@@ -12,6 +12,7 @@ bl_info = {
 
 import bpy
 from .scripts import ui
+from .scripts.modules import archive
 from .scripts import modules
 from .scripts import pack_project
 from .scripts import custom_pack_project
@@ -52,12 +53,133 @@ class DY_PACK_MASTER_Preferences(bpy.types.AddonPreferences):
         default=True,
     )
 
+    pack_output: bpy.props.EnumProperty(
+        name="Pack Output",
+        description="Write the pack to a directory, or stream it straight into a single archive",
+        items=archive.OUTPUT_FORMATS,
+        default='DIRECTORY',
+    )
+
+    archive_volume_size: bpy.props.IntProperty(
+        name="Archive Volume Size (MB)",
+        description="Split the archive into volumes of this size (name.tar.001, name.tar.002...); 0 writes a single file",
+        default=0,
+        min=0,
+    )
+
+    pack_policy: bpy.props.EnumProperty(
+        name="Pack Policy",
+        description="Which images, fonts and sounds are packed into the packed blend file",
+        items=[
+            ('SIZE_LIMIT', "Pack Small Files", "Pack files up to the size limit; copy larger ones to //textures/, //fonts/ and //sounds/"),
+            ('PACK_ALL', "Pack All", "Pack every image, font, sound and volume into the blend file"),
+        ],
+        default='SIZE_LIMIT',
+    )
+
+    pack_size_limit: bpy.props.IntProperty(
+        name="Pack Size Limit (MB)",
+        description="Largest image, font or sound file packed into the blend file; larger files are copied next to it",
+        default=16,
+        min=0,
+    )
+
+    keep_original_open: bpy.props.BoolProperty(
+        name="Keep original file open",
+        description="Save the packed file as a copy and restore every changed path in the open file, instead of switching to the packed file and reopening the original",
+        default=False,
+    )
+
     open_directory_after_pack: bpy.props.BoolProperty(
         name="Open directory after pack",
         description="Open the output folder in file explorer after packing",
         default=True,
     )
 
+    manifest_hash: bpy.props.BoolProperty(
+        name="Hash files in pack manifest",
+        description="Store a content hash for every localized file, computed while it is copied. Verify Pack needs it to check file contents (without it, only sizes can be checked), and touched but unchanged files are not copied again on re-pack",
+        default=False,
+    )
+
+    deduplicate_files: bpy.props.BoolProperty(
+        name="Deduplicate identical files",
+        description="Localize identical files only once across all asset types; duplicates become hardlinks or share a single copy",
+        default=True,
+    )
+
+    allow_hardlinks: bpy.props.BoolProperty(
+        name="Allow hardlinks to source files",
+        description="When a reflink is not possible, hardlink localized files to their source on the same volume instead of copying. The pack then shares data with the originals, so editing a source in place also changes the pack",
+        default=False,
+    )
+
+    limit_frame_range: bpy.props.BoolProperty(
+        name="Only localize frames in the scene range",
+        description="Copy only the image sequence and VDB frames that can be sampled within the scene frame range, based on each image user and volume sequence settings",
+        default=False,
+    )
+
+    frame_handles: bpy.props.IntProperty(
+        name="Frame Handles",
+        description="Extra frames to keep before and after the scene frame range when limiting sequences",
+        default=0,
+        min=0,
+    )
+
+    prune_unreachable: bpy.props.BoolProperty(
+        name="Only localize rendered assets",
+        description="Skip images, movies, caches, VDBs and libraries that the rendered view layers of the scene do not use (orphans, hidden or excluded collections, other scenes). Skipped assets are listed in the pack log with their size",
+        default=False,
+    )
+
+    copy_workers: bpy.props.IntProperty(
+        name="Copy Workers",
+        description="Number of threads used to copy files in parallel while localizing assets",
+        default=4,
+        min=1,
+        max=64,
+    )
+
+    localize_nested_libraries: bpy.props.BoolProperty(
+        name="Localize nested libraries",
+        description="Also localize the libraries and files linked by linked libraries: each localized library is opened in a background Blender process and saved with its paths pointing inside the pack",
+        default=False,
+    )
+
+    nested_library_jobs: bpy.props.IntProperty(
+        name="Nested Library Processes",
+        description="Number of background Blender processes localizing nested libraries in parallel",
+        default=2,
+        min=1,
+        max=16,
+    )
+
+    sequence_layout: bpy.props.EnumProperty(
+        name="Sequence Layout",
+        description="How image sequence and VDB sequence frames are laid out in the pack",
+        items=[
+            ('FLAT', "Flat", "Every frame in //sequences/ or //vdb/"),
+            ('PER_SEQUENCE', "Folder per Sequence", "Each sequence in its own folder, named after its datablock"),
+            ('MIRROR', "Mirror Source Folders", "Each sequence in a folder mirroring its source folder"),
+        ],
+        default='FLAT',
+    )
+
+    addon_cache_directory: bpy.props.StringProperty(
+        name="Add-on Cache Directory",
+        description="Folder keeping the zipped add-ons between packs, so unchanged add-ons are not zipped again (default: the system temporary folder)",
+        subtype='DIR_PATH',
+        default="",
+    )
+
+    path_remap_rules: bpy.props.StringProperty(
+        name="Path Remap Rules",
+        description="JSON file of path prefixes on storage every render node mounts: assets below a \"remap\" prefix are relinked to its farm prefix and assets below a \"keep\" prefix keep their path, without being copied into the pack",
+        subtype='FILE_PATH',
+        default="",
+    )
+
     def draw(self, context):
         layout = self.layout
         
@@ -66,8 +188,35 @@ class DY_PACK_MASTER_Preferences(bpy.types.AddonPreferences):
         layout.separator()
         layout.label(text="Packing Settings", icon='FILE_BLEND')
         layout.prop(self, "blend_suffix")
-        layout.prop(self, "reopen_original_file")
+        layout.prop(self, "pack_output")
+        row = layout.row()
+        row.enabled = self.pack_output != 'DIRECTORY'
+        row.prop(self, "archive_volume_size")
+        layout.prop(self, "pack_policy")
+        row = layout.row()
+        row.enabled = self.pack_policy == 'SIZE_LIMIT'
+        row.prop(self, "pack_size_limit")
+        layout.prop(self, "keep_original_open")
+        row = layout.row()
+        row.enabled = not self.keep_original_open
+        row.prop(self, "reopen_original_file")
         layout.prop(self, "open_directory_after_pack")
+        layout.prop(self, "copy_workers")
+        layout.prop(self, "localize_nested_libraries")
+        row = layout.row()
+        row.enabled = self.localize_nested_libraries
+        row.prop(self, "nested_library_jobs")
+        layout.prop(self, "sequence_layout")
+        layout.prop(self, "path_remap_rules")
+        layout.prop(self, "addon_cache_directory")
+        layout.prop(self, "manifest_hash")
+        layout.prop(self, "deduplicate_files")
+        layout.prop(self, "allow_hardlinks")
+        layout.prop(self, "limit_frame_range")
+        row = layout.row()
+        row.enabled = self.limit_frame_range
+        row.prop(self, "frame_handles")
+        layout.prop(self, "prune_unreachable")
 
 def register():
     bpy.utils.register_class(DY_PACK_MASTER_Preferences)
@@ -0,0 +1,37 @@
+# Headless entry point for dy Pack Master.
+#
+#   blender -b --python <addon folder>/pack_cli.py -- --pack shot010.blend shot020.blend --output-dir /farm/packs
+#
+# Every blend file is packed one after the other in the same Blender process,
+# then Blender exits with the status from scripts/cli.py (0: all packed,
+# 1: some failed, 2: invalid arguments, 3: none packed).
+import os
+import sys
+import importlib
+import addon_utils
+
+def find_addon_module():
+    """Module name of the add-on this script ships with (legacy add-on or bl_ext extension)."""
+    addon_dir = os.path.dirname(os.path.abspath(__file__))
+    for mod in addon_utils.modules():
+        if os.path.dirname(os.path.abspath(mod.__file__)) == addon_dir:
+            return mod.__name__
+    return None
+
+def main():
+    module_name = find_addon_module()
+    if module_name is None:
+        print("ERROR: dy Pack Master must be installed as an add-on or extension to run headless.")
+        return 2
+
+    # Enable for this session only, without changing the saved preferences
+    is_enabled, _ = addon_utils.check(module_name)
+    if not is_enabled and addon_utils.enable(module_name, default_set=False) is None:
+        print(f"ERROR: Failed to enable {module_name}.")
+        return 2
+
+    cli = importlib.import_module(f"{module_name}.scripts.cli")
+    return cli.main()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+import bpy
+import os
+import sys
+import time
+import json
+import argparse
+import subprocess
+import traceback
+from datetime import datetime
+from .modules import utils, copy_engine, verify, nested_libraries, blend_reader
+from .pack_project import pack_project
+
+# Exit codes of a headless pack
+EXIT_OK = 0         # Every blend file was packed
+EXIT_PARTIAL = 1    # Some blend files failed to pack
+EXIT_USAGE = 2      # Invalid arguments or no blend file to pack
+EXIT_FAILED = 3     # No blend file could be packed
+
+# Launcher run by the background Blender processes of a multi-process batch
+LAUNCHER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pack_cli.py")
+
+USAGE = ("blender -b --python <addon>/pack_cli.py -- --pack FILE.blend [FILE.blend ...] [options]\n"
+         "       blender -b --python <addon>/pack_cli.py -- --verify PACK_DIR [PACK_DIR ...]\n"
+         "       blender -b --python <addon>/pack_cli.py -- --scan FILE.blend [FILE.blend ...]")
+
+def parse_args(argv=None):
+    """Parse the arguments after '--' on the Blender command line."""
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    parser = argparse.ArgumentParser(
+        prog="dy_pack_master",
+        usage=USAGE,
+        description="Pack blend files for render farms, sequentially in this Blender process or in parallel background processes.",
+    )
+    parser.add_argument("--pack", nargs="+", default=[], metavar="FILE",
+                        help="Blend files to pack")
+    parser.add_argument("--file-list", metavar="PATH",
+                        help="Text file with one blend file per line (blank lines and # comments are ignored)")
+    parser.add_argument("--output-dir", metavar="DIR",
+                        help="Folder the pack directories are created in (default: next to each blend file)")
+    parser.add_argument("--suffix",
+                        help="Pack directory and blend file suffix (default: Blend File Suffix preference)")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="Copy threads (default: Copy Workers preference)")
+    parser.add_argument("--hash", action=argparse.BooleanOptionalAction, default=None,
+                        help="Hash files in the pack manifest")
+    parser.add_argument("--dedup", action=argparse.BooleanOptionalAction, default=None,
+                        help="Deduplicate identical files")
+    parser.add_argument("--hardlinks", action=argparse.BooleanOptionalAction, default=None,
+                        help="Allow hardlinks to source files")
+    parser.add_argument("--frame-range", action=argparse.BooleanOptionalAction, default=None,
+                        help="Only localize the sequence frames in the scene range")
+    parser.add_argument("--prune-unreachable", action=argparse.BooleanOptionalAction, default=None,
+                        help="Only localize the assets the rendered view layers use")
+    parser.add_argument("--nested-libraries", action=argparse.BooleanOptionalAction, default=None,
+                        help="Also localize the libraries and files linked by linked libraries")
+    parser.add_argument("--handles", type=int, metavar="N",
+                        help="Frame handles kept around the scene range")
+    parser.add_argument("--pack-policy", choices=("size-limit", "all"),
+                        help="Pack only the images, fonts and sounds up to --pack-size-limit, copying larger ones, "
+                             "or pack them all (default: Pack Policy preference)")
+    parser.add_argument("--pack-size-limit", type=int, metavar="MB",
+                        help="Largest file packed into the blend file (default: Pack Size Limit preference)")
+    parser.add_argument("--archive", choices=("tar", "zip"),
+                        help="Stream each pack into a .tar or .zip archive instead of a directory")
+    parser.add_argument("--volume-size", type=int, metavar="MB",
+                        help="Split archives into volumes of this size in MB")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="Background Blender processes packing in parallel (default: 1, this process)")
+    parser.add_argument("--shared-store", metavar="DIR",
+                        help="Folder of a store shared by every shot, so shared assets are copied once and "
+                             "hardlinked into each pack (default: none). The store is kept after the batch, "
+                             "so later batches reuse it; delete it when it is no longer needed")
+    parser.add_argument("--sequence-layout", choices=("flat", "per-sequence", "mirror"),
+                        help="Sequence frames in one folder, a folder per sequence, or folders mirroring the "
+                             "source folders (default: Sequence Layout preference)")
+    parser.add_argument("--remap-rules", metavar="PATH",
+                        help="JSON file of path prefixes on farm storage, relinked instead of copied "
+                             "(default: Path Remap Rules preference)")
+    parser.add_argument("--summary-json", metavar="PATH",
+                        help="Write the batch summary as JSON (default: <output-dir>/batch_summary.json)")
+    parser.add_argument("--verify", nargs="+", default=[], metavar="PACK_DIR",
+                        help="Verify pack directories against their pack manifest instead of packing "
+                             "(exit code 0 if intact, 1 if files are mismatched, missing or extra, "
+                             "3 if a manifest cannot be read)")
+    parser.add_argument("--size-only", action="store_true",
+                        help="With --verify, accept files packed without hashes after checking their size "
+                             "(by default they fail the verification)")
+    parser.add_argument("--scan", nargs="+", default=[], metavar="FILE",
+                        help="List the external files of blend files and of every library they link, read "
+                             "without opening them (exit code 0 if all exist, 1 if some are missing, "
+                             "3 if a blend file cannot be read)")
+    # Internal: run by the background processes localizing the nested libraries of a pack
+    parser.add_argument("--localize-library", metavar="JOB", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def read_file_list(path):
+    """Blend files listed in a text file, one per line."""
+    with open(path, "r") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith('#')]
+
+def get_blend_files(args):
+    """Blend files to pack from --pack and --file-list, absolute and without duplicates."""
+    blend_files = list(args.pack)
+    if args.file_list:
+        blend_files.extend(read_file_list(args.file_list))
+    return list(dict.fromkeys(os.path.abspath(path) for path in blend_files))
+
+def get_shared_store(args):
+    """Shared store folder of the batch (--shared-store), or None."""
+    return os.path.abspath(args.shared_store) if args.shared_store else None
+
+def get_overrides(args, shared_store=None):
+    """Preference overrides from the command line; headless packs never reopen files or open folders."""
+    return {
+        "shared_store_directory": shared_store,
+        "blend_suffix": args.suffix,
+        "copy_workers": args.workers,
+        "manifest_hash": args.hash,
+        "deduplicate_files": args.dedup,
+        "allow_hardlinks": args.hardlinks,
+        "limit_frame_range": args.frame_range,
+        "frame_handles": args.handles,
+        "prune_unreachable": args.prune_unreachable,
+        "localize_nested_libraries": args.nested_libraries,
+        "pack_output": args.archive.upper() if args.archive else None,
+        "archive_volume_size": args.volume_size,
+        "pack_policy": {"size-limit": 'SIZE_LIMIT', "all": 'PACK_ALL'}.get(args.pack_policy),
+        "pack_size_limit": args.pack_size_limit,
+        "sequence_layout": args.sequence_layout.upper().replace("-", "_") if args.sequence_layout else None,
+        "path_remap_rules": os.path.abspath(args.remap_rules) if args.remap_rules else None,
+        "reopen_original_file": False,
+        "open_directory_after_pack": False,
+    }
+
+def pack_file(blend_file, output_dir=None):
+    """
+    Open and pack one blend file.
+    Returns {"packed": packed blend file or None, "seconds", "stats": copy statistics or None}.
+    """
+    result = {"packed": None, "seconds": 0.0, "stats": None}
+    if not os.path.isfile(blend_file):
+        print(f"ERROR: Blend file not found: {blend_file}")
+        return result
+
+    start = time.perf_counter()
+    copy_engine.last_stats = None
+    try:
+        bpy.ops.wm.open_mainfile(filepath=blend_file)
+        status, new_filepath = pack_project(output_dir=output_dir, save_original=False)
+        if 'FINISHED' in status:
+            result["packed"] = new_filepath
+    except Exception as e:
+        traceback.print_exc()
+        print(f"ERROR: Failed to pack {blend_file}: {e}")
+    result["seconds"] = time.perf_counter() - start
+    result["stats"] = copy_engine.last_stats
+    return result
+
+def run(blend_files, output_dir=None, overrides=None):
+    """
+    Pack blend files one after the other in the running Blender process.
+    Returns {blend file: result of pack_file}.
+    """
+    results = {}
+    if output_dir:
+        utils.ensure_directory(output_dir)
+    with utils.preference_overrides(**(overrides or {})):
+        for number, blend_file in enumerate(blend_files, 1):
+            print(f"\n[{number}/{len(blend_files)}] Packing {blend_file}")
+            results[blend_file] = result = pack_file(blend_file, output_dir)
+            status = "OK" if result["packed"] else "FAILED"
+            print(f"[{number}/{len(blend_files)}] {status} in {result['seconds']:.1f}s: {blend_file}")
+    return results
+
+def child_arguments(args, blend_files, shared_store, summary_path):
+    """Command line of a background Blender process packing part of the batch."""
+    argv = ["--pack", *blend_files, "--summary-json", summary_path]
+    if args.output_dir:
+        argv += ["--output-dir", os.path.abspath(args.output_dir)]
+    if shared_store:
+        argv += ["--shared-store", shared_store]
+    if args.remap_rules:
+        argv += ["--remap-rules", os.path.abspath(args.remap_rules)]
+    for option, value in (("--suffix", args.suffix), ("--workers", args.workers), ("--handles", args.handles),
+                          ("--archive", args.archive), ("--volume-size", args.volume_size),
+                          ("--sequence-layout", args.sequence_layout), ("--pack-policy", args.pack_policy),
+                          ("--pack-size-limit", args.pack_size_limit)):
+        if value is not None:
+            argv += [option, str(value)]
+    for option, value in (("hash", args.hash), ("dedup", args.dedup),
+                          ("hardlinks", args.hardlinks), ("frame-range", args.frame_range),
+                          ("prune-unreachable", args.prune_unreachable),
+                          ("nested-libraries", args.nested_libraries)):
+        if value is not None:
+            argv.append(f"--{option}" if value else f"--no-{option}")
+    return [bpy.app.binary_path, "-b", "--python", LAUNCHER, "--", *argv]
+
+def run_parallel(args, blend_files, jobs, shared_store):
+    """
+    Pack blend files in several background Blender processes, each packing its
+    share sequentially. Returns {blend file: result of pack_file}.
+    """
+    work_dir = os.path.abspath(args.output_dir) if args.output_dir else os.path.dirname(blend_files[0])
+    job_dir = utils.ensure_directory(os.path.join(work_dir, ".batch_jobs"))
+    shares = [blend_files[i::jobs] for i in range(jobs)]
+
+    processes = []
+    for number, share in enumerate(shares, 1):
+        summary_path = os.path.join(job_dir, f"job_{number}.json")
+        log_path = os.path.join(job_dir, f"job_{number}.log")
+        if os.path.exists(summary_path):
+            os.remove(summary_path)
+        with open(log_path, "w") as log:
+            process = subprocess.Popen(child_arguments(args, share, shared_store, summary_path),
+                                       stdout=log, stderr=subprocess.STDOUT)
+        print(f"Job {number}: {len(share)} blend files (log: {log_path})")
+        processes.append((number, process, share, summary_path))
+
+    results = {}
+    for number, process, share, summary_path in processes:
+        code = process.wait()
+        try:
+            with open(summary_path, "r") as f:
+                job_results = json.load(f)["files"]
+        except (OSError, ValueError, KeyError):
+            job_results = {}
+        for blend_file in share:
+            results[blend_file] = job_results.get(blend_file, {"packed": None, "seconds": 0.0, "stats": None})
+        print(f"Job {number} finished with exit code {code}")
+    return results
+
+def get_totals(results):
+    """Sum the copy statistics of every packed shot."""
+    totals = {}
+    for result in results.values():
+        for key, value in (result["stats"] or {}).items():
+            if key != "throughput_mb_s" and value is not None:
+                totals[key] = totals.get(key, 0) + value
+    totals["packed"] = sum(1 for result in results.values() if result["packed"])
+    totals["failed"] = len(results) - totals["packed"]
+    return totals
+
+def write_summary(path, results, elapsed):
+    data = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "wall_time": elapsed,
+        "totals": get_totals(results),
+        "files": results,
+    }
+    try:
+        utils.ensure_directory(os.path.dirname(os.path.abspath(path)))
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+        print(f"Batch summary written: {path}")
+    except OSError as e:
+        print(f"WARNING: Failed to write batch summary: {e}")
+
+def print_summary(results, elapsed):
+    mb = 1024 * 1024
+    print("\n" + "=" * 50)
+    print("dy Pack Master - Batch Pack Summary")
+    print("=" * 50)
+    for blend_file, result in results.items():
+        if result["packed"]:
+            stats = result["stats"] or {}
+            print(f"[PACKED] {blend_file} -> {result['packed']} ({result['seconds']:.1f}s, "
+                  f"{stats.get('bytes_copied', 0) / mb:.1f} MB copied, "
+                  f"{stats.get('bytes_shared', 0) / mb:.1f} MB shared)")
+        else:
+            print(f"[FAILED] {blend_file}")
+    totals = get_totals(results)
+    print(f"Packed {totals['packed']}/{len(results)} blend files in {elapsed:.1f}s")
+    print(f"Copied {totals.get('files_copied', 0)} files ({totals.get('bytes_copied', 0) / mb:.1f} MB), "
+          f"reused {totals.get('files_shared', 0)} from the shared store "
+          f"({totals.get('bytes_shared', 0) / mb:.1f} MB), "
+          f"deduplicated {totals.get('files_deduplicated', 0)} "
+          f"({totals.get('bytes_deduplicated', 0) / mb:.1f} MB)")
+    print("=" * 50)
+
+def run_verify(pack_dirs, workers=None, size_only=False):
+    """Verify pack directories and write pack_verify.json in each. Returns the exit code."""
+    code = EXIT_OK
+    for pack_dir in pack_dirs:
+        result = verify.verify_pack(os.path.abspath(pack_dir), workers=workers, size_only=size_only)
+        result.print_report()
+        if result.error:
+            code = EXIT_FAILED
+            continue
+        result.write_json()
+        if not result.ok:
+            code = max(code, EXIT_PARTIAL)
+    return code
+
+def run_scan(blend_files, summary_path=None):
+    """Print the external files of blend files and their libraries, read with blend_reader. Returns the exit code."""
+    code = EXIT_OK
+    report = {}
+    start = time.perf_counter()
+    scanned = blend_reader.scan(blend_files)
+    for blend_path, blend in scanned.items():
+        print(f"\n{blend_path}")
+        if isinstance(blend, str):
+            print(f"  [ERROR] {blend}")
+            report[blend_path] = {"error": blend}
+            code = EXIT_FAILED
+            continue
+        files = []
+        for path in blend.file_paths():
+            exists = os.path.exists(path.abs_path)
+            print(f"  [{'OK' if exists else 'MISSING'}] {path.id_type} '{path.name}': {path.abs_path}")
+            files.append({"type": path.id_type, "name": path.name, "path": path.path,
+                          "absolute_path": utils.normalize_path(path.abs_path), "exists": exists})
+            if not exists and code == EXIT_OK:
+                code = EXIT_PARTIAL
+        report[blend_path] = {"version": blend.version, "compression": blend.compression, "files": files}
+    print(f"\nScanned {len(scanned)} blend files in {time.perf_counter() - start:.2f}s")
+    if summary_path:
+        with open(summary_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Scan written: {summary_path}")
+    return code
+
+def exit_code(results):
+    packed = sum(1 for result in results.values() if result["packed"])
+    if packed == len(results):
+        return EXIT_OK
+    return EXIT_PARTIAL if packed else EXIT_FAILED
+
+def main(argv=None):
+    """Command line entry point. Returns the process exit code (see EXIT_*)."""
+    try:
+        args = parse_args(argv)
+        blend_files = get_blend_files(args)
+    except SystemExit as e:
+        # argparse exits on --help (0) and on invalid arguments (2)
+        return e.code if isinstance(e.code, int) else EXIT_USAGE
+    except OSError as e:
+        print(f"ERROR: Failed to read file list: {e}")
+        return EXIT_USAGE
+
+    if args.verify:
+        return run_verify(args.verify, args.workers, args.size_only)
+
+    if args.scan:
+        return run_scan(args.scan, args.summary_json)
+
+    if args.localize_library:
+        return nested_libraries.run_job_file(args.localize_library)
+
+    if not blend_files:
+        print(f"ERROR: No blend file to pack.\nUsage: {USAGE}")
+        return EXIT_USAGE
+
+    start = time.perf_counter()
+    shared_store = get_shared_store(args)
+    jobs = max(1, min(args.jobs, len(blend_files)))
+    if jobs > 1:
+        results = run_parallel(args, blend_files, jobs, shared_store)
+    else:
+        results = run(blend_files, args.output_dir, get_overrides(args, shared_store))
+    elapsed = time.perf_counter() - start
+
+    print_summary(results, elapsed)
+    summary_path = args.summary_json
+    if not summary_path and args.output_dir:
+        summary_path = os.path.join(args.output_dir, "batch_summary.json")
+    if summary_path:
+        write_summary(summary_path, results, elapsed)
+    return exit_code(results)
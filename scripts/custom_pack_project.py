@@ -3,7 +3,7 @@ import os
 import platform
 from datetime import datetime
 from bpy_extras.io_utils import ExportHelper
-from .modules import mesh_sequence_cache, vdb, references, render_settings, report, utils, images, movies, ocio, addons
+from .modules import mesh_sequence_cache, vdb, references, render_settings, report, utils, images, movies, ocio, addons, copy_engine, planner, session_state, archive, timing, resources
 
 # Get the addon package name for preferences lookup
 ADDON_NAME = __package__.rsplit('.', 1)[0] if '.' in __package__ else __package__
@@ -68,6 +68,21 @@ class DY_PACK_MASTER_OT_custom_pack_project(bpy.types.Operator, ExportHelper):
         default=True,
     )
     
+    # Output format
+    output_format: bpy.props.EnumProperty(
+        name="Output",
+        description="Write the pack to a directory, or stream it straight into a single archive",
+        items=archive.OUTPUT_FORMATS,
+        default='DIRECTORY',
+    )
+    
+    archive_volume_size: bpy.props.IntProperty(
+        name="Volume Size (MB)",
+        description="Split the archive into volumes of this size; 0 writes a single file",
+        default=0,
+        min=0,
+    )
+    
     # Open directory after pack
     open_directory_after: bpy.props.BoolProperty(
         name="Open directory after pack",
@@ -75,6 +90,13 @@ class DY_PACK_MASTER_OT_custom_pack_project(bpy.types.Operator, ExportHelper):
         default=False,
     )
 
+    # Dry run
+    dry_run: bpy.props.BoolProperty(
+        name="Plan only (dry run)",
+        description="List the files this pack would copy, with sizes and an ETA, without saving or copying anything",
+        default=False,
+    )
+
     def draw(self, context):
         layout = self.layout
         scene = context.scene
@@ -106,7 +128,16 @@ class DY_PACK_MASTER_OT_custom_pack_project(bpy.types.Operator, ExportHelper):
         box.label(text="Output Options", icon='FILE_FOLDER')
         col = box.column(align=True)
         col.prop(self, "create_parent_directory")
+        col.prop(self, "output_format")
+        row = col.row()
+        row.enabled = self.output_format != 'DIRECTORY'
+        row.prop(self, "archive_volume_size")
         col.prop(self, "open_directory_after")
+        col.prop(self, "dry_run")
+
+    @classmethod
+    def poll(cls, context):
+        return copy_engine.idle()
 
     def invoke(self, context, event):
         # Check if blend file is saved
@@ -143,13 +174,49 @@ class DY_PACK_MASTER_OT_custom_pack_project(bpy.types.Operator, ExportHelper):
             packed_dir = output_dir
             new_filepath = self.filepath
         
+        # Dry run: report the copy plan of the enabled steps and stop there
+        if self.dry_run:
+            steps = [step for step, enabled in (
+                ('RESOURCES', True),
+                ('IMAGES', self.localize_images),
+                ('MOVIE_CLIPS', self.localize_movie_clips),
+                ('MESH_CACHES', self.localize_mesh_caches),
+                ('REFERENCES', self.localize_references),
+                ('VDBS', self.localize_vdbs),
+                ('OCIO', self.localize_ocio),
+                ('ADDONS', True),
+            ) if enabled]
+            plan = planner.plan_pack(packed_dir, steps)
+            plan.print_report()
+            self.report({'INFO'}, " | ".join(plan.summary_lines()))
+            return {'FINISHED'}
+
+        # Keep the original open: snapshot the paths the pack changes and restore them after saving a copy
+        keep_original = utils.get_preference("keep_original_open", False)
+        
+        # Archive output: assets are streamed into output_dir/<name>.tar|.zip and Blender's own
+        # files are staged in a temporary directory appended at the end
+        archive_path = None
+        if self.output_format != 'DIRECTORY':
+            archive_path = os.path.join(output_dir, name + archive.EXTENSIONS[self.output_format])
+            packed_dir = archive.staging_directory(archive_path)
+            new_filepath = os.path.join(packed_dir, filename)
+            keep_original = True
+        
         # Create output directory
         utils.ensure_directory(packed_dir)
         
         # Log path
         log_path = os.path.join(packed_dir, "pack_log.txt")
         
-        with utils.log_to_file(log_path):
+        with archive.output(self.output_format, archive_path, packed_dir,
+                            volume_size=self.archive_volume_size * 1024 * 1024,
+                            prefix=name if self.create_parent_directory else "",
+                            last=(new_filepath, log_path)) as archive_writer, \
+                utils.log_to_file(log_path), \
+                copy_engine.session(pack_dir=packed_dir, source=original_filepath, archive=archive_writer) as engine, \
+                timing.PackTimer(engine) as timer, \
+                session_state.preserve(keep_original):
             # Log header
             print("Pack Log - dy Pack Master (Custom Export)")
             print("=" * 50)
@@ -157,7 +224,7 @@ class DY_PACK_MASTER_OT_custom_pack_project(bpy.types.Operator, ExportHelper):
             print(f"OS: {platform.system()} {platform.release()}")
             print(f"Blender: {bpy.app.version_string}")
             print(f"Source File: {original_filepath}")
-            print(f"Pack Directory: {packed_dir}")
+            print(f"Pack Directory: {archive_path or packed_dir}")
             print(f"OCIO Config: {os.environ.get('OCIO', 'Default (Blender built-in)')}")
             print("=" * 50)
             print()
@@ -185,89 +252,110 @@ class DY_PACK_MASTER_OT_custom_pack_project(bpy.types.Operator, ExportHelper):
             
             # Step 0: Save current blend file
             current_step += 1
-            print(f"\n[{current_step}/{total_steps}] Saving current blend file...")
-            bpy.ops.wm.save_mainfile()
+            with timer.step(f"[{current_step}/{total_steps}] Saving current blend file"):
+                bpy.ops.wm.save_mainfile()
             
             # Step 1: Convert paths to absolute
             current_step += 1
-            print(f"\n[{current_step}/{total_steps}] Converting asset paths to absolute...")
-            utils.convert_all_paths_to_absolute()
+            with timer.step(f"[{current_step}/{total_steps}] Converting asset paths to absolute"):
+                # Libraries relinked by the references step are reloaded once, after it
+                utils.convert_all_paths_to_absolute(reload_libraries=not keep_original,
+                                                    defer_reload=self.localize_references)
             
             # Step 2: Save to pack directory
             current_step += 1
-            print(f"\n[{current_step}/{total_steps}] Saving to pack directory...")
-            try:
-                bpy.ops.wm.save_as_mainfile(filepath=new_filepath, copy=False)
-                print(f"  - Now working in: {new_filepath}")
-            except Exception as e:
-                print(f"ERROR: Failed to save file: {e}")
-                return {'CANCELLED'}
+            if keep_original:
+                print(f"\n[{current_step}/{total_steps}] Keeping original file open (packed copy is saved at the end)...")
+            else:
+                with timer.step(f"[{current_step}/{total_steps}] Saving to pack directory"):
+                    try:
+                        bpy.ops.wm.save_as_mainfile(filepath=new_filepath, copy=False)
+                        print(f"  - Now working in: {new_filepath}")
+                    except Exception as e:
+                        print(f"ERROR: Failed to save file: {e}")
+                        return {'CANCELLED'}
             
             # Step 3: Pack blend file resources
             current_step += 1
-            print(f"\n[{current_step}/{total_steps}] Packing blend file resources...")
-            bpy.ops.file.pack_all()
+            with timer.step(f"[{current_step}/{total_steps}] Packing blend file resources"):
+                resources.pack_resources(base_path=packed_dir)
             
             # Step 4: Localize Images (optional)
             if self.localize_images:
                 current_step += 1
-                print(f"\n[{current_step}/{total_steps}] Localizing Images (Sequences & Movies)...")
-                images.localize_images(base_path=packed_dir)
+                with timer.step(f"[{current_step}/{total_steps}] Localizing Images (Sequences & Movies)"):
+                    images.localize_images(base_path=packed_dir)
             
             # Step 5: Localize Movie Clips (optional)
             if self.localize_movie_clips:
                 current_step += 1
-                print(f"\n[{current_step}/{total_steps}] Localizing Movie Clips...")
-                movies.localize_movieclips(base_path=packed_dir)
+                with timer.step(f"[{current_step}/{total_steps}] Localizing Movie Clips"):
+                    movies.localize_movieclips(base_path=packed_dir)
             
             # Step 6: Localize Mesh Caches (optional)
             if self.localize_mesh_caches:
                 current_step += 1
-                print(f"\n[{current_step}/{total_steps}] Localizing Mesh Caches (ABC/USD)...")
-                mesh_sequence_cache.localize_mesh_cache(base_path=packed_dir)
+                with timer.step(f"[{current_step}/{total_steps}] Localizing Mesh Caches (ABC/USD)"):
+                    mesh_sequence_cache.localize_mesh_cache(base_path=packed_dir)
             
             # Step 7: Localize References (optional)
             if self.localize_references:
                 current_step += 1
-                print(f"\n[{current_step}/{total_steps}] Localizing References...")
-                references.localize_references(base_path=packed_dir)
+                with timer.step(f"[{current_step}/{total_steps}] Localizing References"):
+                    references.localize_references(base_path=packed_dir, reload_libraries=not keep_original)
             
             # Step 8: Localize VDBs (optional)
             if self.localize_vdbs:
                 current_step += 1
-                print(f"\n[{current_step}/{total_steps}] Localizing VDBs...")
-                vdb.localize_vdb(base_path=packed_dir)
+                with timer.step(f"[{current_step}/{total_steps}] Localizing VDBs"):
+                    vdb.localize_vdb(base_path=packed_dir)
             
             # Extra: Localize OCIO (optional)
             if self.localize_ocio:
                 current_step += 1
-                print(f"\n[{current_step}/{total_steps}] Localizing OCIO...")
-                ocio.localize_ocio()
+                with timer.step(f"[{current_step}/{total_steps}] Localizing OCIO"):
+                    ocio.localize_ocio(base_path=packed_dir)
 
             # Localize Add-ons (based on selection in list)
             current_step += 1
-            print(f"\n[{current_step}/{total_steps}] Localizing Add-ons...")
-            addons.localize_addons(base_path=packed_dir)
+            with timer.step(f"[{current_step}/{total_steps}] Localizing Add-ons"):
+                addons.localize_addons(base_path=packed_dir)
             
             # Step 9: Set relative output path
             current_step += 1
-            print(f"\n[{current_step}/{total_steps}] Setting relative output path...")
-            render_settings.set_relative_output()
+            with timer.step(f"[{current_step}/{total_steps}] Setting relative output path"):
+                render_settings.set_relative_output()
             
             # Step 10: Generate missing files report
             current_step += 1
-            print(f"\n[{current_step}/{total_steps}] Generating missing files report...")
-            report.missing_files_report(base_path=packed_dir)
+            with timer.step(f"[{current_step}/{total_steps}] Generating missing files report"):
+                report.missing_files_report(base_path=packed_dir, archive=archive_writer)
             
             # Step 11: Save final packed blend file
             current_step += 1
-            print(f"\n[{current_step}/{total_steps}] Saving final packed blend file...")
-            bpy.ops.wm.save_mainfile()
+            with timer.step(f"[{current_step}/{total_steps}] Saving final packed blend file"):
+                if not utils.save_packed_file(new_filepath, keep_original):
+                    self.report({'ERROR'}, "Failed to save packed file")
+                    return {'CANCELLED'}
+                engine.finalize()
             
             print("\n" + "=" * 50)
             print("Custom Pack Project Complete!")
-            print(f"Packed project: {new_filepath}")
+            print(engine.summary())
+            print(f"Packed project: {archive_path or new_filepath}")
             print("=" * 50)
+            print("\nStep Timings")
+            print(timer.summary_table())
+            timer.write_json(packed_dir)
+            if archive_writer:
+                archive_writer.completed = True
+        
+        if archive_writer:
+            if archive_writer.error:
+                self.report({'ERROR'}, f"Failed to write pack archive: {archive_writer.error}")
+                return {'CANCELLED'}
+            packed_dir = output_dir
+            new_filepath = archive_path
         
         # Open directory after pack if enabled
         if self.open_directory_after:
@@ -275,7 +363,7 @@ class DY_PACK_MASTER_OT_custom_pack_project(bpy.types.Operator, ExportHelper):
 
         # Optionally reopen original file based on preferences
         prefs = context.preferences.addons.get(ADDON_NAME)
-        if prefs and prefs.preferences.reopen_original_file:
+        if prefs and prefs.preferences.reopen_original_file and not keep_original:
             print(f"\nReopening original file: {original_filepath}")
             bpy.ops.wm.open_mainfile(filepath=original_filepath)
         
@@ -1,29 +1,29 @@
-from . import mesh_sequence_cache
-from . import vdb
-from . import references
-from . import ocio
-from . import addons
-from . import report
-from . import render_settings
-from . import images
-from . import movies
+import importlib
 
-modules = (
-    mesh_sequence_cache,
-    vdb,
-    references,
-    ocio,
-    addons,
-    report,
-    render_settings,
-    images,
-    movies,
+# Modules registering operators and properties. They need bpy, so they are
+# imported on registration: bpy-free modules such as blend_reader can then be
+# imported from a plain Python interpreter.
+MODULE_NAMES = (
+    "mesh_sequence_cache",
+    "vdb",
+    "references",
+    "ocio",
+    "addons",
+    "report",
+    "render_settings",
+    "images",
+    "movies",
+    "planner",
+    "verify",
 )
 
+def _modules():
+    return [importlib.import_module(f".{name}", __name__) for name in MODULE_NAMES]
+
 def register():
-    for mod in modules:
+    for mod in _modules():
         mod.register()
 
 def unregister():
-    for mod in reversed(modules):
-        mod.unregister()
\ No newline at end of file
+    for mod in reversed(_modules()):
+        mod.unregister()
@@ -0,0 +1,129 @@
+import os
+import glob
+import time
+import hashlib
+import tempfile
+import threading
+import zipfile
+from . import utils
+
+# Bump when the archive layout changes, so older cached zips are rebuilt
+CACHE_VERSION = 2
+
+# Cached zips no pack has used for this long are removed
+MAX_AGE_DAYS = 30
+
+def get_cache_directory():
+    """Add-on Cache Directory preference, or a folder in the system temporary directory."""
+    directory = utils.get_preference("addon_cache_directory", "")
+    if directory:
+        return utils.get_absolute_path(directory)
+    return os.path.join(tempfile.gettempdir(), "dy_pack_master", "addon_cache")
+
+def addon_files(src_path, clean_name):
+    """
+    Files of an add-on and their name in its zip: [(path, arcname, stat)].
+    A package (__init__.py) is zipped as clean_name/..., without __pycache__
+    and .pyc files; a single-file add-on as its file name.
+    """
+    if os.path.basename(src_path) != '__init__.py':
+        return [(src_path, os.path.basename(src_path), os.stat(src_path))]
+
+    src_folder = os.path.dirname(src_path)
+    files = []
+    for root, dirs, filenames in os.walk(src_folder):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+        for file in sorted(filenames):
+            if file.endswith('.pyc'):
+                continue
+            file_path = os.path.join(root, file)
+            rel_path = os.path.relpath(file_path, src_folder)
+            files.append((file_path, os.path.join(clean_name, rel_path), os.stat(file_path)))
+    return files
+
+def fingerprint(files, module_name):
+    """
+    Hash of an add-on's module name and of the names, sizes and modification
+    times of its files; changes whenever one changes. The full module name
+    keeps add-ons with the same last name component (bl_ext.a.tools and
+    bl_ext.b.tools) apart.
+    """
+    hasher = hashlib.sha1(f"v{CACHE_VERSION}|{module_name}\n".encode("utf-8"))
+    for _, arcname, stat in files:
+        hasher.update(f"{utils.normalize_path(arcname)}|{stat.st_size}|{stat.st_mtime_ns}\n".encode("utf-8"))
+    return hasher.hexdigest()
+
+class AddonCache:
+    """
+    Zipped add-ons shared by every pack on this machine, keyed by a
+    fingerprint of the add-on's files. An unchanged add-on is zipped once and
+    then hardlinked (or copied) into each pack. Zips are written under a
+    temporary name and renamed, so several Blender processes can share the cache.
+    A zip is never removed while packs may still need it: using it refreshes
+    its modification time, and only zips unused for MAX_AGE_DAYS are evicted.
+    """
+
+    def __init__(self, directory=None, max_age_days=MAX_AGE_DAYS):
+        self.directory = utils.ensure_directory(directory or get_cache_directory())
+        self.evict(max_age_days)
+
+    def fetch(self, src_path, module_name):
+        """Return (cached zip path, True if it was built by this call) for the add-on module_name."""
+        clean_name = module_name.split('.')[-1]
+        files = addon_files(src_path, clean_name)
+        cached = os.path.join(self.directory, f"{clean_name}-{fingerprint(files, module_name)[:16]}.zip")
+        try:
+            os.utime(cached)  # Marks it as used, so it is not evicted
+            return cached, False
+        except OSError:
+            pass
+
+        partial_path = f"{cached}.{os.getpid()}.{threading.get_ident()}{utils.PARTIAL_SUFFIX}"
+        try:
+            with zipfile.ZipFile(partial_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for file_path, arcname, _ in files:
+                    zipf.write(file_path, arcname)
+            os.replace(partial_path, cached)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+        return cached, True
+
+    def evict(self, max_age_days):
+        """
+        Remove the zips (and partial zips of interrupted builds) no pack has
+        used for max_age_days. Packs keep their own hardlink or copy.
+        """
+        cutoff = time.time() - max_age_days * 24 * 3600
+        pattern = os.path.join(glob.escape(self.directory), "*.zip*")
+        removed = 0
+        for path in glob.glob(pattern):
+            if not (path.endswith(".zip") or path.endswith(utils.PARTIAL_SUFFIX)):
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        if removed:
+            print(f"  - Removed {removed} add-on zips unused for {max_age_days} days from {self.directory}")
+
+def deliver(cached, zip_path):
+    """
+    Put a cached zip at zip_path: kept if already the same file, else
+    hardlinked, else copied. Both go through a temporary name, so an existing
+    zip_path is only replaced once the new file is complete.
+    Returns zip_path, or None if the cached zip could not be delivered.
+    """
+    if os.path.exists(zip_path) and os.path.samefile(cached, zip_path):
+        return zip_path
+    partial_path = f"{zip_path}.{os.getpid()}.{threading.get_ident()}{utils.PARTIAL_SUFFIX}"
+    if utils.link_file(cached, partial_path):
+        try:
+            os.replace(partial_path, zip_path)
+            return zip_path
+        except OSError:
+            os.remove(partial_path)
+            raise
+    return utils.copy_file(cached, os.path.dirname(zip_path), overwrite=True, filename=os.path.basename(zip_path))
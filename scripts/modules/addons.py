@@ -1,9 +1,9 @@
 import bpy
 import addon_utils
 import os
-import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from bpy.app.handlers import persistent
-from . import utils
+from . import utils, addon_cache
 
 def load_exclusion_list():
     """Load the addon exclusion list from external txt file."""
@@ -58,7 +58,11 @@ def populate_addon_list(scene):
     print(f"Refreshed add-on list: {len(scene.dy_pack_master_addon_list)} items found.")
 
 def localize_addons(base_path=None):
-    """Copy selected add-ons to the local 'addons' folder."""
+    """
+    Copy selected add-ons to the local 'addons' folder as zips. Zips come from
+    the add-on cache (see addon_cache), so an unchanged add-on is not zipped
+    again; changed add-ons are zipped in parallel on Copy Workers threads.
+    """
     base_path = base_path or utils.get_blend_dir()
     if not base_path:
         print("ERROR: Blend file must be saved before localizing add-ons.")
@@ -67,49 +71,39 @@ def localize_addons(base_path=None):
     local_addons_dir = os.path.join(base_path, "addons")
     utils.ensure_directory(local_addons_dir)
 
-    count = 0
+    # Read the list on the main thread; the workers only touch files
     scene = bpy.context.scene
-    for item in scene.dy_pack_master_addon_list:
-        if item.selected:
-            _localize_addon_item(item, local_addons_dir)
-            count += 1
-    
-    if count == 0:
+    selected = [(item.path, item.module_name) for item in scene.dy_pack_master_addon_list if item.selected]
+    if not selected:
         print("No add-ons selected to localize.")
-    else:
-        print(f"Add-on localization complete. Localized {count} add-ons.")
+        return {'FINISHED'}
+
+    cache = addon_cache.AddonCache()
+    workers = max(1, min(utils.get_preference("copy_workers", 4), len(selected)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dy_pack_addons") as executor:
+        results = list(executor.map(lambda args: _localize_addon_item(cache, *args, local_addons_dir), selected))
+
+    built = results.count("zipped")
+    reused = results.count("cached")
+    print(f"Add-on localization complete. Localized {built + reused} add-ons "
+          f"({built} zipped, {reused} reused from {cache.directory}).")
     return {'FINISHED'}
 
-def _localize_addon_item(item, dest_dir):
-    """Helper to localize a single addon item."""
-    src_path = item.path
-    module_name = item.module_name
+def _localize_addon_item(cache, src_path, module_name, dest_dir):
+    """Helper to localize a single addon. Returns "zipped", "cached" or None on failure."""
     clean_name = module_name.split('.')[-1]
     zip_path = os.path.join(dest_dir, f"{clean_name}.zip")
-    
-    if os.path.basename(src_path) == '__init__.py':
-        src_folder = os.path.dirname(src_path)
-        try:
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(src_folder):
-                    dirs[:] = [d for d in dirs if d != '__pycache__']
-                    for file in files:
-                        if file == '__pycache__' or file.endswith('.pyc'): continue
-                        file_path = os.path.join(root, file)
-                        rel_path = os.path.relpath(file_path, src_folder)
-                        arcname = os.path.join(clean_name, rel_path)
-                        zipf.write(file_path, arcname)
-            print(f"  - Zipped package: {module_name} -> {zip_path}")
-        except Exception as e:
-            print(f"ERROR zipping {module_name}: {e}")
-    else:
-        try:
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                arcname = os.path.basename(src_path)
-                zipf.write(src_path, arcname)
-            print(f"  - Zipped file: {module_name} -> {zip_path}")
-        except Exception as e:
-            print(f"ERROR zipping {module_name}: {e}")
+    try:
+        cached, built = cache.fetch(src_path, module_name)
+        if not addon_cache.deliver(cached, zip_path):
+            print(f"ERROR: Failed to copy the cached zip of {module_name} to {zip_path}")
+            return None
+    except Exception as e:
+        print(f"ERROR zipping {module_name}: {e}")
+        return None
+    kind = "package" if os.path.basename(src_path) == '__init__.py' else "file"
+    print(f"  - {'Zipped' if built else 'Reused cached'} {kind}: {module_name} -> {zip_path}")
+    return "zipped" if built else "cached"
 
 @persistent
 def load_handler(dummy):
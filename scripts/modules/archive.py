@@ -0,0 +1,224 @@
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+import threading
+from contextlib import contextmanager
+from . import utils
+
+# Pack output modes and the extension of their archive
+OUTPUT_FORMATS = (
+    ('DIRECTORY', "Directory", "Localize assets into a pack directory"),
+    ('TAR', "Tar Archive", "Stream localized assets into an uncompressed .tar archive"),
+    ('ZIP', "Zip Archive", "Stream localized assets into a .zip archive (stored, not compressed)"),
+)
+EXTENSIONS = {'TAR': ".tar", 'ZIP': ".zip"}
+
+class VolumeFile:
+    """
+    Write-only file that rolls over to a new volume (name.001, name.002...) every
+    volume_size bytes. Volumes are plain byte splits: concatenate them to get the
+    archive back. With volume_size 0, a single file is written at path.
+    """
+
+    def __init__(self, path, volume_size=0):
+        self.path = path
+        self.volume_size = volume_size
+        self.volumes = []
+        self._file = None
+        self._written = 0   # Bytes written to the current volume
+        self._position = 0  # Bytes written in total
+        self._open_volume()
+
+    def _open_volume(self):
+        if self._file:
+            self._file.close()
+        path = f"{self.path}.{len(self.volumes) + 1:03d}" if self.volume_size else self.path
+        self._file = open(path, "wb")
+        self.volumes.append(path)
+        self._written = 0
+
+    def write(self, data):
+        data = memoryview(data)
+        total = len(data)
+        while data:
+            if self.volume_size and self._written >= self.volume_size:
+                self._open_volume()
+            chunk = data if not self.volume_size else data[:self.volume_size - self._written]
+            self._file.write(chunk)
+            self._written += len(chunk)
+            data = data[len(chunk):]
+        self._position += total
+        return total
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+class HashingReader:
+    """Read-only file wrapper feeding everything read to a hashlib object."""
+
+    def __init__(self, file, hasher):
+        self.file = file
+        self.hasher = hasher
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.hasher.update(data)
+        return data
+
+class ArchiveWriter:
+    """
+    Pack archive written in a single pass. Localized files are streamed into it
+    by the copy engine as their destination would be in a pack directory
+    (relative to root, under prefix); add_directory() appends the files staged
+    in root (packed .blend, pack_log.txt, reports) at the end.
+    """
+
+    def __init__(self, path, root, archive_format='TAR', volume_size=0, prefix=""):
+        self.path = path
+        self.root = root
+        self.archive_format = archive_format
+        self.prefix = prefix
+        self.completed = False  # Set once the pack succeeded; otherwise the archive is discarded
+        self.error = None  # Set if the archive could not be finished
+        self.files_added = 0
+        self._lock = threading.Lock()
+        self._members = set()
+        self._stream = VolumeFile(path, volume_size)
+        if archive_format == 'ZIP':
+            self._archive = zipfile.ZipFile(self._stream, "w", zipfile.ZIP_STORED, allowZip64=True)
+        else:
+            self._archive = tarfile.open(fileobj=self._stream, mode="w|", format=tarfile.PAX_FORMAT)
+
+    @property
+    def volumes(self):
+        return self._stream.volumes
+
+    def member(self, dest_path):
+        """Archive member name of a path inside the staging root."""
+        name = os.path.relpath(dest_path, self.root).replace('\\', '/')
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def contains(self, dest_path):
+        """True if the file at dest_path (inside the staging root) was added to the archive."""
+        with self._lock:
+            return self.member(dest_path) in self._members
+
+    def add_file(self, src, dest_path, hasher=None):
+        """
+        Stream src into the archive at the member of dest_path. Thread safe; a
+        member is only added once. hasher: optional hashlib object fed with the
+        content as it is streamed. Returns False if the member already existed.
+        """
+        member = self.member(dest_path)
+        with self._lock:
+            if member in self._members:
+                return False
+            if hasher is None:
+                if self.archive_format == 'ZIP':
+                    self._archive.write(src, member)
+                else:
+                    self._archive.add(src, member, recursive=False)
+            else:
+                self._add_hashed(src, member, hasher)
+            self._members.add(member)
+            self.files_added += 1
+        return True
+
+    def _add_hashed(self, src, member, hasher):
+        """Add a file while feeding its content to hasher, so it is read only once."""
+        with open(src, "rb") as f:
+            reader = HashingReader(f, hasher)
+            if self.archive_format == 'ZIP':
+                info = zipfile.ZipInfo.from_file(src, member)
+                with self._archive.open(info, "w", force_zip64=info.file_size >= zipfile.ZIP64_LIMIT) as dest:
+                    shutil.copyfileobj(reader, dest, utils.BUFFER_SIZE)
+            else:
+                self._archive.addfile(self._archive.gettarinfo(src, member), reader)
+
+    def add_link(self, target_path, dest_path):
+        """Add dest_path as a hardlink to a member already added. Returns False if the format has no links."""
+        if self.archive_format != 'TAR':
+            return False
+        info = tarfile.TarInfo(self.member(dest_path))
+        info.type = tarfile.LNKTYPE
+        info.linkname = self.member(target_path)
+        with self._lock:
+            if info.name not in self._members:
+                self._archive.addfile(info)
+                self._members.add(info.name)
+        return True
+
+    def add_directory(self, directory, last=()):
+        """Add every file staged in directory; the files in last are added at the very end, in order."""
+        last = [os.path.normpath(path) for path in last]
+        for root, _, files in os.walk(directory):
+            for file in sorted(files):
+                path = os.path.normpath(os.path.join(root, file))
+                if path not in last:
+                    self.add_file(path, path)
+        for path in last:
+            if os.path.isfile(path):
+                self.add_file(path, path)
+
+    def close(self):
+        self._archive.close()
+        self._stream.close()
+
+    def discard(self):
+        """Close and delete an incomplete archive."""
+        try:
+            self.close()
+        except (OSError, tarfile.TarError, ValueError):
+            pass
+        for volume in self.volumes:
+            if os.path.exists(volume):
+                os.remove(volume)
+
+@contextmanager
+def output(archive_format, archive_path, staging_dir, volume_size=0, prefix="", last=()):
+    """
+    Archive output of a pack. Yields an ArchiveWriter, or None for the
+    'DIRECTORY' format. Once the block exits with writer.completed set, the
+    files staged in staging_dir are appended (the paths in last at the very
+    end) and the archive is closed; otherwise the partial archive is deleted.
+    The staging directory is always removed, and writer.error is set if the
+    archive could not be finished.
+    """
+    if archive_format == 'DIRECTORY':
+        yield None
+        return
+
+    writer = ArchiveWriter(archive_path, staging_dir, archive_format, volume_size, prefix)
+    try:
+        yield writer
+    finally:
+        try:
+            if writer.completed:
+                try:
+                    writer.add_directory(staging_dir, last)
+                    writer.close()
+                    print(f"Pack archive written: {', '.join(writer.volumes)} ({writer.files_added} files)")
+                except (OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+                    writer.error = e
+                    print(f"ERROR: Failed to finish pack archive {archive_path}: {e}")
+                    writer.discard()
+            else:
+                writer.discard()
+                print(f"Pack archive discarded: {archive_path}")
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+def staging_directory(archive_path):
+    """Temporary directory next to the archive for the files written by Blender (packed .blend, log, reports)."""
+    directory = utils.ensure_directory(os.path.dirname(archive_path))
+    return tempfile.mkdtemp(prefix=".dypack_", dir=directory)
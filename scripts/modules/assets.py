@@ -0,0 +1,132 @@
+import os
+import hashlib
+from . import utils, sequence_index, remap
+
+class Asset:
+    """
+    A datablock to localize, as resolved by a localizer's collect step:
+    the files to copy, the pack subfolder they go to and the path the
+    datablock will point to afterwards. Collecting never modifies anything,
+    so the same assets drive both the pack and the dry-run planner.
+    Assets on storage the render nodes mount (see remap) are only relinked.
+    """
+
+    def __init__(self, datablock, asset_type, source, subfolder, files=None, filename=None, relinkable=False,
+                 entry=None):
+        """entry: path_index.PathEntry of the datablock, whose cached stat saves a lookup of source."""
+        self.datablock = datablock
+        self.asset_type = asset_type
+        self.source = source
+        self.subfolder = subfolder
+        source_stat = entry.stat if entry is not None else None
+        self.files = files if files is not None else [(source, source_stat)]  # [(path, stat or None)]
+        self.filename = filename or os.path.basename(source)
+        self.relinkable = relinkable
+        self.remapped = remap.match(source)  # Absolute farm path, or None to localize the asset
+        self.missing = self.remapped is None and source_stat is None and not os.path.exists(source)
+
+    @property
+    def name(self):
+        return self.datablock.name if self.datablock is not None else self.filename
+
+    def dest_dir(self, base_path):
+        return os.path.join(base_path, self.subfolder)
+
+    def relative_path(self, base_path, results=None):
+        """
+        Path the datablock is relinked to. A relinkable asset may resolve to an
+        identical file localized for another datablock (see copy_engine results).
+        """
+        if self.remapped:
+            return self.remapped
+        if self.relinkable and results and results.get(self.source):
+            return utils.get_relative_path(results[self.source], base_path)
+        return f"//{self.subfolder}/{self.filename}"
+
+    def submit(self, batch, base_path, processed_files=None):
+        """Queue every file of the asset on a copy batch, skipping files already queued."""
+        if self.remapped:
+            return
+        dest_dir = self.dest_dir(base_path)
+        utils.ensure_directory(dest_dir)
+        for src_file, src_stat in self.files:
+            if processed_files is not None:
+                if src_file in processed_files:
+                    continue
+                processed_files.add(src_file)
+            filename = self.filename if src_file == self.source else None
+            batch.submit(src_file, dest_dir, filename=filename, relinkable=self.relinkable, src_stat=src_stat)
+
+    def frame_range(self):
+        """(first, last) frame numbers of the files of a sequence, or None for a single file."""
+        if len(self.files) < 2:
+            return None
+        frames = []
+        for src_file, _ in self.files:
+            parts = sequence_index.split_frame(os.path.basename(src_file))
+            if parts:
+                frames.append(int(parts[1]))
+        return (min(frames), max(frames)) if frames else None
+
+    def manifest_entry(self, base_path, results, pack_manifest):
+        """
+        Entry of the asset in the pack manifest, from the copy results of its
+        batch ({source: destination or None}) and the file entries recorded
+        by the copy engine. checksum is the file hash for a single file, or
+        the hash of the frame hashes in frame order for a sequence; it is
+        None unless every file was hashed.
+        """
+        datablock = self.datablock
+        entry = {
+            "type": self.asset_type,
+            "datablock_type": datablock.bl_rna.identifier if datablock is not None else None,
+            "name": self.name,
+            "source": utils.normalize_path(self.source),
+            "path": None,
+            "files": 0,
+            "size": 0,
+            "checksum": None,
+            "frame_range": None,
+            "status": "missing",
+        }
+        if self.missing:
+            return entry
+        if self.remapped:
+            entry["path"] = self.remapped
+            entry["status"] = "remapped"
+            return entry
+
+        dest_dir = self.dest_dir(base_path)
+        statuses = set()
+        hashes = []
+        for src_file, _ in self.files:
+            dest_path = results.get(src_file)
+            file_entry = pack_manifest.lookup(dest_path) if dest_path else None
+            if file_entry is None:
+                statuses.add("failed")
+                continue
+            filename = self.filename if src_file == self.source else os.path.basename(src_file)
+            # A relinkable asset may point to an identical file localized for another datablock
+            same_file = os.path.normcase(dest_path) == os.path.normcase(os.path.join(dest_dir, filename))
+            statuses.add(file_entry["status"] if same_file else "deduplicated")
+            entry["files"] += 1
+            entry["size"] += file_entry["size"]
+            hashes.append(file_entry.get("hash"))
+
+        if len(statuses) == 1:
+            entry["status"] = statuses.pop()
+        elif "failed" in statuses:
+            entry["status"] = "partial" if entry["files"] else "failed"
+        else:
+            entry["status"] = "copied"
+        if entry["files"]:
+            entry["path"] = self.relative_path(base_path, results)[2:]  # Relative to the pack directory, without //
+        if hashes and all(hashes) and entry["status"] not in ("failed", "partial"):
+            if len(hashes) == 1:
+                entry["checksum"] = hashes[0]
+            else:
+                entry["checksum"] = hashlib.new(utils.HASH_ALGORITHM, "".join(hashes).encode("ascii")).hexdigest()
+        frames = self.frame_range()
+        if frames:
+            entry["frame_range"] = list(frames)
+        return entry
@@ -0,0 +1,359 @@
+import os
+import re
+import gzip
+import struct
+
+# Standalone .blend reader: lists the external file paths of a blend file from
+# its file blocks and SDNA, without bpy and without loading the file in Blender.
+
+# ID block codes of the datablocks holding external file paths
+ID_CODES = {b"IM": "Image", b"LI": "Library", b"CF": "CacheFile", b"VO": "Volume", b"MC": "MovieClip"}
+
+# Path member of each ID type; files store DNA names, so older renamed members are tried too
+PATH_MEMBERS = ("filepath", "name")
+
+# Image.source values
+IMAGE_SOURCES = {1: 'FILE', 2: 'SEQUENCE', 3: 'MOVIE', 4: 'GENERATED', 5: 'VIEWER', 6: 'TILED'}
+IMAGE_FILE_SOURCES = {'FILE', 'SEQUENCE', 'MOVIE', 'TILED'}
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+DNA_ARRAY = re.compile(r'\[(\d+)\]')
+DNA_DECORATION = re.compile(r'\[.*|[()*]')
+
+class ExternalPath:
+    """One external file path stored in a .blend file, resolved against the file it was read from."""
+
+    __slots__ = ("id_type", "name", "path", "abs_path", "library", "parent", "packed", "source", "is_sequence")
+
+    def __init__(self, id_type, name, path):
+        self.id_type = id_type
+        self.name = name
+        self.path = path
+        self.abs_path = None
+        self.library = None      # Name of the library a linked datablock comes from
+        self.parent = None       # Name of the library linking an indirect library
+        self.packed = False
+        self.source = None       # Image source ('FILE', 'SEQUENCE', 'MOVIE'...)
+        self.is_sequence = False
+
+    @property
+    def is_file(self):
+        """True if the datablock reads its data from the file at abs_path."""
+        if self.packed or not self.path:
+            return False
+        return self.id_type != "Image" or self.source in IMAGE_FILE_SOURCES
+
+    def __repr__(self):
+        return f"<ExternalPath {self.id_type} '{self.name}': {self.path}>"
+
+class _Struct:
+    """SDNA struct: size and members {name: (offset, type name, size, is pointer)}."""
+
+    __slots__ = ("type_name", "size", "members")
+
+    def __init__(self, type_name, size):
+        self.type_name = type_name
+        self.size = size
+        self.members = {}
+
+class SDNA:
+    """Struct layout of a blend file, parsed from its DNA1 block."""
+
+    def __init__(self, data, pointer_size, endian):
+        self.pointer_size = pointer_size
+        self.endian = endian
+        self.structs = []
+        self.by_type = {}
+        self._parse(data)
+
+    def _parse(self, data):
+        offset = 4  # "SDNA"
+        names, offset = self._read_strings(data, offset, b"NAME")
+        types, offset = self._read_strings(data, offset, b"TYPE")
+
+        offset = self._expect(data, offset, b"TLEN")
+        lengths = struct.unpack_from(f"{self.endian}{len(types)}h", data, offset)
+        offset = _align4(offset + 2 * len(types))
+
+        offset = self._expect(data, offset, b"STRC")
+        count, = struct.unpack_from(f"{self.endian}i", data, offset)
+        offset += 4
+        for _ in range(count):
+            type_index, member_count = struct.unpack_from(f"{self.endian}2h", data, offset)
+            offset += 4
+            members = struct.unpack_from(f"{self.endian}{2 * member_count}h", data, offset)
+            offset += 4 * member_count
+
+            dna_struct = _Struct(types[type_index], lengths[type_index])
+            member_offset = 0
+            for member_type, name_index in zip(members[0::2], members[1::2]):
+                name = names[name_index]
+                is_pointer = name.startswith(('*', '(*'))
+                count_items = 1
+                for dim in DNA_ARRAY.findall(name):
+                    count_items *= int(dim)
+                size = (self.pointer_size if is_pointer else lengths[member_type]) * count_items
+                dna_struct.members[DNA_DECORATION.sub('', name)] = (member_offset, types[member_type], size, is_pointer)
+                member_offset += size
+            self.structs.append(dna_struct)
+            self.by_type[dna_struct.type_name] = dna_struct
+
+    def _expect(self, data, offset, tag):
+        if data[offset:offset + 4] != tag:
+            raise ValueError(f"Invalid SDNA: expected {tag.decode()} at {offset}")
+        return offset + 4
+
+    def _read_strings(self, data, offset, tag):
+        offset = self._expect(data, offset, tag)
+        count, = struct.unpack_from(f"{self.endian}i", data, offset)
+        offset += 4
+        strings = []
+        for _ in range(count):
+            end = data.index(b"\0", offset)
+            strings.append(data[offset:end].decode("ascii", "replace"))
+            offset = end + 1
+        return strings, _align4(offset)
+
+def _align4(offset):
+    return (offset + 3) & ~3
+
+class _Block:
+    """Members of an SDNA struct read from the data of a file block."""
+
+    INT_FORMATS = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}
+
+    def __init__(self, dna_struct, data, pointer_size, endian, base=0):
+        self.dna_struct = dna_struct
+        self.data = data
+        self.base = base
+        self.pointer_format = f"{endian}{'Q' if pointer_size == 8 else 'I'}"
+        self.endian = endian
+
+    def offset(self, name):
+        member = self.dna_struct.members.get(name)
+        return self.base + member[0] if member else None
+
+    def string(self, *names):
+        """First of names that is a member, read as a NUL-terminated string ('' if none is)."""
+        for name in names:
+            member = self.dna_struct.members.get(name)
+            if member:
+                offset = self.base + member[0]
+                return self.data[offset:offset + member[2]].split(b"\0", 1)[0].decode("utf-8", "replace")
+        return ""
+
+    def pointer(self, name):
+        """Address stored in a pointer member, or the first pointer of a struct member (e.g. ListBase.first)."""
+        member = self.dna_struct.members.get(name)
+        if not member or member[2] < struct.calcsize(self.pointer_format):
+            return 0
+        return struct.unpack_from(self.pointer_format, self.data, self.base + member[0])[0]
+
+    def integer(self, name):
+        member = self.dna_struct.members.get(name)
+        if not member or member[2] not in self.INT_FORMATS:
+            return 0
+        return struct.unpack_from(f"{self.endian}{self.INT_FORMATS[member[2]]}", self.data, self.base + member[0])[0]
+
+class BlendFile:
+    """
+    External paths of a .blend file (images, libraries, cache files, volumes,
+    movie clips), read from the file blocks of these datablocks. Handles
+    uncompressed, gzip and zstd compressed files, 32/64-bit pointers, both
+    endiannesses and the large block headers of Blender 5.0 files.
+    Raises OSError if the file cannot be read and ValueError if it is not a blend file.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = os.path.abspath(filepath)
+        self.version = None
+        self.pointer_size = 8
+        self.endian = "<"
+        self.compression = None
+        self.paths = []
+        self._read()
+
+    @property
+    def libraries(self):
+        return [path for path in self.paths if path.id_type == "Library"]
+
+    def file_paths(self, local_only=True):
+        """Paths of the datablocks reading an external file (local datablocks only by default)."""
+        return [path for path in self.paths if path.is_file and not (local_only and path.library)]
+
+    def _read(self):
+        with open(self.filepath, "rb") as raw:
+            stream = self._open_stream(raw)
+            try:
+                blocks, dna = self._read_blocks(stream)
+            finally:
+                if stream is not raw:
+                    stream.close()
+        if dna is None:
+            raise ValueError(f"No DNA1 block in {self.filepath}")
+        self._read_paths(blocks, SDNA(dna, self.pointer_size, self.endian))
+
+    def _open_stream(self, raw):
+        magic = raw.read(4)
+        raw.seek(0)
+        if magic[:2] == GZIP_MAGIC:
+            self.compression = "gzip"
+            return gzip.GzipFile(fileobj=raw)
+        if magic == ZSTD_MAGIC:
+            self.compression = "zstd"
+            return _zstd_stream(raw)
+        return raw
+
+    def _read_blocks(self, stream):
+        """Keep the blocks of the ID types with paths and the DNA1 block; skip the others."""
+        header = _read_exact(stream, 12)
+        if header[:7] != b"BLENDER":
+            raise ValueError(f"Not a blend file: {self.filepath}")
+
+        if header[7:9].isdigit():
+            # Blender 5.0+: BLENDER<header size>-<format version><endian><version>
+            header += _read_exact(stream, int(header[7:9]) - 12)
+            self.endian = "<" if header[12:13] == b"v" else ">"
+            self.version = int(header[13:17])
+            bhead = struct.Struct(f"{self.endian}4siQqq")
+            fields = lambda values: (values[0], values[3], values[2], values[1])  # code, len, old, sdna
+        else:
+            self.pointer_size = 8 if header[7:8] == b"-" else 4
+            self.endian = "<" if header[8:9] == b"v" else ">"
+            self.version = int(header[9:12])
+            bhead = struct.Struct(f"{self.endian}4si{'Q' if self.pointer_size == 8 else 'I'}ii")
+            fields = lambda values: values[:4]
+
+        blocks = []
+        dna = None
+        while True:
+            data = stream.read(bhead.size)
+            if len(data) < bhead.size:
+                break
+            code, length, old, sdna_index = fields(bhead.unpack(data))
+            if code == b"ENDB":
+                break
+            if code == b"DNA1":
+                dna = _read_exact(stream, length)
+            elif code[:2] in ID_CODES and code[2:] == b"\0\0":
+                blocks.append((code[:2], old, sdna_index, _read_exact(stream, length)))
+            else:
+                _skip(stream, length)
+        return blocks, dna
+
+    def _read_paths(self, blocks, sdna):
+        if "ID" not in sdna.by_type:
+            raise ValueError(f"No ID struct in the SDNA of {self.filepath}")
+        id_struct = sdna.by_type["ID"]
+        library_names = {}  # Address of a Library block -> library name
+        pending = []
+        for code, old, sdna_index, data in blocks:
+            block = _Block(sdna.structs[sdna_index], data, self.pointer_size, self.endian)
+            base = block.offset("id") or 0
+            id_block = _Block(id_struct, data, self.pointer_size, self.endian, base)
+            path = ExternalPath(ID_CODES[code], id_block.string("name")[2:], block.string(*PATH_MEMBERS))
+            if code == b"LI":
+                library_names[old] = path.name
+            pending.append((path, id_block.pointer("lib"), block.pointer("parent")))
+
+            if code == b"IM":
+                path.source = IMAGE_SOURCES.get(block.integer("source"))
+                # Images store their packed files in a ListBase since 2.8x: its first pointer is set when packed
+                path.packed = bool(block.pointer("packedfiles") or block.pointer("packedfile"))
+            elif code in (b"LI", b"VO"):
+                path.packed = bool(block.pointer("packedfile"))
+                if code == b"VO":
+                    path.is_sequence = bool(block.integer("is_sequence"))
+
+        # Linked datablocks and indirect libraries resolve // from their library file
+        for path, lib_pointer, parent_pointer in pending:
+            path.library = library_names.get(lib_pointer)
+            if path.id_type == "Library":
+                path.parent = library_names.get(parent_pointer)
+        libraries = {path.name: path for path, _, _ in pending if path.id_type == "Library"}
+
+        def library_file(name, depth=0):
+            library = libraries.get(name)
+            if library is None or depth > len(libraries):
+                return None
+            if library.abs_path is None:
+                library.abs_path = self.resolve(library.path, library_file(library.parent, depth + 1))
+            return library.abs_path
+
+        for path, _, _ in pending:
+            if path.id_type == "Library":
+                library_file(path.name)
+            else:
+                path.abs_path = self.resolve(path.path, library_file(path.library))
+            if path.path:
+                self.paths.append(path)
+
+    def resolve(self, path, relative_to=None):
+        """Absolute path of a path stored in the file; // is relative to relative_to (a blend file) or this file."""
+        if not path:
+            return ""
+        path = path.replace('\\', '/')
+        if path.startswith("//"):
+            start = os.path.dirname(relative_to or self.filepath)
+            path = os.path.join(start, path[2:])
+        return os.path.normpath(path)
+
+def _zstd_stream(raw):
+    """Decompressing reader of a zstd blend file (Blender writes it as several frames)."""
+    try:
+        import zstandard  # Bundled with Blender
+    except ImportError:
+        zstandard = None
+    if zstandard is not None:
+        return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=False)
+    try:
+        from compression import zstd  # Python 3.14+
+    except ImportError:
+        raise ValueError("Reading zstd compressed blend files needs the zstandard module or Python 3.14")
+    return zstd.ZstdFile(raw)
+
+def _read_exact(stream, size):
+    data = stream.read(size)
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            raise ValueError("Blend file is truncated")
+        data += chunk
+    return data
+
+def _skip(stream, size):
+    if size <= 0:
+        return
+    try:
+        stream.seek(size, os.SEEK_CUR)
+    except (OSError, ValueError):
+        # Forward-only decompressing streams
+        while size > 0:
+            chunk = stream.read(min(size, 1024 * 1024))
+            if not chunk:
+                raise ValueError("Blend file is truncated")
+            size -= len(chunk)
+
+def scan(filepaths, recursive=True):
+    """
+    Read blend files and, when recursive, every library they link, each unique
+    file once. Returns {absolute blend path: BlendFile, or the error message
+    if it could not be read}, starting with filepaths.
+    """
+    results = {}
+    queue = [os.path.normpath(os.path.abspath(filepath)) for filepath in filepaths]
+    while queue:
+        path = queue.pop(0)
+        if path in results:
+            continue
+        try:
+            results[path] = blend = BlendFile(path)
+        except (OSError, ValueError) as e:
+            results[path] = str(e)
+            continue
+        if recursive:
+            queue.extend(library.abs_path for library in blend.libraries
+                         if not library.packed and library.abs_path not in results)
+    return results
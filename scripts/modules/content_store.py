@@ -0,0 +1,84 @@
+import threading
+from . import utils
+
+class ContentStore:
+    """
+    Pack-wide index of localized files keyed by content hash, shared by every
+    asset type. Files are only hashed when another localized file has the
+    same size, so unique files are never read twice.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_size = {}       # Size -> sources not hashed yet
+        self._hashes = {}        # Source -> content hash
+        self._owners = {}        # Content hash -> source of the first copy
+        self._events = {}        # Source -> Event set once its destination is final
+        self._destinations = {}  # Source -> destination path (None if the copy failed)
+        self._hashed_sizes = set()
+        self.files_deduplicated = 0
+        self.bytes_saved = 0
+
+    def register(self, src, size, hash_now=True):
+        """
+        Register a source before it is localized.
+        Returns the source of an identical file localized earlier in the pack, or None.
+        With hash_now=False the source is only recorded as a candidate for later duplicates.
+        """
+        with self._lock:
+            if src in self._events:
+                return src  # Same file localized to a second destination
+            self._events[src] = threading.Event()
+            pending = self._by_size.setdefault(size, [])
+            if not hash_now or not (pending or size in self._hashed_sizes):
+                pending.append(src)
+                return None
+            peers = list(pending)
+            pending.clear()
+
+        # Hash earlier files of the same size first so the oldest copy owns its content
+        for peer in peers:
+            self._hash(peer, size)
+        owner = self._hash(src, size)
+        return owner if owner != src else None
+
+    def _hash(self, src, size):
+        """Hash a source (once) and return the source owning that content."""
+        content_hash = self._hashes.get(src)
+        if content_hash is None:
+            try:
+                content_hash = utils.hash_file(src)
+            except OSError:
+                return src
+        with self._lock:
+            self._hashes[src] = content_hash
+            self._hashed_sizes.add(size)
+            return self._owners.setdefault(content_hash, src)
+
+    def complete(self, src, dest_path):
+        """Publish the final destination of a source so duplicates can link to it."""
+        with self._lock:
+            self._destinations[src] = dest_path
+            event = self._events.get(src)
+        if event:
+            event.set()
+
+    def content_hash(self, src):
+        """Hash of a source if it was hashed to look for duplicates, or None."""
+        with self._lock:
+            return self._hashes.get(src)
+
+    def wait(self, src):
+        """Wait for a source to be localized and return its destination (or None)."""
+        event = self._events.get(src)
+        if event:
+            event.wait()
+        return self._destinations.get(src)
+
+    def add_saving(self, size):
+        with self._lock:
+            self.files_deduplicated += 1
+            self.bytes_saved += size
+
+    def summary(self):
+        return f"Deduplicated {self.files_deduplicated} files, saved {self.bytes_saved / (1024 * 1024):.1f} MB"
@@ -0,0 +1,435 @@
+import os
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from . import utils, manifest, content_store, sequence_index, shared_store, timing
+
+DEFAULT_WORKERS = 4
+
+# Engine shared by every localizer while a pack is running (see session())
+_active_engine = None
+
+# Statistics of the last completed session, for batch summaries (see CopyEngine.stats())
+last_stats = None
+
+class CopyEngine:
+    """
+    Thread pool that copies files for the localizers.
+    Jobs are submitted in batches; datablocks are relinked on the main thread
+    once their batch has completed.
+    """
+
+    def __init__(self, workers=None, manifest=None, archive=None):
+        self.workers = max(1, workers or utils.get_preference("copy_workers", DEFAULT_WORKERS))
+        self.manifest = manifest
+        self.archive = archive  # archive.ArchiveWriter the files are streamed into instead of being copied
+        self.allow_hardlinks = utils.get_preference("allow_hardlinks", False)
+        self.io = timing.IOCounters()  # stat and directory listing calls of the pack (see PackTimer)
+        self.directory_index = sequence_index.DirectoryIndex(self.io)
+        self.path_index = None  # path_index.PathIndex shared by the steps of a pack (see path_index.get_index)
+        self.sequence_folders = None  # layout.SequenceFolders shared by the steps of a pack (see layout.get_folders)
+        self.remap_rules = None  # remap.RemapRules read once per pack (see remap.get_rules)
+        self.content_store = None
+        if utils.get_preference("deduplicate_files", True):
+            self.content_store = content_store.ContentStore()
+        # Store shared with the other shots of a batch pack (see scripts/cli.py)
+        self.shared_store = None
+        shared_dir = utils.get_preference("shared_store_directory", "")
+        if shared_dir and archive is None:
+            self.shared_store = shared_store.SharedStore(shared_dir)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dy_pack_copy")
+        self._lock = threading.Lock()
+        self._claimed = {}  # Destination path -> (normalized source, Future), so two jobs never write the same file
+        self.files_copied = 0
+        self.files_skipped = 0
+        self.files_failed = 0
+        self.bytes_copied = 0
+        self.files_shared = 0
+        self.bytes_shared = 0
+        self.copy_time = 0.0
+        self.strategies = {}  # Transfer strategy -> [file count, reason of the first transfer]
+        # Progress of the queued jobs, for the modal Pack Project
+        self.files_queued = 0
+        self.files_done = 0
+        self.bytes_done = 0
+        self.cancelled = False
+
+    def submit(self, src, dest_dir, overwrite=False, filename=None, relinkable=False, src_stat=None):
+        """
+        Queue a copy of src into dest_dir (optionally renamed to filename).
+        Returns a Future resolving to the destination path or None.
+        relinkable: the datablock references this single file, so a duplicate may
+        resolve to another asset's copy when hardlinks are not available.
+        src_stat: stat result of src if already known (e.g. from the directory index).
+        """
+        dest_path = os.path.join(dest_dir, filename or os.path.basename(src))
+        source_key = os.path.normcase(os.path.normpath(src))
+        with self._lock:
+            claim = self._claimed.get(dest_path)
+            if claim is not None and claim[0] != source_key:
+                dest_path = self._resolve_conflict(src, dest_path, source_key, relinkable)
+                claim = self._claimed.get(dest_path)
+            if claim is None:
+                future = self._executor.submit(self._copy, src, dest_dir, dest_path, overwrite, relinkable, src_stat)
+                claim = (source_key, future)
+                self._claimed[dest_path] = claim
+                self.files_queued += 1
+        return claim[1]
+
+    def _resolve_conflict(self, src, dest_path, source_key, relinkable):
+        """
+        Destination for src when dest_path is already claimed by another source
+        with the same name. A relinkable file is renamed (name_001.ext...), its
+        datablock follows the copy result; the frames of a sequence cannot be.
+        """
+        if not relinkable:
+            raise ValueError(
+                f"{dest_path} is the destination of both {self._claimed[dest_path][0]} and {src}; "
+                f"use a per-sequence Sequence Layout to keep them apart"
+            )
+        name, ext = os.path.splitext(dest_path)
+        counter = 1
+        renamed = f"{name}_{counter:03d}{ext}"
+        while renamed in self._claimed and self._claimed[renamed][0] != source_key:
+            counter += 1
+            renamed = f"{name}_{counter:03d}{ext}"
+        if renamed not in self._claimed:
+            print(f"WARNING: {os.path.basename(dest_path)} is already used by another file, "
+                  f"copying {src} as {os.path.basename(renamed)}")
+        return renamed
+
+    def _copy(self, src, dest_dir, dest_path, overwrite, relinkable, src_stat):
+        """Worker: localize a single file and count it as done for progress reporting."""
+        if src_stat is None:
+            self.io.add("stat_calls")
+            try:
+                src_stat = os.stat(src)
+            except OSError:
+                print(f"Source file not found: {src}")
+                with self._lock:
+                    self.files_failed += 1
+                    self.files_done += 1
+                return None
+        try:
+            return self._localize(src, dest_dir, dest_path, overwrite, relinkable, src_stat)
+        finally:
+            with self._lock:
+                self.files_done += 1
+                self.bytes_done += src_stat.st_size
+
+    def _localize(self, src, dest_dir, dest_path, overwrite, relinkable, src_stat):
+        """Copy a single file unless it is up to date, and update the statistics."""
+        if self.archive:
+            return self._archive_file(src, dest_path, relinkable, src_stat)
+
+        self.io.add("stat_calls")  # Destination of the up-to-date check
+        if self.manifest:
+            up_to_date, content_hash = self.manifest.check(src, dest_path, src_stat)
+        else:
+            up_to_date, content_hash = utils.is_up_to_date(src, dest_path, src_stat), None
+
+        store = self.content_store
+        status = "copied"
+        result = None
+        # Duplicates of src wait on complete(), so it must run whatever the copy raises
+        try:
+            if up_to_date and not overwrite:
+                result = dest_path
+                status = "up_to_date"
+                with self._lock:
+                    self.files_skipped += 1
+                if store:
+                    store.register(src, src_stat.st_size, hash_now=False)
+            else:
+                duplicate_of = store.register(src, src_stat.st_size) if store else None
+                if duplicate_of:
+                    result = self._link_duplicate(duplicate_of, dest_path, src_stat.st_size, relinkable)
+                    status = "deduplicated"
+                if not result and self.shared_store:
+                    result, copied = self._fetch_shared(src, dest_dir, dest_path, src_stat)
+                    status = "copied" if copied else "shared"
+                if not result:
+                    status = "copied"
+                    if store and content_hash is None:
+                        content_hash = store.content_hash(src)  # Already read to look for duplicates
+                    hasher = self._new_hasher(content_hash)
+                    result = utils.copy_file(
+                        src, dest_dir, overwrite=True, filename=os.path.basename(dest_path),
+                        allow_hardlink=self.allow_hardlinks, on_transfer=self._record_strategy, hasher=hasher,
+                    )
+                    with self._lock:
+                        if result:
+                            self.files_copied += 1
+                            self.bytes_copied += src_stat.st_size
+                        else:
+                            self.files_failed += 1
+                    if result and hasher:
+                        content_hash = hasher.hexdigest()
+        finally:
+            if store:
+                store.complete(src, result)
+
+        if result == dest_path and self.manifest:
+            self.manifest.record(src, result, src_stat, self._content_hash(src, content_hash), status)
+        return result
+
+    def _new_hasher(self, content_hash=None):
+        """Hasher to feed during a copy when the manifest records hashes and the file is not hashed yet."""
+        if self.manifest and self.manifest.use_hash and content_hash is None:
+            return hashlib.new(utils.HASH_ALGORITHM)
+        return None
+
+    def _content_hash(self, src, content_hash):
+        """
+        Hash recorded in the manifest for src. Copies are hashed while they are
+        read; a file that was linked or reused is hashed by the deduplication
+        lookup when it had to be, and only read again otherwise.
+        """
+        if content_hash or not (self.manifest and self.manifest.use_hash):
+            return content_hash
+        if self.content_store:
+            content_hash = self.content_store.content_hash(src)
+        if content_hash is None:
+            try:
+                content_hash = utils.hash_file(src)
+            except OSError as e:
+                print(f"WARNING: Failed to hash {src}: {e}")
+        return content_hash
+
+    def _record_strategy(self, strategy, reason):
+        with self._lock:
+            if strategy in self.strategies:
+                self.strategies[strategy][0] += 1
+            else:
+                self.strategies[strategy] = [1, reason]
+
+    def _link_duplicate(self, owner, dest_path, size, relinkable):
+        """Reuse the copy of an identical file: hardlink it, or share it when the datablock can be relinked."""
+        owner_dest = self.content_store.wait(owner)
+        if not owner_dest:
+            return None
+        if utils.link_file(owner_dest, dest_path):
+            self.content_store.add_saving(size)
+            return dest_path
+        if relinkable:
+            self.content_store.add_saving(size)
+            return owner_dest
+        return None
+
+    def _archive_file(self, src, dest_path, relinkable, src_stat):
+        """Worker: stream a file into the pack archive at the member of its destination."""
+        store = self.content_store
+        result = None
+        # Duplicates of src wait on complete(), so it must run whatever the archive raises
+        try:
+            duplicate_of = store.register(src, src_stat.st_size) if store else None
+            status = "deduplicated"
+            if duplicate_of:
+                owner_dest = store.wait(duplicate_of)
+                if owner_dest and relinkable:
+                    result = owner_dest
+                elif owner_dest and self.archive.add_link(owner_dest, dest_path):
+                    result = dest_path
+                if result:
+                    store.add_saving(src_stat.st_size)
+
+            content_hash = None
+            if not result:
+                status = "archived"
+                hasher = self._new_hasher()
+                try:
+                    self.archive.add_file(src, dest_path, hasher=hasher)
+                    result = dest_path
+                    content_hash = hasher.hexdigest() if hasher else None
+                    self._record_strategy("archive", f"streamed into the {self.archive.archive_format.lower()} archive")
+                    with self._lock:
+                        self.files_copied += 1
+                        self.bytes_copied += src_stat.st_size
+                except OSError as e:
+                    print(f"Error archiving {src}: {e}")
+                    with self._lock:
+                        self.files_failed += 1
+        finally:
+            if store:
+                store.complete(src, result)
+
+        if result == dest_path and self.manifest:
+            self.manifest.record(src, result, src_stat, self._content_hash(src, content_hash), status)
+        return result
+
+    def _fetch_shared(self, src, dest_dir, dest_path, src_stat):
+        """
+        Localize a file through the batch shared store: copy it there once, then hardlink it into the pack.
+        Returns (destination or None, True if this process copied the file into the store).
+        """
+        store_path, copied = self.shared_store.fetch(src, src_stat, self.allow_hardlinks, self._record_strategy)
+        if not store_path:
+            return None, False
+        if not utils.link_file(store_path, dest_path):
+            # Store on another volume: copy from the store, which may still reflink
+            if not utils.copy_file(store_path, dest_dir, overwrite=True, filename=os.path.basename(dest_path),
+                                   on_transfer=self._record_strategy):
+                return None, False
+        with self._lock:
+            if copied:
+                self.files_copied += 1
+                self.bytes_copied += src_stat.st_size
+            else:
+                self.files_shared += 1
+                self.bytes_shared += src_stat.st_size
+        return dest_path, copied
+
+    def busy(self):
+        """True while queued jobs are not done."""
+        with self._lock:
+            return self.files_done < self.files_queued
+
+    def cancel(self):
+        """Drop the jobs not started yet. Running copies finish, and partial files never look complete."""
+        self.cancelled = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def throughput(self):
+        """Measured copy throughput in MB/s, or None if nothing was copied."""
+        if self.copy_time <= 0 or not self.bytes_copied:
+            return None
+        return self.bytes_copied / (1024 * 1024) / self.copy_time
+
+    def finalize(self):
+        """Finish a completed pack: prune and save the pack manifest with the measured throughput."""
+        if self.manifest:
+            self.manifest.finalize(self.throughput())
+
+    def stats(self):
+        """Copy statistics as a dict, for batch summaries."""
+        content = self.content_store
+        return {
+            "files_copied": self.files_copied,
+            "bytes_copied": self.bytes_copied,
+            "files_skipped": self.files_skipped,
+            "files_failed": self.files_failed,
+            "files_shared": self.files_shared,
+            "bytes_shared": self.bytes_shared,
+            "files_deduplicated": content.files_deduplicated if content else 0,
+            "bytes_deduplicated": content.bytes_saved if content else 0,
+            "copy_time": self.copy_time,
+            "throughput_mb_s": self.throughput(),
+        }
+
+    def add_stats(self, stats):
+        """Count the copies made by another process for this pack (see nested_libraries)."""
+        with self._lock:
+            self.files_copied += stats.get("files_copied", 0)
+            self.bytes_copied += stats.get("bytes_copied", 0)
+            self.files_skipped += stats.get("files_skipped", 0)
+            self.files_failed += stats.get("files_failed", 0)
+
+    def summary(self):
+        """One-line throughput summary for the pack log."""
+        mb = self.bytes_copied / (1024 * 1024)
+        rate = self.throughput() or 0.0
+        text = (f"Copied {self.files_copied} files ({mb:.1f} MB) in {self.copy_time:.1f}s "
+                f"at {rate:.1f} MB/s using {self.workers} workers "
+                f"({self.files_skipped} up to date, {self.files_failed} failed)")
+        for strategy, (count, reason) in sorted(self.strategies.items()):
+            text += f"\n  - {strategy}: {count} files ({reason})"
+        if self.content_store and self.content_store.files_deduplicated:
+            text += f"\n{self.content_store.summary()}"
+        if self.shared_store:
+            text += f"\n{self.shared_store.summary()}"
+        return text
+
+class CopyBatch:
+    """A group of copy jobs submitted by one localizer, completed by wait()."""
+
+    def __init__(self, engine, owns_engine=False):
+        self.engine = engine
+        self.owns_engine = owns_engine
+        self.results = {}
+        self._futures = []
+        self._start = None
+
+    def submit(self, src, dest_dir, overwrite=False, filename=None, relinkable=False, src_stat=None):
+        if self._start is None:
+            self._start = time.perf_counter()
+        future = self.engine.submit(
+            src, dest_dir, overwrite=overwrite, filename=filename, relinkable=relinkable, src_stat=src_stat,
+        )
+        self._futures.append((src, future))
+
+    def running(self, timeout):
+        """Wait up to timeout seconds for the batch; True while some of its jobs are not done."""
+        return bool(wait([future for _, future in self._futures], timeout=timeout).not_done)
+
+    def wait(self):
+        """Block until every job in the batch is done. Returns {source: destination or None}."""
+        for src, future in self._futures:
+            self.results[src] = future.result()
+        if self._start is not None:
+            self.engine.copy_time += time.perf_counter() - self._start
+            self._start = None
+        self._futures = []
+
+        if self.owns_engine:
+            self.engine.shutdown()
+            if self.engine.files_copied or self.engine.files_failed:
+                print(f"  - {self.engine.summary()}")
+        return self.results
+
+    def record_assets(self, collected, base_path):
+        """Add the assets of the batch (missing ones included) to the pack manifest once wait() returned."""
+        pack_manifest = self.engine.manifest
+        if pack_manifest:
+            for asset in collected:
+                pack_manifest.add_asset(asset.manifest_entry(base_path, self.results, pack_manifest))
+
+@contextmanager
+def session(workers=None, pack_dir=None, source=None, archive=None, journal=True):
+    """
+    Create the engine shared by all localizers for the duration of a pack.
+    When pack_dir is given, copies are tracked in its pack manifest and
+    journal so a re-pack, or a resumed interrupted pack, only transfers the delta.
+    source: blend file being packed, recorded in the manifest and in the journal for resume.
+    archive: archive.ArchiveWriter to stream the files into; the manifest is then
+    written to the staging directory (pack_dir) and archived, without a journal.
+    journal: append completed files to the pack journal. Off for the background
+    processes localizing nested libraries, which report their files to the pack instead.
+    """
+    global _active_engine, last_stats
+    pack_manifest = None
+    if pack_dir:
+        pack_manifest = manifest.PackManifest(pack_dir, use_hash=utils.get_preference("manifest_hash", False),
+                                              source=source, journal=journal and archive is None)
+    engine = CopyEngine(workers, manifest=pack_manifest, archive=archive)
+    previous = _active_engine
+    _active_engine = engine
+    try:
+        yield engine
+    finally:
+        _active_engine = previous
+        engine.shutdown()
+        if pack_manifest:
+            pack_manifest.close()
+        last_stats = engine.stats()
+
+def active_engine():
+    """Engine of the running pack, or None."""
+    return _active_engine
+
+def idle():
+    """True when no pack is running: packing and localizing operators are only available then."""
+    return _active_engine is None
+
+def new_batch():
+    """
+    Start a copy batch on the active pack engine, or on a temporary engine
+    when a localizer is run on its own from an operator.
+    """
+    if _active_engine is not None:
+        return CopyBatch(_active_engine)
+    return CopyBatch(CopyEngine(), owns_engine=True)
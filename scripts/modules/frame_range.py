@@ -0,0 +1,125 @@
+import bpy
+import os
+from . import utils, sequence_index
+
+def is_enabled():
+    """True if sequences should be limited to the frames the scene can sample."""
+    return bool(bpy.context.scene) and utils.get_preference("limit_frame_range", False)
+
+def scene_frames(scene):
+    """Scene frames that can be rendered, widened by the handle margin."""
+    handles = max(0, utils.get_preference("frame_handles", 0))
+    return range(scene.frame_start - handles, scene.frame_end + handles + 1)
+
+def image_user_frame(image_user, scene_frame):
+    """Image frame sampled at scene_frame (same rules as Blender's BKE_image_user_frame_get)."""
+    duration = image_user.frame_duration
+    frame = scene_frame - image_user.frame_start + 1
+    if image_user.use_cyclic:
+        frame = frame % duration
+        if frame == 0:
+            frame = duration
+    else:
+        frame = min(max(frame, 0), duration)
+    return frame + image_user.frame_offset
+
+def volume_frame(volume, scene_frame):
+    """VDB frame sampled at scene_frame (same rules as Blender's volume sequence lookup), or None."""
+    duration = volume.frame_duration
+    frame = scene_frame - volume.frame_start + 1
+    mode = volume.sequence_mode
+
+    if mode == 'CLIP':
+        if frame < 1 or frame > duration:
+            return None
+    elif mode == 'EXTEND':
+        frame = min(max(frame, 1), duration)
+    elif mode == 'REPEAT':
+        frame = frame % duration
+        if frame == 0:
+            frame = duration
+    elif mode == 'PING_PONG':
+        pingpong_duration = max(duration * 2 - 2, 1)
+        frame = frame % pingpong_duration
+        if frame == 0:
+            frame = pingpong_duration
+        if frame > duration:
+            frame = duration * 2 - frame
+
+    return frame + volume.frame_offset
+
+def collect_image_users():
+    """
+    Map each image to the ImageUser settings that sample it.
+    A None entry means the image is used somewhere its frame cannot be predicted.
+    """
+    users = {}
+
+    def add(image, image_user):
+        users.setdefault(image, []).append(image_user)
+
+    trees = [id_data.node_tree for collection in (bpy.data.materials, bpy.data.worlds, bpy.data.lights,
+                                                  bpy.data.linestyles, bpy.data.scenes)
+             for id_data in collection if getattr(id_data, "node_tree", None)]
+    trees.extend(bpy.data.node_groups)
+
+    for tree in trees:
+        for node in tree.nodes:
+            image = getattr(node, "image", None)
+            if image is not None:
+                image_user = getattr(node, "image_user", None)
+                # The compositor Image node exposes the ImageUser settings on the node itself
+                if image_user is None and hasattr(node, "frame_duration"):
+                    image_user = node
+                add(image, image_user)
+            # Geometry nodes pass images through sockets and pick the frame from another socket
+            for socket in node.inputs:
+                if socket.type == 'IMAGE' and getattr(socket, "default_value", None) is not None:
+                    add(socket.default_value, None)
+
+    for texture in bpy.data.textures:
+        if texture.type == 'IMAGE' and texture.image:
+            add(texture.image, texture.image_user)
+
+    for camera in bpy.data.cameras:
+        for background in camera.background_images:
+            if background.image:
+                add(background.image, background.image_user)
+
+    for obj in bpy.data.objects:
+        if obj.type == 'EMPTY' and obj.empty_display_type == 'IMAGE' and obj.data:
+            add(obj.data, obj.image_user)
+
+    return users
+
+def image_frames(image_users, scene):
+    """Set of image frames the scene can sample, or None if every frame must be kept."""
+    if not image_users or any(image_user is None for image_user in image_users):
+        return None
+
+    frames = set()
+    for image_user in image_users:
+        if image_user.frame_duration <= 0:
+            return None
+        frames.update(image_user_frame(image_user, scene_frame) for scene_frame in scene_frames(scene))
+    return frames
+
+def volume_frames(volume, scene):
+    """Set of VDB frames the scene can sample, or None if every frame must be kept."""
+    if volume.frame_duration <= 0:
+        return None
+    frames = {volume_frame(volume, scene_frame) for scene_frame in scene_frames(scene)}
+    frames.discard(None)
+    return frames
+
+def filter_frames(found_files, frames, keep_path):
+    """
+    Keep only the sequence files whose frame number is in frames.
+    keep_path (the file the datablock points to) is always kept so the relinked path exists.
+    """
+    kept = []
+    for path, stat in found_files:
+        parts = sequence_index.split_frame(os.path.basename(path))
+        if (parts and int(parts[1]) in frames) or path == keep_path:
+            kept.append((path, stat))
+    return kept
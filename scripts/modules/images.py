@@ -1,144 +1,112 @@
 import bpy
-import os
-import glob
-import re
-from . import utils
-
-def set_absolute_path_images():
-    """Converts the filepath of all image sequences and movies to an absolute path."""
-    items_to_process = []
-    for img in bpy.data.images:
-        if img.source not in {'SEQUENCE', 'MOVIE'} or img.packed_file or not img.filepath:
-            continue
-            
-        abs_path = utils.get_absolute_path(img.filepath)
-        if img.filepath != abs_path:
-            img.filepath = abs_path
-            
-        items_to_process.append(img)
-    
-    return items_to_process
+from . import utils, copy_engine, sequence_index, frame_range, assets, path_index, layout
 
-def localize_images(base_path=None, source_filter=None):
+def collect_images(source_filter=None, index=None, paths=None, folders=None):
     """
-    Copies image sequence and movie files to local folders and relinks them relatively.
+    Resolve the image sequences and movies to localize without modifying anything.
     source_filter: None = all, 'SEQUENCE', or 'MOVIE'
+    paths: path_index.PathIndex to read the images from (default: the pack's shared index).
+    folders: layout.SequenceFolders placing each sequence (default: the pack's shared folders).
+    Returns a list of assets.Asset.
     """
-    base_path = base_path or utils.get_blend_dir()
-    if not base_path:
-        print("ERROR: Blend file must be saved before localizing images.")
-        return {'CANCELLED'}
-
-    # Check if there are any image sequences or movies to process
+    index = index or sequence_index.DirectoryIndex()
+    paths = paths or path_index.get_index()
+    folders = folders or layout.get_folders()
     sequences_to_process = []
     movies_to_process = []
     
-    for img in bpy.data.images:
-        if img.packed_file or not img.filepath:
+    for entry in paths.localizable("images"):
+        img = entry.datablock
+        if img.packed_file:
             continue
-        normalized_path = img.filepath.replace('\\', '/')
+        normalized_path = entry.path.replace('\\', '/')
         
         if img.source == 'SEQUENCE' and source_filter in (None, 'SEQUENCE'):
             if not normalized_path.startswith("//sequences"):
-                sequences_to_process.append(img)
+                sequences_to_process.append(entry)
         elif img.source == 'MOVIE' and source_filter in (None, 'MOVIE'):
             if not normalized_path.startswith("//movies"):
-                movies_to_process.append(img)
+                movies_to_process.append(entry)
+
+    collected = []
+
+    # Image sequences
+    limit_frames = sequences_to_process and frame_range.is_enabled()
+    if limit_frames:
+        scene = bpy.context.scene
+        image_users = frame_range.collect_image_users()
+
+    for entry in sequences_to_process:
+        img = entry.datablock
+        subfolder = folders.subfolder("sequences", img.name, entry.abs_path)
+        asset = assets.Asset(img, "Image Sequence", entry.abs_path, subfolder, entry=entry)
+        collected.append(asset)
+        if asset.missing or asset.remapped:
+            continue
+
+        # Find every frame of the sequence from the shared directory index
+        found_files = index.find_sequence(entry.abs_path)
+        
+        if found_files:
+            asset.files = found_files
+            print(f"  - Found {len(found_files)} files for sequence: {img.name}")
+
+            # Only copy the frames the scene can sample
+            frames = frame_range.image_frames(image_users.get(img), scene) if limit_frames else None
+            if frames is not None:
+                asset.files = frame_range.filter_frames(found_files, frames, entry.abs_path)
+                print(f"    Frame range: copying {len(asset.files)} of {len(found_files)} frames")
+        elif found_files is not None:
+            print(f"WARNING: No files found for sequence pattern: {sequence_index.sequence_pattern(asset.filename)}")
+
+    # Movies
+    for entry in movies_to_process:
+        collected.append(assets.Asset(entry.datablock, "Movie", entry.abs_path, folders.folder("movies"), relinkable=True,
+                                      entry=entry))
+
+    return collected
+
+def localize_images(base_path=None, source_filter=None):
+    """
+    Copies image sequence and movie files to local folders and relinks them relatively.
+    source_filter: None = all, 'SEQUENCE', or 'MOVIE'
+    """
+    base_path = base_path or utils.get_blend_dir()
+    if not base_path:
+        print("ERROR: Blend file must be saved before localizing images.")
+        return {'CANCELLED'}
+
+    batch = copy_engine.new_batch()
+    collected = collect_images(source_filter, index=batch.engine.directory_index)
     
     # Early exit if nothing to localize
-    if not sequences_to_process and not movies_to_process:
+    if not collected:
+        batch.wait()
         print("No image sequences or movies found to localize.")
         return {'FINISHED'}
 
     processed_files = set()
+    relinks = []
     count = 0
 
-    # Process image sequences
-    if sequences_to_process:
-        sequences_dir = os.path.join(base_path, "sequences")
-        utils.ensure_directory(sequences_dir)
-        
-        for img in sequences_to_process:
-            abs_path = utils.get_absolute_path(img.filepath)
-            abs_path = os.path.normpath(abs_path)
-            
-            if not os.path.exists(abs_path):
-                print(f"WARNING: Source file not found: {abs_path} (Image: {img.name})")
-                continue
-
-            dir_name = os.path.dirname(abs_path)
-            file_name = os.path.basename(abs_path)
-            
-            files_to_copy = []
-
-            # Find the last group of digits in the filename (frame number)
-            match = re.search(r'(\d+)(?!.*\d)', file_name)
-            
-            if match:
-                prefix = file_name[:match.start()]
-                suffix = file_name[match.end():]
-                glob_pattern = prefix + "*" + suffix
-                search_path = os.path.join(dir_name, glob_pattern)
-                
-                regex_pattern = re.escape(prefix) + r'\d+' + re.escape(suffix) + "$"
-                regex = re.compile(regex_pattern, re.IGNORECASE)
-                
-                candidates = glob.glob(search_path)
-                found_files = []
-                
-                for cand in candidates:
-                    cand_name = os.path.basename(cand)
-                    if regex.match(cand_name):
-                        found_files.append(cand)
-                
-                if found_files:
-                    files_to_copy = found_files
-                    print(f"  - Found {len(found_files)} files for sequence: {img.name}")
-                else:
-                    print(f"WARNING: No files found for sequence pattern: {glob_pattern}")
-                    files_to_copy = [abs_path]
-            else:
-                files_to_copy = [abs_path]
-
-            # Copy files
-            for src_file in files_to_copy:
-                src_file = os.path.normpath(src_file)
-                if src_file in processed_files:
-                    continue
-                    
-                utils.copy_file(src_file, sequences_dir)
-                processed_files.add(src_file)
-
-            # Relink
-            relative_path = f"//sequences/{file_name}"
-            if img.filepath != relative_path:
-                img.filepath = relative_path
-                count += 1
-
-    # Process movies
-    if movies_to_process:
-        movies_dir = os.path.join(base_path, "movies")
-        utils.ensure_directory(movies_dir)
-        
-        for img in movies_to_process:
-            abs_path = utils.get_absolute_path(img.filepath)
-            abs_path = os.path.normpath(abs_path)
-            
-            if not os.path.exists(abs_path):
-                print(f"WARNING: Source file not found: {abs_path} (Movie: {img.name})")
-                continue
-
-            if abs_path not in processed_files:
-                utils.copy_file(abs_path, movies_dir)
-                processed_files.add(abs_path)
-
-            # Relink
-            file_name = os.path.basename(abs_path)
-            relative_path = f"//movies/{file_name}"
-            if img.filepath != relative_path:
-                img.filepath = relative_path
-                count += 1
+    for asset in collected:
+        if asset.missing:
+            label = "Image" if asset.asset_type == "Image Sequence" else "Movie"
+            print(f"WARNING: Source file not found: {asset.source} ({label}: {asset.name})")
+            continue
+        asset.submit(batch, base_path, processed_files)
+        relinks.append(asset)
+
+    results = batch.wait()
 
+    # Relink on the main thread once all copies have finished
+    for asset in relinks:
+        relative_path = asset.relative_path(base_path, results)
+        if asset.datablock.filepath != relative_path:
+            asset.datablock.filepath = relative_path
+            count += 1
+
+    batch.record_assets(collected, base_path)
     print(f"Image localization complete. Relinked {count} items, copied {len(processed_files)} files.")
     return {'FINISHED'}
 
@@ -148,6 +116,10 @@ class DY_PACK_MASTER_OT_localize_image_sequences(bpy.types.Operator):
     bl_label = "Localize Image Sequences"
     bl_description = "Copy image sequence files to //sequences and relink"
 
+    @classmethod
+    def poll(cls, context):
+        return copy_engine.idle()
+
     def execute(self, context):
         return localize_images(source_filter='SEQUENCE')
 
@@ -157,6 +129,10 @@ class DY_PACK_MASTER_OT_localize_movies(bpy.types.Operator):
     bl_label = "Localize Movies"
     bl_description = "Copy movie files to //movies and relink"
 
+    @classmethod
+    def poll(cls, context):
+        return copy_engine.idle()
+
     def execute(self, context):
         return localize_images(source_filter='MOVIE')
 
@@ -166,6 +142,10 @@ class DY_PACK_MASTER_OT_localize_images(bpy.types.Operator):
     bl_label = "Localize Images (Sequences & Movies)"
     bl_description = "Copy image sequences to //sequences and movies to //movies, then relink"
 
+    @classmethod
+    def poll(cls, context):
+        return copy_engine.idle()
+
     def execute(self, context):
         return localize_images()
 
@@ -0,0 +1,113 @@
+import os
+import re
+from . import utils, copy_engine, sequence_index
+
+# Sequence Layout preference values
+FLAT = 'FLAT'
+PER_SEQUENCE = 'PER_SEQUENCE'
+MIRROR = 'MIRROR'
+
+# Pack subfolders whose sequences get folders of their own
+SEQUENCE_SUBFOLDERS = ("sequences", "vdb")
+
+_UNSAFE_CHARACTERS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+def get_layout():
+    return utils.get_preference("sequence_layout", FLAT)
+
+def _folder_name(name):
+    """Datablock name usable as a folder name on every platform."""
+    return _UNSAFE_CHARACTERS.sub("_", name).strip(" .") or "sequence"
+
+def mirrored_folder(source_dir):
+    """Source directory as a relative folder: /mnt/show/sq010 -> mnt/show/sq010, P:/plates -> P/plates."""
+    drive, path = os.path.splitdrive(utils.normalize_path(source_dir))
+    parts = [_folder_name(drive.strip("/"))] if drive else []
+    parts += [_folder_name(part) for part in path.split('/') if part not in ("", ".", "..")]
+    return "/".join(parts)
+
+class SequenceFolders:
+    """
+    Pack subfolder of each sequence under the Sequence Layout preference, so
+    the frames of a sequence no longer share one flat folder with every other
+    sequence (and frames with the same name from different sources no longer
+    collide). Each unique source gets one folder, named after the first
+    datablock using it, and datablocks sharing a sequence share its folder.
+    In the flat layout, a sequence whose frames are named like those of a
+    sequence from another folder gets its own folder instead of overwriting them.
+    prefix: folder every file is placed in below its pack subfolder, whatever
+    the layout (sequences/<prefix>/..., movies/<prefix>/...), e.g. the library
+    a nested library process localizes. Each process only sees its own files,
+    so this keeps them from overwriting those of the packed file or of other
+    libraries; without a prefix, flat folders are shared. The packed file's
+    folders hand out the prefixes (see reserve()), so they stay distinct from
+    its own sequence folders.
+    """
+
+    def __init__(self, layout=None, prefix=None):
+        self.layout = layout or get_layout()
+        self.prefix = _folder_name(prefix) if prefix else None
+        self.folders = {}  # (subfolder, normalized source) -> pack subfolder
+        self.used = set()  # Lowercase subfolders already given to a sequence
+        self.flat = {}  # (subfolder, normalized frame pattern) -> folder of the sequence placed flat
+
+    def folder(self, subfolder):
+        """Pack subfolder of a single file (movie, cache, texture...): subfolder, below the prefix if any."""
+        return f"{subfolder}/{self.prefix}" if self.prefix else subfolder
+
+    def subfolder(self, subfolder, name, source):
+        """Pack subfolder of a sequence whose first frame is source, used by the datablock called name."""
+        root = self.folder(subfolder)
+        if self.layout == MIRROR:
+            mirrored = mirrored_folder(os.path.dirname(source))
+            self.used.add(f"{root}/{mirrored.split('/', 1)[0]}".lower())
+            return f"{root}/{mirrored}"
+
+        key = (subfolder, os.path.normcase(utils.normalize_path(source)))
+        if self.layout != PER_SEQUENCE and key not in self.folders:
+            directory, file_name = os.path.split(key[1])
+            pattern = (subfolder, sequence_index.sequence_pattern(file_name))
+            if self.flat.setdefault(pattern, directory) == directory:
+                return root
+        if key not in self.folders:
+            base = f"{root}/{_folder_name(name)}"
+            folder = base
+            counter = 1
+            # Case-insensitive, so folders stay distinct on Windows and macOS volumes
+            while folder.lower() in self.used:
+                folder = f"{base}_{counter:03d}"
+                counter += 1
+            self.used.add(folder.lower())
+            self.folders[key] = folder
+            if self.layout != PER_SEQUENCE:
+                print(f"  - {name}: frames named like another sequence's, localized to //{folder}/")
+        return self.folders[key]
+
+    def reserve(self, name):
+        """
+        Prefix of a nested library process, named after its library: unique
+        among the prefixes and the sequence folders handed out so far, and
+        reserved so no later sequence folder gets the same name.
+        """
+        base = _folder_name(name)
+        prefix = base
+        counter = 1
+        while any(f"{subfolder}/{prefix}".lower() in self.used for subfolder in SEQUENCE_SUBFOLDERS):
+            prefix = f"{base}_{counter:03d}"
+            counter += 1
+        for subfolder in SEQUENCE_SUBFOLDERS:
+            self.used.add(f"{subfolder}/{prefix}".lower())
+        return prefix
+
+def get_folders():
+    """
+    Sequence folders of the running pack, shared by every step so the
+    background prefetch, the localizers and the relinks agree on them.
+    Outside a pack (single localizer operators), new folders are assigned.
+    """
+    engine = copy_engine.active_engine()
+    if engine is None:
+        return SequenceFolders()
+    if engine.sequence_folders is None:
+        engine.sequence_folders = SequenceFolders()
+    return engine.sequence_folders
@@ -0,0 +1,246 @@
+import os
+import json
+import threading
+from datetime import datetime
+from . import utils
+
+MANIFEST_FILENAME = "pack_manifest.json"
+MANIFEST_VERSION = 2
+
+# Append-only record of the files completed by a pack still in progress; removed once the pack completes
+JOURNAL_FILENAME = "pack_journal.jsonl"
+
+def read_journal_header(pack_dir):
+    """First line of the journal of an interrupted pack in pack_dir, or None if there is none."""
+    path = os.path.join(pack_dir, JOURNAL_FILENAME)
+    try:
+        with open(path, "r") as f:
+            header = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    return header if isinstance(header, dict) and "journal" in header else None
+
+class PackManifest:
+    """
+    Record of every file localized into a pack directory (source, size, mtime,
+    optional content hash, destination, copy status). Stored as
+    pack_manifest.json so a re-pack into the same folder only copies new or
+    changed files and prunes files that are no longer referenced.
+
+    The manifest also lists every localized asset (datablock, original path,
+    relinked path, size, checksum, frame range, status), so a pack can be
+    validated from the manifest alone without walking the pack directory.
+
+    While a pack runs, every completed file is also appended to
+    pack_journal.jsonl. If the pack is interrupted, the next pack into the
+    same folder loads the journal and skips the files it lists.
+    """
+
+    def __init__(self, pack_dir, use_hash=False, source=None, journal=True):
+        self.pack_dir = os.path.normpath(pack_dir)
+        self.path = os.path.join(self.pack_dir, MANIFEST_FILENAME)
+        self.journal_path = os.path.join(self.pack_dir, JOURNAL_FILENAME)
+        self.use_hash = use_hash
+        self.source = source  # Blend file being packed, recorded in the journal header
+        self.interrupted = False  # A previous pack into this folder did not complete
+        self.resumed = 0  # Files completed by an interrupted pack, loaded from the journal
+        self.use_journal = journal
+        self._journal = None
+        self.previous = {}  # Entries loaded from the last pack, keyed by relative destination
+        self.entries = {}   # Entries referenced by the current pack
+        self.assets = []    # Asset entries of the current pack (see assets.Asset.manifest_entry)
+        self.previous_throughput = None  # MB/s measured by the previous pack
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load the manifest left by a previous pack, if any, and the journal of an interrupted one."""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                self.previous = {entry["destination"]: entry for entry in data.get("files", [])}
+                self.previous_throughput = data.get("throughput_mb_s")
+                print(f"  - Loaded pack manifest: {len(self.previous)} files from previous pack")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"WARNING: Ignoring unreadable pack manifest {self.path}: {e}")
+                self.previous = {}
+        self.load_journal()
+
+    def load_journal(self):
+        """Add the files completed by an interrupted pack; they take precedence over the manifest."""
+        if not os.path.exists(self.journal_path):
+            return
+        self.interrupted = True
+        try:
+            with open(self.journal_path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Line cut short by the interruption
+                    if "destination" in entry:
+                        self.previous[entry["destination"]] = entry
+                        self.resumed += 1
+        except OSError as e:
+            print(f"WARNING: Ignoring unreadable pack journal {self.journal_path}: {e}")
+            return
+        print(f"  - Resuming interrupted pack: {self.resumed} files already completed")
+
+    def relative(self, dest_path):
+        """Destination path relative to the pack directory, with forward slashes."""
+        return os.path.relpath(dest_path, self.pack_dir).replace('\\', '/')
+
+    def check(self, src, dest_path, src_stat):
+        """
+        Compare a source file against the previous pack.
+        Returns (up_to_date, content_hash). content_hash is the recorded hash of an
+        up-to-date file, or the hash computed to compare a touched one; files to
+        copy are hashed by the copy engine while they are copied.
+        """
+        entry = self.previous.get(self.relative(dest_path))
+        content_hash = None
+
+        if entry and entry.get("source") == utils.normalize_path(src) and os.path.exists(dest_path):
+            if os.path.getsize(dest_path) == src_stat.st_size == entry.get("size"):
+                if entry.get("mtime") == src_stat.st_mtime:
+                    return True, entry.get("hash")
+                # Touched but possibly unchanged: let the content hash decide
+                if self.use_hash and entry.get("hash"):
+                    content_hash = utils.hash_file(src)
+                    if content_hash == entry["hash"]:
+                        return True, content_hash
+
+        return False, content_hash
+
+    def record(self, src, dest_path, src_stat, content_hash=None, status="copied"):
+        """
+        Mark a destination as referenced by the current pack.
+        status: how the file got there ('copied', 'up_to_date', 'deduplicated', 'shared', 'archived',
+        or 'rewritten' for a library whose paths were localized after the copy).
+        """
+        destination = self.relative(dest_path)
+        entry = {
+            "source": utils.normalize_path(src),
+            "destination": destination,
+            "size": src_stat.st_size,
+            "mtime": src_stat.st_mtime,
+            "hash": content_hash,
+            "status": status,
+        }
+        with self._lock:
+            self.entries[destination] = entry
+            if self.use_journal:
+                self._append_journal(entry)
+
+    def lookup(self, dest_path):
+        """Entry of a destination recorded by the current pack, or None."""
+        with self._lock:
+            return self.entries.get(self.relative(dest_path))
+
+    def add_asset(self, entry):
+        """Add an asset entry to the current pack."""
+        with self._lock:
+            self.assets.append(entry)
+
+    def merge(self, entries, assets):
+        """Add file and asset entries recorded by another process localizing into the same pack."""
+        with self._lock:
+            for entry in entries:
+                self.entries[entry["destination"]] = entry
+                if self.use_journal:
+                    self._append_journal(entry)
+            self.assets.extend(assets)
+
+    def _append_journal(self, entry):
+        """Append a completed file to the journal (caller holds the lock). Each line is flushed as written."""
+        try:
+            if self._journal is None:
+                is_new = not os.path.exists(self.journal_path)
+                self._journal = open(self.journal_path, "a", buffering=1)
+                if is_new:
+                    header = {"journal": MANIFEST_VERSION, "source": self.source,
+                              "date": datetime.now().isoformat(timespec="seconds")}
+                    self._journal.write(json.dumps(header) + "\n")
+            self._journal.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"WARNING: Failed to write pack journal: {e}")
+
+    def close(self):
+        """Close the journal; it is kept on disk so an interrupted pack can be resumed."""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def prune(self):
+        """Delete files localized by the previous pack that the current pack no longer references."""
+        removed = 0
+        for destination in self.previous:
+            if destination in self.entries:
+                continue
+            stale_path = os.path.join(self.pack_dir, destination)
+            if not os.path.isfile(stale_path):
+                continue
+            try:
+                os.remove(stale_path)
+                removed += 1
+            except OSError as e:
+                print(f"WARNING: Failed to prune {stale_path}: {e}")
+                continue
+            self._remove_empty_folders(os.path.dirname(stale_path))
+        if self.interrupted:
+            removed += self._remove_partial_files()
+        if removed:
+            print(f"  - Pruned {removed} files no longer referenced")
+        return removed
+
+    def _remove_empty_folders(self, folder):
+        """Remove folder and its parents while empty, up to the pack directory (e.g. after a layout change)."""
+        pack_dir = os.path.normcase(os.path.abspath(self.pack_dir))
+        folder = os.path.abspath(folder)
+        while os.path.normcase(folder).startswith(pack_dir + os.sep):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                return
+            folder = os.path.dirname(folder)
+
+    def _remove_partial_files(self):
+        """Delete the partial copies an interrupted pack left behind."""
+        removed = 0
+        for root, _, files in os.walk(self.pack_dir):
+            for file in files:
+                if file.endswith(utils.PARTIAL_SUFFIX):
+                    try:
+                        os.remove(os.path.join(root, file))
+                        removed += 1
+                    except OSError as e:
+                        print(f"WARNING: Failed to remove partial copy {file}: {e}")
+        return removed
+
+    def save(self, throughput=None):
+        """Write the manifest for the current pack, with the measured copy throughput in MB/s."""
+        data = {
+            "version": MANIFEST_VERSION,
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "hash_algorithm": utils.HASH_ALGORITHM if self.use_hash else None,
+            "throughput_mb_s": throughput or self.previous_throughput,
+            "source_blend": utils.normalize_path(self.source) if self.source else None,
+            "assets": self.assets,
+            "files": sorted(self.entries.values(), key=lambda entry: entry["destination"]),
+        }
+        try:
+            with open(self.path, "w") as f:
+                json.dump(data, f, indent=2)
+            print(f"  - Pack manifest written: {self.path} ({len(self.assets)} assets, {len(self.entries)} files)")
+        except OSError as e:
+            print(f"WARNING: Failed to write pack manifest: {e}")
+
+    def finalize(self, throughput=None):
+        """Prune stale files, save and remove the journal. Only call once the pack has completed."""
+        self.prune()
+        self.save(throughput)
+        self.close()
+        if os.path.exists(self.path) and os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
@@ -1,26 +1,39 @@
 import bpy
 import os
-from . import utils
-
-def set_absolute_path_mesh_cache():
-    """Converts all Mesh Sequence Cache modifier filepaths to absolute paths."""
-    caches_to_process = []
-    
-    for obj in bpy.data.objects:
-        for mod in obj.modifiers:
-            if mod.type == 'MESH_SEQUENCE_CACHE':
-                cache_file = mod.cache_file
-                if not cache_file:
-                    continue
-                
-                abs_path = utils.get_absolute_path(cache_file.filepath)
-                if cache_file.filepath != abs_path:
-                    cache_file.filepath = abs_path
-                
-                if cache_file not in caches_to_process:
-                    caches_to_process.append(cache_file)
-    
-    return caches_to_process
+from . import utils, copy_engine, assets, path_index, layout
+
+def collect_mesh_caches(paths=None, folders=None):
+    """
+    Resolve the Alembic/USD files to localize without modifying anything.
+    Cache files are read from bpy.data.cache_files (through the path index)
+    rather than by walking every object's modifiers; unused ones are skipped.
+    folders: layout.SequenceFolders placing the files (default: the pack's shared folders).
+    Returns a list of assets.Asset.
+    """
+    paths = paths or path_index.get_index()
+    folders = folders or layout.get_folders()
+    collected = []
+
+    for entry in paths.localizable("cache_files"):
+        cache_file = entry.datablock
+        if not cache_file.users:
+            continue
+
+        current_filepath = entry.abs_path
+        
+        ext = os.path.splitext(current_filepath)[1].lower()
+        if ext == '.abc':
+            subfolder = "abc"
+        elif ext in {'.usd', '.usda', '.usdc', '.usdz'}:
+            subfolder = "usd"
+        else:
+            print(f"WARNING: Unknown cache format '{ext}' for {current_filepath}")
+            continue
+
+        collected.append(assets.Asset(cache_file, "Mesh Cache", current_filepath, folders.folder(subfolder), relinkable=True,
+                                      entry=entry))
+
+    return collected
 
 def localize_mesh_cache(base_path=None):
     """Copies Alembic/USD files to local folders and relinks them relatively."""
@@ -29,47 +42,32 @@ def localize_mesh_cache(base_path=None):
         print("ERROR: Blend file must be saved before localizing cache files.")
         return {'CANCELLED'}
 
-    processed_caches = set()
+    relinks = []
     count = 0
+    batch = copy_engine.new_batch()
+    collected = collect_mesh_caches()
 
-    for obj in bpy.data.objects:
-        for mod in obj.modifiers:
-            if mod.type == 'MESH_SEQUENCE_CACHE':
-                cache_file = mod.cache_file
-                if not cache_file or cache_file in processed_caches:
-                    continue
-                
-                current_filepath = utils.get_absolute_path(cache_file.filepath)
-                
-                if not os.path.exists(current_filepath):
-                    print(f"WARNING: Source file not found: {current_filepath} (Object: {obj.name})")
-                    continue
-                
-                ext = os.path.splitext(current_filepath)[1].lower()
-                if ext == '.abc':
-                    subfolder = "abc"
-                elif ext in {'.usd', '.usda', '.usdc', '.usdz'}:
-                    subfolder = "usd"
-                else:
-                    print(f"WARNING: Unknown cache format '{ext}' for {current_filepath}")
-                    continue
-
-                dest_dir = os.path.join(base_path, subfolder)
-                utils.ensure_directory(dest_dir)
-
-                dest_path = utils.copy_file(current_filepath, dest_dir)
-                if not dest_path:
-                    continue
-
-                filename = os.path.basename(dest_path)
-                relative_path = f"//{subfolder}/{filename}"
-                
-                if cache_file.filepath != relative_path:
-                    cache_file.filepath = relative_path
-                    count += 1
-                
-                processed_caches.add(cache_file)
+    for asset in collected:
+        if asset.missing:
+            print(f"WARNING: Source file not found: {asset.source} (Cache: {asset.name})")
+            continue
+        asset.submit(batch, base_path)
+        relinks.append(asset)
 
+    results = batch.wait()
+
+    # Relink on the main thread once all copies have finished
+    for asset in relinks:
+        if not asset.remapped and not results.get(asset.source):
+            continue
+
+        relative_path = asset.relative_path(base_path, results)
+
+        if asset.datablock.filepath != relative_path:
+            asset.datablock.filepath = relative_path
+            count += 1
+
+    batch.record_assets(collected, base_path)
     print(f"Mesh Cache localization complete. Relinked {count} files.")
     return {'FINISHED'}
 
@@ -79,6 +77,10 @@ class DY_PACK_MASTER_OT_localize_mesh_cache(bpy.types.Operator):
     bl_label = "Localize Mesh Cache (ABC/USD)"
     bl_description = "Copy Alembic/USD files to //abc or //usd and relink"
 
+    @classmethod
+    def poll(cls, context):
+        return copy_engine.idle()
+
     def execute(self, context):
         return localize_mesh_cache()
 
@@ -1,21 +1,23 @@
 import bpy
-import os
-from . import utils
+from . import utils, copy_engine, assets, path_index, layout
 
-def set_absolute_path_movieclips():
-    """Converts the filepath of all movie clips to an absolute path."""
-    clips_to_process = []
-    for clip in bpy.data.movieclips:
-        if not clip.filepath:
+def collect_movieclips(paths=None, folders=None):
+    """
+    Resolve the movie clip files to localize without modifying anything.
+    folders: layout.SequenceFolders placing the files (default: the pack's shared folders).
+    Returns a list of assets.Asset.
+    """
+    paths = paths or path_index.get_index()
+    folders = folders or layout.get_folders()
+    collected = []
+    for entry in paths.localizable("movieclips"):
+        # Skip already localized clips
+        normalized_path = entry.path.replace('\\', '/')
+        if normalized_path.startswith("//movies"):
             continue
-            
-        abs_path = utils.get_absolute_path(clip.filepath)
-        if clip.filepath != abs_path:
-            clip.filepath = abs_path
-            
-        clips_to_process.append(clip)
-    
-    return clips_to_process
+        collected.append(assets.Asset(entry.datablock, "Movie Clip", entry.abs_path, folders.folder("movies"), relinkable=True,
+                                      entry=entry))
+    return collected
 
 def localize_movieclips(base_path=None):
     """Copies movie clip files to local 'movies' folder and relinks them relatively."""
@@ -24,48 +26,36 @@ def localize_movieclips(base_path=None):
         print("ERROR: Blend file must be saved before localizing movie clips.")
         return {'CANCELLED'}
 
-    # Check if there are any movie clips with filepaths to process
-    clips_to_process = []
-    for clip in bpy.data.movieclips:
-        if not clip.filepath:
-            continue
-        # Skip already localized clips
-        normalized_path = clip.filepath.replace('\\', '/')
-        if normalized_path.startswith("//movies"):
-            continue
-        clips_to_process.append(clip)
+    collected = collect_movieclips()
     
     # Early exit if no movie clips to localize
-    if not clips_to_process:
+    if not collected:
         print("No movie clips found to localize.")
         return {'FINISHED'}
 
-    # Only create directory if we have clips to process
-    movies_dir = os.path.join(base_path, "movies")
-    utils.ensure_directory(movies_dir)
-    
     processed_files = set()
+    relinks = []
     count = 0
+    batch = copy_engine.new_batch()
 
-    for clip in clips_to_process:
-        abs_path = utils.get_absolute_path(clip.filepath)
-        abs_path = os.path.normpath(abs_path)
-        
-        if not os.path.exists(abs_path):
-            print(f"WARNING: Source file not found: {abs_path} (Clip: {clip.name})")
+    for asset in collected:
+        if asset.missing:
+            print(f"WARNING: Source file not found: {asset.source} (Clip: {asset.name})")
             continue
+        asset.submit(batch, base_path, processed_files)
+        relinks.append(asset)
 
-        if abs_path not in processed_files:
-            utils.copy_file(abs_path, movies_dir)
-            processed_files.add(abs_path)
+    results = batch.wait()
 
-        # Relink
-        file_name = os.path.basename(abs_path)
-        relative_path = f"//movies/{file_name}"
-        if clip.filepath != relative_path:
-            clip.filepath = relative_path
+    # Relink on the main thread once all copies have finished.
+    # The clip may resolve to an identical file localized for another datablock.
+    for asset in relinks:
+        relative_path = asset.relative_path(base_path, results)
+        if asset.datablock.filepath != relative_path:
+            asset.datablock.filepath = relative_path
             count += 1
 
+    batch.record_assets(collected, base_path)
     print(f"Movie clip localization complete. Relinked {count} clips.")
     return {'FINISHED'}
 
@@ -75,6 +65,10 @@ class DY_PACK_MASTER_OT_localize_movieclips(bpy.types.Operator):
     bl_label = "Localize Movie Clips"
     bl_description = "Copy movie clip files to //movies and relink"
 
+    @classmethod
+    def poll(cls, context):
+        return copy_engine.idle()
+
     def execute(self, context):
         return localize_movieclips()
 
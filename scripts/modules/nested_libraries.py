@@ -0,0 +1,318 @@
+import bpy
+import os
+import json
+import shutil
+import subprocess
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+from . import utils, copy_engine, path_index, assets, blend_reader, sequence_index, images, movies, mesh_sequence_cache, vdb, remap, layout, resources
+
+# Launcher run by the background Blender processes (see pack_cli.py)
+LAUNCHER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "pack_cli.py")
+JOB_DIRNAME = ".library_jobs"
+# Seconds localize_nested_libraries() waits before handing control back
+POLL_INTERVAL = 0.1
+
+def is_enabled():
+    return utils.get_preference("localize_nested_libraries", False)
+
+def plan_jobs(collected, results, base_path, batch):
+    """
+    Find the libraries to rewrite, reading every localized library with
+    blend_reader instead of opening it: a library is rewritten when it links
+    other libraries or uses external files. Libraries they link that the open
+    file does not show are queued on batch into references/ and scanned in turn.
+    Each unique library is read once.
+    collected: assets of references.collect_references(); results: their copy results.
+    Returns (jobs [{"source", "destination"}], {library source: destination}, assets queued on batch).
+    """
+    destinations = {}  # Normalized library source -> destination
+    for asset in collected:
+        dest_path = results.get(asset.source)
+        if dest_path and not asset.missing:
+            destinations[utils.normalize_path(asset.source)] = dest_path
+    used_filenames = {os.path.basename(dest_path) for dest_path in destinations.values()}
+
+    jobs = []
+    queued = []
+    pending = list(destinations)
+    while pending:
+        source = pending.pop(0)
+        try:
+            blend = blend_reader.BlendFile(source)
+        except (OSError, ValueError) as e:
+            # The background process opens it in Blender and finds out
+            print(f"WARNING: Could not read {source} ({e}), rewriting it anyway")
+            jobs.append({"source": source, "destination": destinations[source]})
+            continue
+        if not blend.file_paths():
+            continue
+        jobs.append({"source": source, "destination": destinations[source]})
+
+        for library in blend.libraries:
+            child = utils.normalize_path(library.abs_path)
+            if library.parent or library.packed or child in destinations or not os.path.isfile(child):
+                continue
+            asset = assets.Asset(None, "Nested Library", child, "references")
+            asset.filename = utils.unique_filename(asset.filename, used_filenames)
+            asset.submit(batch, base_path)
+            queued.append(asset)
+            destinations[child] = os.path.join(asset.dest_dir(base_path), asset.filename)
+            pending.append(child)
+
+    return jobs, destinations, queued
+
+def _subfolder(path):
+    """Pack subfolder of a file used by a library, or None if it is not copied (still images are packed)."""
+    if path.id_type == "Image":
+        return {'SEQUENCE': "sequences", 'MOVIE': "movies"}.get(path.source)
+    if path.id_type == "MovieClip":
+        return "movies"
+    if path.id_type == "Volume":
+        return "vdb"
+    ext = os.path.splitext(path.abs_path)[1].lower()
+    if ext == '.abc':
+        return "abc"
+    if ext in {'.usd', '.usda', '.usdc', '.usdz'}:
+        return "usd"
+    return None
+
+def _library_stem(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+def collect_nested_assets(collected, index=None):
+    """
+    Resolve what localizing the nested libraries would copy, reading the
+    libraries with blend_reader instead of opening them (for the dry-run
+    planner): the libraries they link that the open file does not show, and
+    the sequences, movies, caches and VDBs they use. Returns a list of assets.Asset.
+    """
+    index = index or sequence_index.DirectoryIndex()
+    known = {utils.normalize_path(asset.source) for asset in collected if not asset.missing}
+    nested = []
+    for blend_path, blend in blend_reader.scan(known).items():
+        if isinstance(blend, str):
+            print(f"WARNING: Could not read library {blend_path}: {blend}")
+            continue
+        # Folders of the process localizing the library (see localize_nested_libraries)
+        folders = layout.SequenceFolders(prefix=_library_stem(blend_path))
+        if utils.normalize_path(blend_path) not in known:
+            nested.append(assets.Asset(None, "Nested Library", blend_path, "references"))
+        for path in blend.file_paths():
+            subfolder = _subfolder(path) if path.id_type != "Library" else None
+            if subfolder is None:
+                continue
+            if path.source == 'SEQUENCE' or path.is_sequence:
+                subfolder = folders.subfolder(subfolder, path.name, path.abs_path)
+            else:
+                subfolder = folders.folder(subfolder)
+            asset = assets.Asset(None, f"Nested {path.id_type}", path.abs_path, subfolder)
+            if not asset.missing and (path.source == 'SEQUENCE' or path.is_sequence):
+                asset.files = index.find_sequence(path.abs_path) or asset.files
+            nested.append(asset)
+    return nested
+
+def child_arguments(job_path):
+    """Command line of a background Blender process localizing one library."""
+    return [bpy.app.binary_path, "-b", "--python", LAUNCHER, "--", "--localize-library", job_path]
+
+def run_job(job_path, log_path, cancelled):
+    """
+    Run one library job in a background Blender process, terminated once the
+    cancelled event is set. Returns its result dict.
+    """
+    with open(job_path, "r") as f:
+        job = json.load(f)
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(child_arguments(job_path), stdout=log, stderr=subprocess.STDOUT)
+        while True:
+            try:
+                code = process.wait(timeout=POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                if cancelled.is_set():
+                    process.terminate()
+                    code = process.wait()
+                    break
+    try:
+        with open(job["result"], "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"ok": False, "error": f"Blender exited with code {code} (log: {log_path})"}
+
+def localize_nested_libraries(collected, results, base_path):
+    """
+    Localize what the libraries copied to references/ link in turn: every
+    library linking other libraries or using external files is opened in a
+    background Blender process, which localizes its files into the pack and
+    saves it over its copy with paths relative to references/. Each unique
+    library is processed once, and the processes run in parallel.
+    Generator: yields while the copies and the processes run, so the modal
+    Pack Project can redraw; closing it terminates the processes.
+    Returns report lines for references_report.txt.
+    """
+    batch = copy_engine.new_batch()
+    engine = batch.engine
+    if engine.archive is not None:
+        print("  - Nested libraries are not localized when streaming into an archive")
+        batch.wait()
+        return []
+    jobs, destinations, queued = plan_jobs(collected, results, base_path, batch)
+    while batch.running(POLL_INTERVAL):
+        yield
+    copied = batch.wait()
+    batch.record_assets(queued, base_path)
+    for asset in queued:
+        if not copied.get(asset.source):
+            destinations.pop(utils.normalize_path(asset.source), None)
+    if not jobs:
+        return []
+
+    job_dir = utils.ensure_directory(os.path.join(base_path, JOB_DIRNAME))
+    preferences = {
+        "copy_workers": engine.workers,
+        "manifest_hash": utils.get_preference("manifest_hash", False),
+        "deduplicate_files": utils.get_preference("deduplicate_files", True),
+        "allow_hardlinks": engine.allow_hardlinks,
+        "shared_store_directory": utils.get_preference("shared_store_directory", ""),
+        "path_remap_rules": remap.rules_path(),
+        "sequence_layout": layout.get_layout(),
+        "pack_policy": resources.get_policy(),
+        "pack_size_limit": utils.get_preference("pack_size_limit", 16),
+        # The scene range of a library file does not say which frames this shot renders
+        "limit_frame_range": False,
+        # Nor which of its datablocks the shot renders; the pack only copied the libraries it uses
+        "prune_unreachable": False,
+    }
+    # Every process localizes below a folder of its own (sequences/<library>/, movies/<library>/...):
+    # copies are only claimed within a process, so shared folders would let them overwrite each other
+    folders = layout.get_folders()
+    job_paths = []
+    for number, job in enumerate(jobs, 1):
+        job_path = os.path.join(job_dir, f"library_{number}.json")
+        job.update(pack_dir=base_path, libraries=destinations, preferences=preferences,
+                   folder_prefix=folders.reserve(_library_stem(job["destination"])),
+                   result=os.path.join(job_dir, f"library_{number}_result.json"))
+        with open(job_path, "w") as f:
+            json.dump(job, f, indent=2)
+        job_paths.append((job_path, os.path.join(job_dir, f"library_{number}.log")))
+
+    processes = max(1, min(utils.get_preference("nested_library_jobs", 2), len(jobs)))
+    print(f"  - Localizing {len(jobs)} nested libraries in {processes} background processes")
+    cancelled = threading.Event()
+    with ThreadPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(run_job, job_path, log_path, cancelled) for job_path, log_path in job_paths]
+        try:
+            while wait(futures, timeout=POLL_INTERVAL).not_done:
+                yield
+        except GeneratorExit:
+            cancelled.set()
+            raise
+    outcomes = [future.result() for future in futures]
+
+    report_lines = []
+    failed = False
+    pack_manifest = engine.manifest
+    for job, outcome in zip(jobs, outcomes):
+        name = os.path.basename(job["destination"])
+        if not outcome.get("ok"):
+            failed = True
+            print(f"WARNING: Failed to localize nested library {name}: {outcome.get('error')}")
+            report_lines.append(f"[WARNING] Nested localization failed: {name}")
+            continue
+
+        stats = outcome.get("stats") or {}
+        print(f"  - {name}: {outcome['relinked']} libraries relinked, "
+              f"{stats.get('files_copied', 0)} files copied ({stats.get('bytes_copied', 0) / (1024 * 1024):.1f} MB)")
+        report_lines.append(f"[NESTED] {name}: {outcome['relinked']} libraries, {len(outcome['files'])} files")
+        for source in outcome["unresolved"]:
+            report_lines.append(f"[UNRESOLVED] {name} -> {source} (missing)")
+        engine.add_stats(stats)
+
+        if pack_manifest:
+            pack_manifest.merge(outcome["files"], outcome["assets"])
+            # The copy of the library was replaced by the rewritten file
+            dest_path = job["destination"]
+            content_hash = utils.hash_file(dest_path) if pack_manifest.use_hash else None
+            pack_manifest.record(job["source"], dest_path, os.stat(dest_path), content_hash, status="rewritten")
+
+    # Keep the job logs of a failed library for inspection
+    if not failed:
+        shutil.rmtree(job_dir, ignore_errors=True)
+    return report_lines
+
+def relink_libraries(libraries, pack_dir):
+    """
+    Point the libraries linked by the open library file to their localized copy.
+    Returns (number relinked, sources of the libraries without a copy).
+    """
+    relinked = 0
+    unresolved = []
+    for library in bpy.data.libraries:
+        if library.parent is not None or not library.filepath:
+            continue
+        source = utils.normalize_path(utils.get_absolute_path(library.filepath))
+        dest_path = libraries.get(source)
+        if dest_path:
+            library.filepath = utils.get_relative_path(dest_path, pack_dir)
+            relinked += 1
+        else:
+            unresolved.append(source)
+    return relinked, unresolved
+
+def localize_library(job):
+    """
+    Localize the open library file into the pack of a job and save it over its copy.
+    The file is first saved in the pack directory so the localizers' // paths resolve
+    there; saving it next to its copy then remaps them relative to references/.
+    """
+    pack_dir = job["pack_dir"]
+    destination = job["destination"]
+    staging = os.path.join(pack_dir, f".{os.path.basename(destination)}.{os.getpid()}.blend")
+    try:
+        with copy_engine.session(pack_dir=pack_dir, source=job["source"], journal=False) as engine:
+            bpy.ops.wm.save_as_mainfile(filepath=staging)
+            # Linked datablocks are localized by the process of their own library
+            engine.path_index = path_index.PathIndex(local_only=True, counters=engine.io)
+            engine.sequence_folders = layout.SequenceFolders(prefix=job["folder_prefix"])
+            relinked, unresolved = relink_libraries(job["libraries"], pack_dir)
+            # Same steps as Pack Project: small files are packed, sequences and movies copied
+            resources.pack_resources(base_path=pack_dir)
+            images.localize_images(base_path=pack_dir)
+            movies.localize_movieclips(base_path=pack_dir)
+            mesh_sequence_cache.localize_mesh_cache(base_path=pack_dir)
+            vdb.localize_vdb(base_path=pack_dir)
+            print(engine.summary())
+
+            # Replace the plain copy (removed first so no .blend1 backup is left in the pack)
+            if os.path.exists(destination):
+                os.remove(destination)
+            bpy.ops.wm.save_as_mainfile(filepath=destination)
+        return {
+            "ok": True,
+            "relinked": relinked,
+            "unresolved": unresolved,
+            "files": list(engine.manifest.entries.values()),
+            "assets": engine.manifest.assets,
+            "stats": copy_engine.last_stats,
+        }
+    finally:
+        for path in (staging, staging + "1"):
+            if os.path.exists(path):
+                os.remove(path)
+
+def run_job_file(job_path):
+    """Entry point of a background process (see cli.py --localize-library). Returns 0 on success."""
+    with open(job_path, "r") as f:
+        job = json.load(f)
+    try:
+        with utils.preference_overrides(**job["preferences"]):
+            bpy.ops.wm.open_mainfile(filepath=job["source"], load_ui=False)
+            result = localize_library(job)
+    except Exception as e:
+        traceback.print_exc()
+        result = {"ok": False, "error": str(e)}
+    with open(job["result"], "w") as f:
+        json.dump(result, f, indent=2)
+    return 0 if result["ok"] else 1
@@ -3,29 +3,36 @@ import os
 import shutil
 from . import utils
 
-def localize_ocio():
+def get_ocio_source():
+    """
+    Resolve the OCIO configuration from the environment.
+    Returns (ocio_path, source_dir), or (None, None) if 'OCIO' is not set.
+    """
+    ocio_path = os.environ.get('OCIO')
+    if not ocio_path:
+        return None, None
+    if os.path.isfile(ocio_path):
+        return ocio_path, os.path.dirname(ocio_path)
+    return ocio_path, ocio_path
+
+def localize_ocio(base_path=None):
     """
     Checks for the OCIO environment variable, copies the entire OCIO configuration
-    directory to a local 'ocio' folder next to the blend file, and creates a text
-    file recording the original location.
+    directory to a local 'ocio' folder next to the blend file (or in base_path),
+    and creates a text file recording the original location.
     """
-    base_path = utils.get_blend_dir()
+    base_path = base_path or utils.get_blend_dir()
     if not base_path:
         print("ERROR: Blend file must be saved before localizing OCIO.")
         return {'CANCELLED'}
 
-    ocio_path = os.environ.get('OCIO')
+    ocio_path, source_dir = get_ocio_source()
     if not ocio_path:
         print("WARNING: 'OCIO' environment variable is not set. Nothing to localize.")
         return {'CANCELLED'}
 
     print(f"Found OCIO environment variable: {ocio_path}")
 
-    if os.path.isfile(ocio_path):
-        source_dir = os.path.dirname(ocio_path)
-    else:
-        source_dir = ocio_path
-
     if not os.path.exists(source_dir):
         print(f"ERROR: OCIO source directory does not exist: {source_dir}")
         return {'CANCELLED'}
@@ -0,0 +1,179 @@
+import bpy
+import os
+from . import utils, copy_engine, reachability
+
+# Datablock collections holding the external files a pack localizes (all through "filepath")
+PATH_COLLECTIONS = ("images", "movieclips", "cache_files", "volumes", "libraries", "fonts", "sounds")
+
+# Path of the font bundled with Blender, which is not a file
+BUILTIN_FONT = "<builtin>"
+
+# Image sources backed by a file on disk
+IMAGE_FILE_SOURCES = {'FILE', 'SEQUENCE', 'MOVIE'}
+
+_UNSET = object()
+
+def owner_library(datablock, collection):
+    """Library a datablock's path was read from: the parent of an indirect library, or a linked datablock's library."""
+    if collection == "libraries":
+        return datablock.parent
+    return datablock.library
+
+class PathEntry:
+    """One external path: datablock, path attribute, path as stored, resolved absolute path and cached stat."""
+
+    __slots__ = ("datablock", "collection", "attribute", "path", "abs_path", "library", "counters", "_stat")
+
+    def __init__(self, datablock, collection, attribute, path, counters=None):
+        self.datablock = datablock
+        self.collection = collection
+        self.attribute = attribute
+        self.path = path
+        # Relative paths of linked datablocks and indirect libraries are relative to their library file
+        self.library = owner_library(datablock, collection)
+        self.abs_path = os.path.normpath(utils.get_absolute_path(path, library=self.library))
+        self.counters = counters  # timing.IOCounters of the pack, if any
+        self._stat = _UNSET
+
+    @property
+    def stat(self):
+        """os.stat result of the absolute path, read once; None if the file is missing."""
+        if self._stat is _UNSET:
+            if self.counters:
+                self.counters.add("stat_calls")
+            try:
+                self._stat = os.stat(self.abs_path)
+            except OSError:
+                self._stat = None
+        return self._stat
+
+    def refresh(self):
+        """
+        Re-resolve the entry if its datablock path changed since it was indexed.
+        Returns False if the datablock no longer exists.
+        """
+        try:
+            path = getattr(self.datablock, self.attribute)
+        except ReferenceError:
+            return False
+        if path != self.path:
+            self.path = path
+            self.abs_path = os.path.normpath(utils.get_absolute_path(path, library=self.library)) if path else ""
+            self._stat = _UNSET
+        return bool(path)
+
+class PathIndex:
+    """
+    Every external file path of the open session, collected in one traversal
+    of the bpy.data collections that hold them. Cache files are read from
+    bpy.data.cache_files directly instead of through every object's modifiers.
+    During a pack the index is shared by every step (see get_index()), so
+    paths are resolved and stat'ed once.
+    local_only: skip linked datablocks and indirect libraries, whose paths are
+    stored in other library files (see nested_libraries).
+    counters: optional timing.IOCounters counting the stats of the entries.
+    """
+
+    def __init__(self, local_only=False, counters=None):
+        self.entries = {}
+        self.local_only = local_only
+        self.counters = counters
+        self.pending_reloads = {}  # Library name -> library whose path changed since its last reload
+        self.reachable = None  # Datablocks the rendered scenes use, found on first use (see localizable())
+        self.unreachable_reported = False
+        self.build()
+
+    def build(self):
+        """(Re)collect every path, e.g. after library reloads replaced linked datablocks."""
+        self.entries = {}
+        self.reachable = None
+        for collection in PATH_COLLECTIONS:
+            self.entries[collection] = [
+                PathEntry(datablock, collection, "filepath", datablock.filepath, self.counters)
+                for datablock in getattr(bpy.data, collection)
+                if datablock.filepath and datablock.filepath != BUILTIN_FONT
+                and not (self.local_only and owner_library(datablock, collection))
+            ]
+
+    def get(self, collection):
+        """Entries of a collection that still exist and have a path, re-resolved if their path changed."""
+        return [entry for entry in self.entries.get(collection, []) if entry.refresh()]
+
+    def localizable(self, collection):
+        """
+        Entries of a collection to localize: every entry of get(), or with
+        *Only localize rendered assets* only those whose datablock a rendered
+        scene uses (see reachability). The skipped ones are logged once per pack.
+        """
+        entries = self.get(collection)
+        if not reachability.is_enabled():
+            return entries
+        if self.reachable is None:
+            self.reachable = reachability.find_reachable()
+            if not self.unreachable_reported:
+                self.unreachable_reported = True
+                reachability.report_unreachable([entry for name in PATH_COLLECTIONS for entry in self.get(name)
+                                                 if entry.datablock not in self.reachable])
+        return [entry for entry in entries if entry.datablock in self.reachable]
+
+    def make_absolute(self, collections=PATH_COLLECTIONS, reload_libraries=True):
+        """
+        Set the path of every file-backed datablock in collections to its
+        absolute path, in a single pass over the index.
+        reload_libraries: queue each library whose path changed for reload_pending().
+        Returns the number of paths changed.
+        """
+        changed = 0
+        for collection in collections:
+            for entry in self.get(collection):
+                datablock = entry.datablock
+                if getattr(datablock, "packed_file", None):
+                    continue
+                if collection == "images" and datablock.source not in IMAGE_FILE_SOURCES:
+                    continue
+                if entry.path == entry.abs_path:
+                    continue
+                setattr(datablock, entry.attribute, entry.abs_path)
+                entry.path = entry.abs_path
+                changed += 1
+                if collection == "libraries" and reload_libraries:
+                    self.defer_reload(datablock)
+        return changed
+
+    def defer_reload(self, library):
+        """Queue a library whose path changed. A library queued several times is reloaded once."""
+        self.pending_reloads[library.name] = library
+
+    def reload_pending(self):
+        """
+        Reload every queued library once, after all their paths are set, then
+        re-index (reloading a library replaces its linked datablocks).
+        Returns the names of the libraries that failed to reload.
+        """
+        pending, self.pending_reloads = self.pending_reloads, {}
+        if not pending:
+            return []
+        failed = []
+        for name, library in pending.items():
+            try:
+                library.reload()
+            except Exception as e:
+                print(f"WARNING: Failed to reload library {name}: {e}")
+                failed.append(name)
+        print(f"  - Reloaded {len(pending) - len(failed)} of {len(pending)} libraries")
+        self.build()
+        return failed
+
+def get_index(rebuild=False):
+    """
+    Path index of the running pack, built on first use and shared by every
+    step. Outside a pack (single localizer operators), a new index is built.
+    """
+    engine = copy_engine.active_engine()
+    if engine is None:
+        return PathIndex()
+    if engine.path_index is None:
+        engine.path_index = PathIndex(counters=engine.io)
+    elif rebuild:
+        engine.path_index.build()
+    return engine.path_index
@@ -0,0 +1,308 @@
+import bpy
+import os
+import json
+import time
+from . import utils, manifest, sequence_index, path_index, nested_libraries, images, movies, mesh_sequence_cache, references, vdb, ocio, resources
+
+# Pack subfolders, in the order they are reported
+SUBFOLDERS = ("textures", "fonts", "sounds", "sequences", "movies", "abc", "usd", "references", "vdb", "addons", "ocio")
+
+# Read sample used to measure source throughput when no previous pack measured it
+SAMPLE_FILES = 3
+SAMPLE_BYTES = 64 * 1024 * 1024
+
+# Localization steps a plan can include; Pack Project runs all but OCIO and add-ons
+# (RESOURCES: the files over the pack size limit, see resources.collect_resources)
+ALL_STEPS = ('RESOURCES', 'IMAGES', 'MOVIE_CLIPS', 'MESH_CACHES', 'REFERENCES', 'VDBS', 'OCIO', 'ADDONS')
+PACK_PROJECT_STEPS = ('RESOURCES', 'IMAGES', 'MOVIE_CLIPS', 'MESH_CACHES', 'REFERENCES', 'VDBS')
+
+class PackPlan:
+    """
+    Read-only copy plan of a pack: every file each localizer would copy, its
+    destination, size and status, with totals per subfolder and an ETA.
+    """
+
+    def __init__(self, pack_dir):
+        self.pack_dir = pack_dir
+        self.entries = []  # Dicts: asset_type, datablock, source, destination, size, status
+        self.throughput = None
+        self.throughput_source = None
+
+    def add(self, asset_type, datablock, source, destination, size, status):
+        self.entries.append({
+            "asset_type": asset_type,
+            "datablock": datablock,
+            "source": utils.normalize_path(source),
+            "destination": destination,
+            "size": size,
+            "status": status,
+        })
+
+    @property
+    def missing(self):
+        return [entry for entry in self.entries if entry["status"] == "missing"]
+
+    @property
+    def packed(self):
+        """Files under the pack size limit, packed into the blend file (see resources)."""
+        return [entry for entry in self.entries if entry["status"] == "packed"]
+
+    @property
+    def remapped(self):
+        """Assets on farm storage, relinked without being copied (see remap)."""
+        return [entry for entry in self.entries if entry["status"] == "remapped"]
+
+    def totals(self):
+        """Files and bytes per subfolder: {subfolder: {"files", "bytes", "files_to_copy", "bytes_to_copy"}}."""
+        totals = {}
+        for entry in self.entries:
+            if entry["status"] in ("missing", "remapped", "packed"):
+                continue
+            subfolder = entry["destination"].split('/', 1)[0]
+            total = totals.setdefault(subfolder, {"files": 0, "bytes": 0, "files_to_copy": 0, "bytes_to_copy": 0})
+            total["files"] += 1
+            total["bytes"] += entry["size"]
+            if entry["status"] == "copy":
+                total["files_to_copy"] += 1
+                total["bytes_to_copy"] += entry["size"]
+        return {subfolder: totals[subfolder] for subfolder in sorted(totals, key=_subfolder_order)}
+
+    @property
+    def bytes_to_copy(self):
+        return sum(entry["size"] for entry in self.entries if entry["status"] == "copy")
+
+    @property
+    def eta(self):
+        """Estimated copy time in seconds, or None if the throughput is unknown."""
+        if not self.throughput:
+            return None
+        return self.bytes_to_copy / (1024 * 1024) / self.throughput
+
+    def to_dict(self):
+        return {
+            "pack_directory": utils.normalize_path(self.pack_dir),
+            "totals": self.totals(),
+            "bytes_to_copy": self.bytes_to_copy,
+            "throughput_mb_s": self.throughput,
+            "throughput_source": self.throughput_source,
+            "eta_seconds": self.eta,
+            "missing": self.missing,
+            "remapped": self.remapped,
+            "packed": self.packed,
+            "files": self.entries,
+        }
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        print(f"Pack plan written: {path}")
+
+    def summary_lines(self):
+        """Short per-subfolder summary, for the log and the UI."""
+        lines = []
+        for subfolder, total in self.totals().items():
+            lines.append(f"{subfolder}/: {total['files']} files, {_format_size(total['bytes'])} "
+                         f"({total['files_to_copy']} to copy, {_format_size(total['bytes_to_copy'])})")
+        lines.append(f"Total to copy: {_format_size(self.bytes_to_copy)}")
+        if self.eta is not None:
+            lines.append(f"ETA: {_format_duration(self.eta)} at {self.throughput:.1f} MB/s ({self.throughput_source})")
+        if self.packed:
+            lines.append(f"Packed into the blend file: {len(self.packed)} files, "
+                         f"{_format_size(sum(entry['size'] for entry in self.packed))}")
+        if self.remapped:
+            lines.append(f"Remapped to farm storage (not copied): {len(self.remapped)}")
+        if self.missing:
+            lines.append(f"Missing sources: {len(self.missing)}")
+        return lines
+
+    def print_report(self):
+        print("Pack Plan - dy Pack Master (Dry Run)")
+        print("=" * 50)
+        print(f"Pack Directory: {self.pack_dir}")
+        print()
+        for entry in self.entries:
+            if entry['status'] == "packed":
+                destination = "blend file"
+            elif entry['status'] == "remapped":
+                destination = entry['destination']
+            else:
+                destination = f"//{entry['destination']}"
+            print(f"[{entry['status'].upper()}] {entry['asset_type']} '{entry['datablock']}': "
+                  f"{entry['source']} -> {destination} ({_format_size(entry['size'])})")
+        print()
+        for line in self.summary_lines():
+            print(line)
+        print("=" * 50)
+
+def _subfolder_order(subfolder):
+    return SUBFOLDERS.index(subfolder) if subfolder in SUBFOLDERS else len(SUBFOLDERS)
+
+def _format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+def _format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m {seconds:02d}s" if hours else f"{minutes}m {seconds:02d}s"
+
+def _file_status(pack_manifest, src, dest_path, src_stat):
+    if pack_manifest.previous:
+        up_to_date, _ = pack_manifest.check(src, dest_path, src_stat)
+    else:
+        up_to_date = utils.is_up_to_date(src, dest_path, src_stat)
+    return "up to date" if up_to_date else "copy"
+
+def _add_assets(plan, pack_manifest, collected, planned):
+    for asset in collected:
+        if asset.missing:
+            plan.add(asset.asset_type, asset.name, asset.source, asset.relative_path(plan.pack_dir)[2:], 0, "missing")
+            continue
+        if asset.remapped:
+            plan.add(asset.asset_type, asset.name, asset.source, asset.remapped, 0, "remapped")
+            continue
+        dest_dir = asset.dest_dir(plan.pack_dir)
+        for src_file, src_stat in asset.files:
+            filename = asset.filename if src_file == asset.source else os.path.basename(src_file)
+            dest_path = os.path.join(dest_dir, filename)
+            destination = pack_manifest.relative(dest_path)
+            if destination in planned:
+                continue
+            planned.add(destination)
+            try:
+                src_stat = src_stat or os.stat(src_file)
+            except OSError:
+                plan.add(asset.asset_type, asset.name, src_file, destination, 0, "missing")
+                continue
+            status = _file_status(pack_manifest, src_file, dest_path, src_stat)
+            plan.add(asset.asset_type, asset.name, src_file, destination, src_stat.st_size, status)
+
+def _add_tree(plan, asset_type, name, source_dir, subfolder, arc_root=None):
+    """Add every file below source_dir (OCIO config, add-on folders)."""
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = [d for d in dirs if d != '__pycache__']
+        for file in files:
+            path = os.path.join(root, file)
+            rel_path = os.path.relpath(path, source_dir).replace('\\', '/')
+            destination = f"{subfolder}/{arc_root}/{rel_path}" if arc_root else f"{subfolder}/{rel_path}"
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            plan.add(asset_type, name, path, destination, size, "copy")
+
+def _measure_throughput(plan):
+    """Time a short read of the largest files to copy. Returns MB/s or None."""
+    candidates = sorted((entry for entry in plan.entries if entry["status"] == "copy"),
+                        key=lambda entry: entry["size"], reverse=True)[:SAMPLE_FILES]
+    total = 0
+    start = time.perf_counter()
+    for entry in candidates:
+        try:
+            with open(entry["source"], "rb") as f:
+                read = 0
+                while read < SAMPLE_BYTES:
+                    chunk = f.read(utils.HASH_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    read += len(chunk)
+                total += read
+        except OSError:
+            continue
+    elapsed = time.perf_counter() - start
+    if not total or elapsed <= 0:
+        return None
+    return total / (1024 * 1024) / elapsed
+
+def plan_pack(pack_dir=None, steps=PACK_PROJECT_STEPS):
+    """
+    Build the copy plan of a pack without modifying the blend file or copying anything.
+    steps: localization steps to include (see ALL_STEPS), as enabled in the pack operators.
+    Returns a PackPlan, or None if the blend file is not saved.
+    """
+    pack_dir = pack_dir or utils.get_pack_directory()
+    if not pack_dir:
+        print("ERROR: Blend file must be saved before planning a pack.")
+        return None
+
+    plan = PackPlan(pack_dir)
+    pack_manifest = manifest.PackManifest(pack_dir)
+    index = sequence_index.DirectoryIndex()
+    paths = path_index.get_index()
+    planned = set()
+
+    if 'RESOURCES' in steps and resources.get_policy() == resources.SIZE_LIMIT:
+        to_pack, to_localize = resources.collect_resources(paths=paths)
+        for asset in to_pack:
+            src_stat = asset.files[0][1]
+            plan.add(asset.asset_type, asset.name, asset.source, None, src_stat.st_size if src_stat else 0, "packed")
+        _add_assets(plan, pack_manifest, to_localize, planned)
+    if 'IMAGES' in steps:
+        _add_assets(plan, pack_manifest, images.collect_images(index=index, paths=paths), planned)
+    if 'MOVIE_CLIPS' in steps:
+        _add_assets(plan, pack_manifest, movies.collect_movieclips(paths=paths), planned)
+    if 'MESH_CACHES' in steps:
+        _add_assets(plan, pack_manifest, mesh_sequence_cache.collect_mesh_caches(paths=paths), planned)
+    if 'REFERENCES' in steps:
+        collected_references = references.collect_references(paths=paths)
+        _add_assets(plan, pack_manifest, collected_references, planned)
+        if nested_libraries.is_enabled():
+            _add_assets(plan, pack_manifest, nested_libraries.collect_nested_assets(collected_references, index), planned)
+    if 'VDBS' in steps:
+        _add_assets(plan, pack_manifest, vdb.collect_vdb(index=index, paths=paths), planned)
+
+    if 'OCIO' in steps:
+        ocio_path, source_dir = ocio.get_ocio_source()
+        if ocio_path and os.path.isdir(source_dir):
+            _add_tree(plan, "OCIO", os.path.basename(ocio_path), source_dir, "ocio")
+
+    if 'ADDONS' in steps and bpy.context.scene:
+        for item in bpy.context.scene.dy_pack_master_addon_list:
+            if not item.selected:
+                continue
+            clean_name = item.module_name.split('.')[-1]
+            # Sizes are uncompressed: the add-on is zipped into addons/<name>.zip
+            if os.path.basename(item.path) == '__init__.py':
+                _add_tree(plan, "Add-on", item.name, os.path.dirname(item.path), "addons", clean_name)
+            elif os.path.exists(item.path):
+                plan.add("Add-on", item.name, item.path, f"addons/{clean_name}.zip", os.path.getsize(item.path), "copy")
+
+    if pack_manifest.previous_throughput:
+        plan.throughput = pack_manifest.previous_throughput
+        plan.throughput_source = "measured by the previous pack"
+    else:
+        plan.throughput = _measure_throughput(plan)
+        plan.throughput_source = "measured by a sample read of the sources"
+
+    return plan
+
+class DY_PACK_MASTER_OT_plan_pack(bpy.types.Operator):
+    """List what Pack Project would copy, with sizes and an ETA, without changing anything"""
+    bl_idname = "dy_pack_master.plan_pack"
+    bl_label = "Plan Pack (Dry Run)"
+
+    def execute(self, context):
+        plan = plan_pack()
+        if plan is None:
+            self.report({'ERROR'}, "Save blend file first!")
+            return {'CANCELLED'}
+
+        plan.print_report()
+        lines = plan.summary_lines()
+
+        def draw(menu, context):
+            for line in lines:
+                menu.layout.label(text=line)
+            menu.layout.label(text="Full plan printed to the system console", icon='INFO')
+
+        context.window_manager.popup_menu(draw, title="Pack Plan", icon='PACKAGE')
+        return {'FINISHED'}
+
+def register():
+    bpy.utils.register_class(DY_PACK_MASTER_OT_plan_pack)
+
+def unregister():
+    bpy.utils.unregister_class(DY_PACK_MASTER_OT_plan_pack)
@@ -0,0 +1,43 @@
+import os
+from . import copy_engine, resources, images, movies, mesh_sequence_cache, references, vdb
+
+def queue_assets(engine, base_path, steps):
+    """
+    Queue the files every enabled localizer will copy, without modifying the
+    blend file (the collect steps are read-only, as for the dry-run planner).
+    The copies run on the engine's thread pool while the caller stays free;
+    when the localizers run afterwards, they submit the same destinations and
+    get the completed copies back, so only the relinks are left to do.
+    steps: localization steps to queue (see planner.ALL_STEPS).
+    Returns (batch, total bytes queued); call batch.wait() once the engine is idle.
+    """
+    batch = copy_engine.CopyBatch(engine)
+    collectors = []
+    if 'RESOURCES' in steps and resources.get_policy() == resources.SIZE_LIMIT:
+        collectors.append((resources.collect_resources()[1], True))
+    if 'IMAGES' in steps:
+        collectors.append((images.collect_images(index=engine.directory_index), True))
+    if 'MOVIE_CLIPS' in steps:
+        collectors.append((movies.collect_movieclips(), True))
+    if 'MESH_CACHES' in steps:
+        collectors.append((mesh_sequence_cache.collect_mesh_caches(), False))
+    if 'REFERENCES' in steps:
+        collectors.append((references.collect_references(), True))
+    if 'VDBS' in steps:
+        collectors.append((vdb.collect_vdb(index=engine.directory_index), True))
+
+    total_bytes = 0
+    for collected, skip_queued in collectors:
+        # Same duplicate handling as the localizer, so every destination matches
+        processed_files = set() if skip_queued else None
+        for asset in collected:
+            if asset.missing:
+                continue
+            for src_file, src_stat in asset.files:
+                if processed_files is None or src_file not in processed_files:
+                    try:
+                        total_bytes += src_stat.st_size if src_stat else os.path.getsize(src_file)
+                    except OSError:
+                        pass
+            asset.submit(batch, base_path, processed_files)
+    return batch, total_bytes
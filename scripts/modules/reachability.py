@@ -0,0 +1,116 @@
+import bpy
+import os
+from . import utils, copy_engine, sequence_index
+
+def is_enabled():
+    """True if only the assets the rendered scenes use should be localized."""
+    return bool(bpy.context.scene) and utils.get_preference("prune_unreachable", False)
+
+def render_scenes(scene=None):
+    """The scene being rendered and its background sets."""
+    scene = scene or bpy.context.scene
+    scenes = []
+    while scene is not None and scene not in scenes:
+        scenes.append(scene)
+        scene = scene.background_set
+    return scenes
+
+def _layer_objects(layer_collection):
+    """Objects a view layer renders below a layer collection (excluded and render-hidden collections skipped)."""
+    if layer_collection.exclude or layer_collection.collection.hide_render:
+        return
+    for obj in layer_collection.collection.objects:
+        if not obj.hide_render:
+            yield obj
+    for child in layer_collection.children:
+        yield from _layer_objects(child)
+
+def find_reachable(scenes=None):
+    """
+    Datablocks the render of scenes depends on, walked from their rendered
+    view layers: the objects of every included, render-visible collection,
+    then everything they use in turn (object data, materials, modifiers,
+    constraints, node trees, instanced collections), plus the camera, world,
+    compositor and sequencer of each scene. Scenes used by those (scene strips,
+    render layer nodes) are walked too. Edges come from one bpy.data.user_map()
+    call, so the walk reaches any datablock Blender records as used.
+    Returns a set of datablocks, libraries of reachable linked datablocks included.
+    """
+    uses = {}  # Datablock -> datablocks it uses
+    for datablock, users in bpy.data.user_map().items():
+        for user in users:
+            uses.setdefault(user, []).append(datablock)
+
+    reachable = set()
+    pending = []
+
+    def add(datablock):
+        if datablock is not None and datablock not in reachable:
+            reachable.add(datablock)
+            pending.append(datablock)
+
+    for scene in scenes or render_scenes():
+        add(scene)
+
+    while pending:
+        datablock = pending.pop()
+        if isinstance(datablock, bpy.types.Scene):
+            add(datablock.camera)
+            for view_layer in datablock.view_layers:
+                if view_layer.use:
+                    for obj in _layer_objects(view_layer.layer_collection):
+                        add(obj)
+            # The scene collection lists every object, rendered or not
+            for used in uses.get(datablock, ()):
+                if not isinstance(used, (bpy.types.Object, bpy.types.Collection)):
+                    add(used)
+        elif isinstance(datablock, bpy.types.Collection):
+            # Instanced collections render their render-visible objects and children
+            for obj in datablock.objects:
+                if not obj.hide_render:
+                    add(obj)
+            for child in datablock.children:
+                if not child.hide_render:
+                    add(child)
+        else:
+            for used in uses.get(datablock, ()):
+                add(used)
+
+    # Linked datablocks need their library, and an indirect library the library linking it
+    for datablock in list(reachable):
+        library = getattr(datablock, "library", None)
+        while library is not None and library not in reachable:
+            reachable.add(library)
+            library = library.parent
+    return reachable
+
+def _entry_size(entry, index):
+    """Bytes on disk of an indexed path, every frame of a sequence included."""
+    datablock = entry.datablock
+    if getattr(datablock, "source", None) == 'SEQUENCE' or getattr(datablock, "is_sequence", False):
+        frames = index.find_sequence(entry.abs_path)
+        if frames:
+            return sum(stat.st_size if stat else os.path.getsize(path) for path, stat in frames)
+    return entry.stat.st_size if entry.stat else 0
+
+def report_unreachable(entries):
+    """Log the path entries skipped because no rendered scene uses them, largest first. Returns their total size."""
+    engine = copy_engine.active_engine()
+    index = engine.directory_index if engine else sequence_index.DirectoryIndex()
+    sizes = []
+    for entry in entries:
+        if getattr(entry.datablock, "packed_file", None):
+            continue
+        try:
+            sizes.append((_entry_size(entry, index), entry))
+        except OSError:
+            sizes.append((0, entry))
+    if not sizes:
+        return 0
+
+    total = sum(size for size, _ in sizes)
+    print(f"  - Skipping {len(sizes)} assets no rendered scene uses ({total / (1024 * 1024):.1f} MB):")
+    for size, entry in sorted(sizes, key=lambda item: item[0], reverse=True):
+        print(f"    [UNREACHABLE] {entry.datablock.bl_rna.identifier} '{entry.datablock.name}': "
+              f"{utils.normalize_path(entry.abs_path)} ({size / (1024 * 1024):.1f} MB)")
+    return total
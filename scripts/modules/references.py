@@ -1,53 +1,71 @@
 import bpy
 import os
-import shutil
-from . import utils
+from . import utils, copy_engine, assets, path_index, nested_libraries
 
-def set_absolute_path_references():
+def collect_references(paths=None):
     """
-    Converts the filepath of all linked libraries to an absolute path.
+    Resolve the linked libraries to localize without modifying anything.
+    Duplicate filenames from different directories get a numbered name.
+    Returns a list of assets.Asset.
     """
-    libraries_to_process = []
-    for lib in bpy.data.libraries:
-        if not lib.filepath:
+    paths = paths or path_index.get_index()
+    processed_libs = {}
+    used_filenames = set()
+    collected = []
+
+    for entry in paths.localizable("libraries"):
+        lib = entry.datablock
+        normalized_path = entry.path.replace('\\', '/')
+        if normalized_path.startswith("//references"):
+            continue
+
+        source_abs_path = entry.abs_path
+        asset = assets.Asset(lib, "Library", source_abs_path, "references", relinkable=True, entry=entry)
+        collected.append(asset)
+        if asset.missing or asset.remapped:
             continue
-            
-        # Convert to absolute path
-        abs_path = utils.get_absolute_path(lib.filepath)
-        if lib.filepath != abs_path:
-            lib.filepath = abs_path
-            try:
-                lib.reload()
-            except:
-                pass # If reload fails, just keep the path set
-            
-        libraries_to_process.append(lib)
-    
-    return libraries_to_process
 
-def localize_references(base_path=None):
+        if source_abs_path in processed_libs:
+            asset.filename = processed_libs[source_abs_path]
+        else:
+            dest_filename = utils.unique_filename(os.path.basename(source_abs_path), used_filenames)
+            processed_libs[source_abs_path] = dest_filename
+            asset.filename = dest_filename
+
+    return collected
+
+def localize_references(base_path=None, reload_libraries=True):
+    """Localize the linked libraries, blocking until done (see localize_references_steps)."""
+    steps = localize_references_steps(base_path, reload_libraries)
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value
+
+def localize_references_steps(base_path=None, reload_libraries=True):
     """
     Iterates through all linked libraries, copies the referenced blend files to a 
     local 'references' folder, handles duplicate filenames by renaming, relinks 
     the libraries to the new relative paths, and generates a report.
+    reload_libraries: reload each relinked library. Must be off when base_path is not
+    the open file's directory, since the relative paths would not resolve.
+    Every library path is updated first, then the changed libraries are reloaded
+    once each, together with any reload queued by the absolute-path conversion.
+    Generator: yields while the nested libraries are localized in background
+    processes (see nested_libraries). Returns the operator result.
     """
     base_path = base_path or utils.get_blend_dir()
     if not base_path:
         print("ERROR: Blend file must be saved before localizing references.")
         return {'CANCELLED'}
 
-    # Check if there are any libraries that need processing
-    libs_to_process = []
-    for lib in bpy.data.libraries:
-        if not lib.filepath:
-            continue
-        normalized_path = lib.filepath.replace('\\', '/')
-        if normalized_path.startswith("//references"):
-            continue
-        libs_to_process.append(lib)
+    paths = path_index.get_index()
+    collected = collect_references(paths=paths)
     
     # Early exit if no references to localize
-    if not libs_to_process:
+    if not collected:
+        paths.reload_pending()
         print("No external references found to localize.")
         return {'FINISHED'}
 
@@ -56,7 +74,8 @@ def localize_references(base_path=None):
     utils.ensure_directory(refs_dir)
 
     processed_libs = {}
-    used_filenames = set()
+    relinks = []
+    batch = copy_engine.new_batch()
     
     report_lines = []
     report_lines.append("Reference Localization Report")
@@ -64,52 +83,62 @@ def localize_references(base_path=None):
     report_lines.append(f"Source Blend: {bpy.data.filepath}")
     report_lines.append("")
 
-    for lib in libs_to_process:
-        source_abs_path = utils.get_absolute_path(lib.filepath)
-        source_abs_path = os.path.normpath(source_abs_path)
+    for asset in collected:
+        lib = asset.datablock
+        if asset.missing:
+            print(f"WARNING: Source library not found: {asset.source} (Library: {lib.name})")
+            report_lines.append(f"[MISSING] {lib.name} -> {asset.source}")
+            continue
 
-        if not os.path.exists(source_abs_path):
-            print(f"WARNING: Source library not found: {source_abs_path} (Library: {lib.name})")
-            report_lines.append(f"[MISSING] {lib.name} -> {source_abs_path}")
+        if asset.remapped:
+            report_lines.append(f"[REMAPPED] {lib.name} -> {asset.remapped}")
+            relinks.append(asset)
             continue
 
-        if source_abs_path in processed_libs:
-            dest_filename = processed_libs[source_abs_path]
+        if asset.source not in processed_libs:
+            processed_libs[asset.source] = asset.filename
+            asset.submit(batch, base_path)
+
+        relinks.append(asset)
+
+    results = batch.wait()
+
+    for source_abs_path, dest_filename in processed_libs.items():
+        dest_path = results.get(source_abs_path)
+        if dest_path and os.path.basename(dest_path) != dest_filename:
+            report_lines.append(f"[SHARED] {os.path.basename(dest_path)} <- {source_abs_path} (identical content)")
+        elif dest_path:
+            report_lines.append(f"[COPIED] {dest_filename} <- {source_abs_path}")
         else:
-            original_filename = os.path.basename(source_abs_path)
-            name, ext = os.path.splitext(original_filename)
-            
-            dest_filename = original_filename
-            counter = 1
-            
-            while dest_filename in used_filenames:
-                dest_filename = f"{name}_{counter:03d}{ext}"
-                counter += 1
-            
-            used_filenames.add(dest_filename)
-            processed_libs[source_abs_path] = dest_filename
-            
-            dest_filepath = os.path.join(refs_dir, dest_filename)
-            
-            try:
-                shutil.copy2(source_abs_path, dest_filepath)
-                report_lines.append(f"[COPIED] {dest_filename} <- {source_abs_path}")
-            except OSError as e:
-                print(f"ERROR: Failed to copy {source_abs_path}: {e}")
-                report_lines.append(f"[ERROR] Copy failed: {source_abs_path} -> {e}")
-                continue
-
-        relative_path = f"//references/{dest_filename}"
+            print(f"ERROR: Failed to copy {source_abs_path}")
+            report_lines.append(f"[ERROR] Copy failed: {source_abs_path}")
+
+    # Relink on the main thread once all copies have finished; reloads are batched after
+    for asset in relinks:
+        lib = asset.datablock
+        if not asset.remapped and not results.get(asset.source):
+            continue
+
+        # The library may resolve to an identical .blend localized under another name
+        relative_path = asset.relative_path(base_path, results)
         
         if lib.filepath != relative_path:
             old_path = lib.filepath
             lib.filepath = relative_path
-            try:
-                lib.reload()
-                print(f"Relinked library {lib.name}: {old_path} -> {relative_path}")
-            except Exception as e:
-                print(f"WARNING: Failed to reload library {lib.name}: {e}")
-                report_lines.append(f"[WARNING] Reload failed: {lib.name}")
+            print(f"Relinked library {lib.name}: {old_path} -> {relative_path}")
+            # A farm path this workstation does not mount is only written to the file
+            if reload_libraries and (not asset.remapped or os.path.isfile(asset.remapped)):
+                paths.defer_reload(lib)
+
+    # Libraries linked by the localized libraries, and their external files
+    if nested_libraries.is_enabled():
+        report_lines.extend((yield from nested_libraries.localize_nested_libraries(collected, results, base_path)))
+
+    # One reload per changed library, once every path is set
+    for name in paths.reload_pending():
+        report_lines.append(f"[WARNING] Reload failed: {name}")
+
+    batch.record_assets(collected, base_path)
 
     report_path = os.path.join(refs_dir, "references_report.txt")
     try:
@@ -128,6 +157,10 @@ class DY_PACK_MASTER_OT_localize_references(bpy.types.Operator):
     bl_label = "Localize References"
     bl_description = "Copy linked .blend files to //references and relink"
 
+    @classmethod
+    def poll(cls, context):
+        return copy_engine.idle()
+
     def execute(self, context):
         return localize_references()
 
@@ -0,0 +1,98 @@
+import os
+import json
+from . import utils, copy_engine
+
+# Rules file loaded outside a pack, reloaded when it changes: (path, mtime) -> RemapRules
+_cache = {}
+
+class RemapRules:
+    """
+    Path prefixes already on storage every render node mounts. Assets below
+    a "remap" source prefix are relinked to the same path below its farm
+    prefix, assets below a "keep" prefix (or already below a farm prefix)
+    keep their absolute path; neither is copied into the pack. Rules file:
+
+        {
+            "remap": {"/mnt/show": "/farm/show", "P:/library": "/farm/library"},
+            "keep": ["/mnt/textures"]
+        }
+
+    The longest matching prefix wins; prefixes only match whole folder names.
+    """
+
+    def __init__(self, remap=None, keep=()):
+        self.rules = []  # (normalized prefix, farm prefix or None to keep the path)
+        for source, target in (remap or {}).items():
+            self.rules.append((self._prefix(source), target.replace('\\', '/').rstrip('/')))
+            self.rules.append((self._prefix(target), None))
+        for prefix in keep:
+            self.rules.append((self._prefix(prefix), None))
+        self.rules.sort(key=lambda rule: len(rule[0]), reverse=True)
+
+    @staticmethod
+    def _prefix(path):
+        return os.path.normcase(utils.normalize_path(path)).rstrip('/')
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(data.get("remap") or {}, data.get("keep") or [])
+
+    def match(self, path):
+        """Absolute path an asset is relinked to without being copied, or None to localize it."""
+        normalized = utils.normalize_path(path)
+        key = os.path.normcase(normalized)
+        for prefix, target in self.rules:
+            if key == prefix or key.startswith(prefix + '/'):
+                return normalized if target is None else target + normalized[len(prefix):]
+        return None
+
+    def __bool__(self):
+        return bool(self.rules)
+
+def rules_path():
+    """Absolute path of the rules file set in the preferences, or ""."""
+    path = utils.get_preference("path_remap_rules", "")
+    return utils.get_absolute_path(path) if path else ""
+
+def load_rules(path):
+    """Rules of a rules file (empty if unreadable)."""
+    try:
+        rules = RemapRules.load(path)
+        print(f"  - Path remap rules: {len(rules.rules)} prefixes from {path}")
+        return rules
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"WARNING: Failed to read path remap rules {path}: {e}")
+        return RemapRules()
+
+def get_rules():
+    """
+    Rules of the Path Remap Rules preference (empty if unset or unreadable).
+    During a pack they are read once and shared by every step (like the
+    path index), so matching an asset never touches the rules file.
+    Outside a pack the file is read again only when it changed.
+    """
+    engine = copy_engine.active_engine()
+    if engine is not None:
+        if engine.remap_rules is None:
+            path = rules_path()
+            engine.remap_rules = load_rules(path) if path else RemapRules()
+        return engine.remap_rules
+
+    path = rules_path()
+    if not path:
+        return RemapRules()
+    try:
+        key = (path, os.stat(path).st_mtime_ns)
+    except OSError:
+        key = (path, None)  # Warned about once, by the failed load below
+    if key not in _cache:
+        _cache.clear()
+        _cache[key] = load_rules(path)
+    return _cache[key]
+
+def match(path):
+    """Farm path of a source under the remap rules, or None to localize it (see RemapRules.match)."""
+    rules = get_rules()
+    return rules.match(path) if rules else None
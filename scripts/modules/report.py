@@ -1,9 +1,12 @@
 import bpy
 import os
-from . import utils
+from . import utils, path_index, remap
 
-def missing_files_report(operator=None, base_path=None):
-    """Checks for missing files and generates a report if any are found."""
+def missing_files_report(operator=None, base_path=None, archive=None):
+    """
+    Checks for missing files and generates a report if any are found.
+    archive: archive.ArchiveWriter of an archived pack; files streamed into it are not missing.
+    """
     base_path = base_path or utils.get_blend_dir()
     if not base_path:
         if operator:
@@ -13,28 +16,35 @@ def missing_files_report(operator=None, base_path=None):
         return {'CANCELLED'}
 
     missing_files = []
+    rules = remap.get_rules()
 
-    def check_file(filepath, name, type_label):
-        if not filepath:
+    def check_file(entry, type_label):
+        # Relative paths are relative to the packed file, which may not be the open file
+        abs_path = os.path.normpath(utils.get_absolute_path(entry.path, start=base_path))
+        if archive is not None and archive.contains(abs_path):
             return
-        abs_path = os.path.normpath(utils.get_absolute_path(filepath))
-        if not os.path.exists(abs_path):
-            missing_files.append(f"[{type_label}] {name}: {abs_path}")
+        # Reuse the indexed stat when the path resolves to the same file
+        exists = entry.stat is not None if abs_path == entry.abs_path else os.path.exists(abs_path)
+        # Paths on farm storage may not be mounted on this workstation
+        if not exists and not (rules and rules.match(abs_path)):
+            missing_files.append(f"[{type_label}] {entry.datablock.name}: {abs_path}")
 
     try:
         bpy.ops.file.report_missing_files()
     except:
         pass
 
-    for img in bpy.data.images:
+    paths = path_index.get_index()
+    for entry in paths.get("images"):
+        img = entry.datablock
         if img.source in {'FILE', 'SEQUENCE'} and not img.packed_file:
-            check_file(img.filepath, img.name, "Image")
+            check_file(entry, "Image")
 
-    for lib in bpy.data.libraries:
-        check_file(lib.filepath, lib.name, "Library")
+    for entry in paths.get("libraries"):
+        check_file(entry, "Library")
 
-    for cache in bpy.data.cache_files:
-        check_file(cache.filepath, cache.name, "Cache")
+    for entry in paths.get("cache_files"):
+        check_file(entry, "Cache")
 
     if missing_files:
         report_path = os.path.join(base_path, "missing_files_report.txt")
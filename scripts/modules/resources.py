@@ -0,0 +1,131 @@
+import os
+import bpy
+from . import utils, copy_engine, assets, path_index, layout
+
+# Pack Policy preference values
+PACK_ALL = 'PACK_ALL'
+SIZE_LIMIT = 'SIZE_LIMIT'
+
+# Datablock collections the pack policy applies to: (collection, asset type, pack subfolder)
+RESOURCE_TYPES = (
+    ("images", "Texture", "textures"),
+    ("fonts", "Font", "fonts"),
+    ("sounds", "Sound", "sounds"),
+)
+
+def get_policy():
+    return utils.get_preference("pack_policy", SIZE_LIMIT)
+
+def get_size_limit():
+    """Largest file packed into the blend file, in bytes."""
+    return utils.get_preference("pack_size_limit", 16) * 1024 * 1024
+
+def collect_resources(paths=None, size_limit=None, folders=None):
+    """
+    Resolve the still images, fonts and sounds of the pack policy without
+    modifying anything: files up to size_limit are packed into the blend file,
+    larger ones (and missing or remapped ones) are localized to //textures/,
+    //fonts/ and //sounds/. UDIM images are always packed. Localized files
+    with the same name from different folders get unique names
+    (diffuse.png, diffuse_001.png), like the references folder.
+    folders: layout.SequenceFolders placing the files (default: the pack's shared folders).
+    Returns (assets to pack, assets to localize), lists of assets.Asset.
+    """
+    paths = paths or path_index.get_index()
+    folders = folders or layout.get_folders()
+    size_limit = get_size_limit() if size_limit is None else size_limit
+    to_pack = []
+    to_localize = []
+    used_filenames = {}  # Subfolder -> filenames given to a source
+    filenames = {}  # (subfolder, normalized source) -> filename
+
+    for collection, asset_type, pack_subfolder in RESOURCE_TYPES:
+        subfolder = folders.folder(pack_subfolder)
+        for entry in paths.localizable(collection):
+            datablock = entry.datablock
+            # Linked datablocks are packed with their library (see nested_libraries)
+            if datablock.packed_file or datablock.library is not None:
+                continue
+            if collection == "images" and datablock.source not in {'FILE', 'TILED'}:
+                continue
+            # Skip already localized files
+            if entry.path.replace('\\', '/').startswith(f"//{subfolder}/"):
+                continue
+
+            asset = assets.Asset(datablock, asset_type, entry.abs_path, subfolder, relinkable=True, entry=entry)
+            if asset.remapped:
+                to_localize.append(asset)
+                continue
+            if collection == "images" and datablock.source == 'TILED':
+                to_pack.append(asset)
+                continue
+            if asset.missing:
+                to_localize.append(asset)
+                continue
+            if entry.stat.st_size <= size_limit:
+                to_pack.append(asset)
+                continue
+
+            key = (subfolder, os.path.normcase(utils.normalize_path(entry.abs_path)))
+            if key not in filenames:
+                filenames[key] = utils.unique_filename(asset.filename, used_filenames.setdefault(subfolder, set()))
+            asset.filename = filenames[key]
+            to_localize.append(asset)
+    return to_pack, to_localize
+
+def pack_resources(base_path=None):
+    """
+    Step 3 of a pack: pack the blend file resources under the Pack Policy
+    preference. Pack All embeds every image, font, sound and volume with
+    bpy.ops.file.pack_all(). Size Limit packs files up to Pack Size Limit and
+    copies the larger ones next to the blend file (deduplicated like every
+    localized file), so the packed file stays small and loads fast on the farm.
+    """
+    if get_policy() == PACK_ALL:
+        bpy.ops.file.pack_all()
+        return {'FINISHED'}
+
+    base_path = base_path or utils.get_blend_dir()
+    if not base_path:
+        print("ERROR: Blend file must be saved before packing resources.")
+        return {'CANCELLED'}
+
+    to_pack, to_localize = collect_resources()
+    packed = 0
+    packed_bytes = 0
+    for asset in to_pack:
+        try:
+            asset.datablock.pack()
+            packed += 1
+            packed_bytes += asset.files[0][1].st_size if asset.files[0][1] else 0
+        except RuntimeError as e:
+            print(f"WARNING: Failed to pack {asset.name}: {e}")
+
+    processed_files = set()
+    relinks = []
+    count = 0
+    batch = copy_engine.new_batch()
+    for asset in to_localize:
+        if asset.missing:
+            print(f"WARNING: Source file not found: {asset.source} ({asset.asset_type}: {asset.name})")
+            continue
+        asset.submit(batch, base_path, processed_files)
+        relinks.append(asset)
+
+    results = batch.wait()
+
+    # Relink on the main thread once all copies have finished.
+    # The file may resolve to an identical file localized for another datablock.
+    for asset in relinks:
+        if not asset.remapped and not results.get(asset.source):
+            continue
+        relative_path = asset.relative_path(base_path, results)
+        if asset.datablock.filepath != relative_path:
+            asset.datablock.filepath = relative_path
+            count += 1
+
+    batch.record_assets(to_localize, base_path)
+    print(f"  - Packed {packed} files ({packed_bytes / (1024 * 1024):.1f} MB) up to "
+          f"{get_size_limit() / (1024 * 1024):.0f} MB into the blend file")
+    print(f"Resource packing complete. Relinked {count} larger files, copied {len(processed_files)} files.")
+    return {'FINISHED'}
@@ -0,0 +1,83 @@
+import os
+import re
+import threading
+
+# Last group of digits in a filename (the frame number)
+FRAME_PATTERN = re.compile(r'(\d+)(?!.*\d)')
+
+def split_frame(file_name):
+    """Split a filename into (prefix, frame digits, suffix), or None if it has no frame number."""
+    match = FRAME_PATTERN.search(file_name)
+    if not match:
+        return None
+    return file_name[:match.start()], match.group(1), file_name[match.end():]
+
+def sequence_pattern(file_name):
+    """Human readable pattern of the sequence a file belongs to (e.g. 'shot.*.exr')."""
+    parts = split_frame(file_name)
+    if not parts:
+        return file_name
+    return parts[0] + "*" + parts[2]
+
+class DirectoryIndex:
+    """
+    Sequence lookups answered from memory. Each source directory is listed
+    once with os.scandir and its files grouped by prefix/suffix around the
+    frame number; the DirEntry objects are kept so their stat results can be
+    reused by the copy step.
+    counters: optional timing.IOCounters counting the listings and stats.
+    """
+
+    def __init__(self, counters=None):
+        self.counters = counters
+        self._lock = threading.Lock()
+        self._directories = {}  # Directory -> {(prefix, suffix): [(frame digits, DirEntry)]}
+        self.directories_scanned = 0
+
+    def _scan(self, directory):
+        with self._lock:
+            groups = self._directories.get(directory)
+            if groups is not None:
+                return groups
+
+            groups = {}
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        parts = split_frame(entry.name)
+                        if not parts or not entry.is_file():
+                            continue
+                        prefix, frame, suffix = parts
+                        key = (os.path.normcase(prefix), os.path.normcase(suffix))
+                        groups.setdefault(key, []).append((frame, entry))
+            except OSError as e:
+                print(f"WARNING: Failed to list directory {directory}: {e}")
+
+            self._directories[directory] = groups
+            self.directories_scanned += 1
+            if self.counters:
+                self.counters.add("dir_scans")
+            return groups
+
+    def find_sequence(self, path):
+        """
+        Return [(path, stat)] for every frame of the sequence path belongs to,
+        sorted by frame number. Returns None if the filename has no frame number.
+        """
+        directory, file_name = os.path.split(os.path.normpath(path))
+        parts = split_frame(file_name)
+        if not parts:
+            return None
+
+        prefix, _, suffix = parts
+        frames = self._scan(directory).get((os.path.normcase(prefix), os.path.normcase(suffix)), [])
+
+        found = []
+        for frame, entry in sorted(frames, key=lambda item: int(item[0])):
+            try:
+                found.append((os.path.normpath(entry.path), entry.stat()))
+            except OSError:
+                continue
+        if self.counters:
+            self.counters.add("stat_calls", len(frames))
+        return found
@@ -0,0 +1,83 @@
+import bpy
+from contextlib import contextmanager
+
+# Datablock collections and the path property a pack may rewrite
+PATH_PROPERTIES = (
+    ("images", "filepath"),
+    ("movieclips", "filepath"),
+    ("cache_files", "filepath"),
+    ("volumes", "filepath"),
+    ("libraries", "filepath"),
+    ("sounds", "filepath"),
+    ("fonts", "filepath"),
+)
+
+# Datablock collections file.pack_all() can pack
+PACKABLE_COLLECTIONS = ("images", "fonts", "sounds", "volumes")
+
+class PathSnapshot:
+    """
+    Every path a pack can change in the open session (datablock file paths,
+    render outputs) and which datablocks are packed. restore() puts back
+    only what changed, so the original file stays open without being
+    reloaded from disk.
+    """
+
+    def __init__(self):
+        self.paths = []  # (owner, property, value)
+        self.packed = set()  # (collection, datablock name, library) packed before the pack
+        self.capture()
+
+    def capture(self):
+        for collection, prop in PATH_PROPERTIES:
+            for datablock in getattr(bpy.data, collection):
+                if datablock.library is None:
+                    self.paths.append((datablock, prop, getattr(datablock, prop)))
+        for scene in bpy.data.scenes:
+            if scene.library is None:
+                self.paths.append((scene.render, "filepath", scene.render.filepath))
+        for collection in PACKABLE_COLLECTIONS:
+            for datablock in getattr(bpy.data, collection):
+                if datablock.packed_file:
+                    self.packed.add((collection, datablock.name, datablock.library))
+
+    def restore(self):
+        """Undo the path changes and unpack what the pack packed. Returns the number of restored values."""
+        restored = 0
+        for owner, prop, value in self.paths:
+            try:
+                if getattr(owner, prop) != value:
+                    setattr(owner, prop, value)
+                    restored += 1
+            except (AttributeError, ReferenceError, TypeError) as e:
+                print(f"WARNING: Failed to restore {prop} of {owner}: {e}")
+
+        for collection in PACKABLE_COLLECTIONS:
+            for datablock in getattr(bpy.data, collection):
+                if not datablock.packed_file or (collection, datablock.name, datablock.library) in self.packed:
+                    continue
+                if not hasattr(datablock, "unpack"):
+                    print(f"WARNING: Cannot unpack {datablock.name}; it stays packed in the open file")
+                    continue
+                try:
+                    datablock.unpack(method='REMOVE')
+                    restored += 1
+                except RuntimeError as e:
+                    print(f"WARNING: Failed to unpack {datablock.name}: {e}")
+        return restored
+
+@contextmanager
+def preserve(enabled=True):
+    """
+    Snapshot the open session on entry and restore it on exit, even if the
+    pack fails. Yields the PathSnapshot, or None when disabled.
+    """
+    if not enabled:
+        yield None
+        return
+    snapshot = PathSnapshot()
+    try:
+        yield snapshot
+    finally:
+        restored = snapshot.restore()
+        print(f"  - Restored {restored} paths in the open file")
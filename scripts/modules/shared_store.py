@@ -0,0 +1,164 @@
+import os
+import time
+import socket
+import hashlib
+import threading
+from . import utils
+
+# A lock of another machine is considered abandoned when its copy made no progress for this long
+STALE_LOCK_SECONDS = 60
+POLL_INTERVAL = 0.2
+# Attempts to take over the lock of a file whose copy failed or was abandoned
+LOCK_ATTEMPTS = 3
+
+def _process_alive(pid):
+    """True if a process of this machine is running (or cannot be checked)."""
+    if os.name == 'nt':
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return kernel32.GetLastError() == 5  # ERROR_ACCESS_DENIED: it exists
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # Exists, owned by another user
+    return True
+
+class SharedStore:
+    """
+    Content store shared by every shot of a batch pack, possibly packed by
+    other Blender processes at the same time. Each source file (identified
+    by path, size and mtime) is copied into the store once; shot packs then
+    hardlink it. Processes coordinate through lock files created with O_EXCL,
+    so no two processes copy the same source at once. A lock records its
+    owner (host, pid and temporary file): the lock of a process that died is
+    taken over at once, and the lock of another machine once its copy made no
+    progress for STALE_LOCK_SECONDS.
+    """
+
+    def __init__(self, directory):
+        self.directory = utils.ensure_directory(directory)
+        self._lock = threading.Lock()
+        self.files_stored = 0
+        self.files_reused = 0
+        self.bytes_reused = 0
+
+    def store_path(self, src, src_stat):
+        """Path of a source file in the store; changes whenever the source is modified."""
+        identity = f"{utils.normalize_path(src)}|{src_stat.st_size}|{src_stat.st_mtime_ns}"
+        digest = hashlib.sha1(identity.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + os.path.splitext(src)[1])
+
+    def fetch(self, src, src_stat, allow_hardlink=False, on_transfer=None):
+        """
+        Return (store path, copied) for src, copying it into the store unless
+        this or another process already did. copied is True if this call
+        transferred the file. Returns (None, False) if the store cannot provide it.
+        """
+        path = self.store_path(src, src_stat)
+        if os.path.exists(path):
+            self._add_reuse(src_stat.st_size)
+            return path, False
+
+        utils.ensure_directory(os.path.dirname(path))
+        lock_path = path + ".lock"
+        # Per process, so a process taking over an abandoned lock never writes into the same file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        lock = None
+        for _ in range(LOCK_ATTEMPTS):
+            try:
+                lock = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(lock, f"{socket.gethostname()}\n{os.getpid()}\n{os.path.basename(temp_path)}".encode("utf-8"))
+                break
+            except FileExistsError:
+                if self._wait(path, lock_path):
+                    self._add_reuse(src_stat.st_size)
+                    return path, False
+                # The owner failed or abandoned its lock: try to copy the file ourselves
+            except OSError as e:
+                print(f"WARNING: Shared store unavailable for {src}: {e}")
+                return None, False
+        if lock is None:
+            return None, False
+
+        try:
+            # Another process may have finished between the exists() check and the lock
+            if os.path.exists(path):
+                self._add_reuse(src_stat.st_size)
+                return path, False
+            strategy, reason = utils.transfer_file(src, temp_path, allow_hardlink=allow_hardlink)
+            os.replace(temp_path, path)
+            if on_transfer:
+                on_transfer(strategy, reason)
+            with self._lock:
+                self.files_stored += 1
+            return path, True
+        except OSError as e:
+            print(f"WARNING: Failed to copy {src} to the shared store: {e}")
+            if os.path.lexists(temp_path):
+                os.remove(temp_path)
+            return None, False
+        finally:
+            os.close(lock)
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass  # Taken over by another process that thought it abandoned
+
+    def _wait(self, path, lock_path):
+        """
+        Wait for another process to store a file. Returns False if it failed,
+        or if its lock was abandoned (the lock is then removed).
+        """
+        while os.path.exists(lock_path):
+            if self._is_stale(lock_path):
+                print(f"WARNING: Removing abandoned shared store lock: {lock_path}")
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    pass
+                return False
+            time.sleep(POLL_INTERVAL)
+        return os.path.exists(path)
+
+    def _is_stale(self, lock_path):
+        """
+        True if the owner of a lock is gone: a process of this machine that is
+        no longer running, or a copy that made no progress (lock and temporary
+        file untouched) for STALE_LOCK_SECONDS.
+        """
+        try:
+            with open(lock_path, "r", encoding="utf-8") as f:
+                host, pid, temp_name = f.read().split("\n")
+            if host == socket.gethostname():
+                return not _process_alive(int(pid))
+        except (OSError, ValueError):
+            temp_name = None  # Owner still writing the lock, or lock just released
+        progress_paths = [lock_path]
+        if temp_name:
+            progress_paths.append(os.path.join(os.path.dirname(lock_path), temp_name))
+        mtimes = []
+        for progress_path in progress_paths:
+            try:
+                mtimes.append(os.path.getmtime(progress_path))
+            except OSError:
+                pass
+        return bool(mtimes) and time.time() - max(mtimes) > STALE_LOCK_SECONDS
+
+    def _add_reuse(self, size):
+        with self._lock:
+            self.files_reused += 1
+            self.bytes_reused += size
+
+    def summary(self):
+        return (f"Shared store: {self.files_stored} files added, {self.files_reused} reused from other shots "
+                f"({self.bytes_reused / (1024 * 1024):.1f} MB not copied again)")
@@ -0,0 +1,120 @@
+import os
+import re
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+TIMINGS_FILENAME = "pack_timings.json"
+
+# "[4/11] Localizing Images" -> "Localizing Images"
+STEP_NUMBER = re.compile(r'^\[\d+/\d+\]\s*')
+
+class IOCounters:
+    """
+    Filesystem metadata calls made by a pack, counted where the pack makes
+    them: the stats of the path index and of the copy engine (sources and
+    up-to-date checks), and the directory listings and frame stats of the
+    directory index. Other code is not instrumented, so the numbers are
+    indicative of the pack's own I/O.
+    """
+
+    def __init__(self):
+        self.counts = {"stat_calls": 0, "dir_scans": 0}
+        self._lock = threading.Lock()
+
+    def add(self, key, count=1):
+        with self._lock:
+            self.counts[key] += count
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+class PackTimer:
+    """
+    Per-step instrumentation of a pack: wall time, files and bytes copied,
+    MB/s and stat/directory listing calls (see IOCounters) of every step
+    wrapped in step(). Ends with a summary table for the pack log and a JSON sidecar.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.steps = []
+        self._start = None
+        self.total_time = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.total_time = time.perf_counter() - self._start
+        return False
+
+    def _counters(self):
+        engine = self.engine
+        counters = engine.io.snapshot() if engine else {"stat_calls": 0, "dir_scans": 0}
+        counters["files_copied"] = engine.files_copied if engine else 0
+        counters["bytes_copied"] = engine.bytes_copied if engine else 0
+        counters["files_skipped"] = engine.files_skipped if engine else 0
+        return counters
+
+    @contextmanager
+    def step(self, label):
+        """
+        Time a pack step; label is printed like the existing step headers ('[4/11] Localizing Images').
+        Yields the label.
+        """
+        print(f"\n{label}...")
+        before = self._counters()
+        start = time.perf_counter()
+        try:
+            yield label
+        finally:
+            seconds = time.perf_counter() - start
+            after = self._counters()
+            record = {"step": STEP_NUMBER.sub("", label), "seconds": seconds}
+            for key in after:
+                record[key] = after[key] - before[key]
+            record["mb_per_s"] = record["bytes_copied"] / (1024 * 1024) / seconds if seconds > 0 else 0.0
+            self.steps.append(record)
+
+    def totals(self):
+        totals = {"seconds": self.total_time or (time.perf_counter() - self._start if self._start else 0.0)}
+        for record in self.steps:
+            for key in ("files_copied", "bytes_copied", "files_skipped", "stat_calls", "dir_scans"):
+                totals[key] = totals.get(key, 0) + record[key]
+        totals["mb_per_s"] = (totals.get("bytes_copied", 0) / (1024 * 1024) / totals["seconds"]
+                              if totals["seconds"] > 0 else 0.0)
+        return totals
+
+    def summary_table(self):
+        """Fixed-width table of the steps, slowest highlighted by its share of the total time."""
+        totals = self.totals()
+        total_seconds = totals["seconds"] or 1.0
+        width = max([len(record["step"]) for record in self.steps] + [len("Total")])
+        header = f"{'Step':<{width}}  {'Time':>9}  {'%':>5}  {'Files':>7}  {'MB':>10}  {'MB/s':>8}  {'stat':>8}  {'scans':>6}"
+        lines = [header, "-" * len(header)]
+        for record in self.steps + [dict(totals, step="Total")]:
+            if record["step"] == "Total":
+                lines.append("-" * len(header))
+            lines.append(
+                f"{record['step']:<{width}}  {record['seconds']:>8.2f}s  "
+                f"{100 * record['seconds'] / total_seconds:>4.0f}%  "
+                f"{record.get('files_copied', 0):>7}  {record.get('bytes_copied', 0) / (1024 * 1024):>10.1f}  "
+                f"{record['mb_per_s']:>8.1f}  {record.get('stat_calls', 0):>8}  {record.get('dir_scans', 0):>6}"
+            )
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {"steps": self.steps, "totals": self.totals()}
+
+    def write_json(self, pack_dir):
+        path = os.path.join(pack_dir, TIMINGS_FILENAME)
+        try:
+            with open(path, "w") as f:
+                json.dump(self.to_dict(), f, indent=2)
+            print(f"Pack timings written: {path}")
+        except OSError as e:
+            print(f"WARNING: Failed to write pack timings: {e}")
@@ -1,38 +1,102 @@
 import bpy
 import os
+import hashlib
 import shutil
 import sys
 from contextlib import contextmanager
 
-def get_absolute_path(path):
-    """Convert a Blender path (//) to an absolute path with forward slashes."""
-    return os.path.abspath(bpy.path.abspath(path)).replace('\\', '/')
+# Addon package name for preferences lookup (this module lives in <addon>.scripts.modules)
+ADDON_NAME = __package__.rsplit('.', 2)[0]
 
-def convert_all_paths_to_absolute():
-    """Convert all asset paths to absolute before saving to new location."""
-    from . import mesh_sequence_cache, vdb, references, images, movies
-    
-    print("  - Converting mesh cache paths...")
-    mesh_sequence_cache.set_absolute_path_mesh_cache()
-    
-    print("  - Converting VDB paths...")
-    vdb.set_absolute_path_vdb()
-    
-    print("  - Converting reference paths...")
-    references.set_absolute_path_references()
-    
-    print("  - Converting image sequence/movie paths...")
-    images.set_absolute_path_images()
+HASH_ALGORITHM = "sha256"
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Linux ioctl to clone a file's extents (reflink) on XFS, Btrfs, OCFS2, NFS 4.2...
+FICLONE = 0x40049409
+COPY_CHUNK_SIZE = 1024 * 1024 * 1024
+BUFFER_SIZE = 4 * 1024 * 1024
+
+# Copies are written under this suffix and renamed once complete, so an interrupted copy never looks finished
+PARTIAL_SUFFIX = ".dypart"
+
+# Preference values forced by a headless pack (see preference_overrides)
+_preference_overrides = {}
+
+def get_preference(name, default=None):
+    """Read an addon preference, falling back to default when the addon prefs are unavailable."""
+    if name in _preference_overrides:
+        return _preference_overrides[name]
+    addon = bpy.context.preferences.addons.get(ADDON_NAME)
+    if not addon:
+        return default
+    return getattr(addon.preferences, name, default)
+
+def get_absolute_path(path, start=None, library=None):
+    """
+    Convert a Blender path (//) to an absolute path with forward slashes.
+    start: directory // is relative to (defaults to the open blend file's directory).
+    library: library the path was read from; // is then relative to that library file.
+    """
+    return os.path.abspath(bpy.path.abspath(path, start=start, library=library)).replace('\\', '/')
+
+def normalize_path(path):
+    """Normalize a filesystem path and use forward slashes (for manifests and reports)."""
+    return os.path.normpath(path).replace('\\', '/')
+
+def hash_file(path, algorithm=HASH_ALGORITHM):
+    """Hash a file's content with streaming reads. Returns the hex digest."""
+    hasher = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        _hash_stream(f, hasher)
+    return hasher.hexdigest()
+
+def _hash_stream(file, hasher):
+    while True:
+        chunk = file.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        hasher.update(chunk)
+
+def is_up_to_date(src, dest_path, src_stat=None):
+    """True if dest_path exists with the same size and modification time as src (as left by copy2)."""
+    try:
+        src_stat = src_stat or os.stat(src)
+        dest_stat = os.stat(dest_path)
+    except OSError:
+        return False
+    return src_stat.st_size == dest_stat.st_size and abs(src_stat.st_mtime - dest_stat.st_mtime) <= 1
 
-    print("  - Converting movie clip paths...")
-    movies.set_absolute_path_movieclips()
+def get_relative_path(path, base_path):
+    """Blender relative path (//) of a file inside base_path, with forward slashes."""
+    return "//" + os.path.relpath(path, base_path).replace('\\', '/')
+
+def unique_filename(filename, used_filenames):
+    """filename, or name_001.ext, name_002.ext... if already in used_filenames (which it is added to)."""
+    name, ext = os.path.splitext(filename)
+    unique = filename
+    counter = 1
+    while unique in used_filenames:
+        unique = f"{name}_{counter:03d}{ext}"
+        counter += 1
+    used_filenames.add(unique)
+    return unique
+
+def convert_all_paths_to_absolute(reload_libraries=True, defer_reload=False):
+    """
+    Convert all asset paths to absolute before saving to new location.
+    reload_libraries: reload linked libraries after changing their path (not needed when the open file is kept).
+    defer_reload: leave the reloads queued on the pack's path index, for a step that relinks
+    the libraries again (references.localize_references reloads each library once at its end).
+    Images, movie clips, cache files, volumes and libraries are converted in one pass over the path index.
+    """
+    from . import path_index
     
-    print("  - Converting image paths...")
-    for img in bpy.data.images:
-        if img.source in {'FILE', 'SEQUENCE'} and not img.packed_file and img.filepath:
-            abs_path = get_absolute_path(img.filepath)
-            if img.filepath != abs_path:
-                img.filepath = abs_path
+    paths = path_index.get_index()
+    changed = paths.make_absolute(reload_libraries=reload_libraries)
+    indexed = sum(len(entries) for entries in paths.entries.values())
+    print(f"  - Converted {changed} of {indexed} external paths")
+    if not defer_reload:
+        paths.reload_pending()
 
 def ensure_directory(path):
     """Ensure a directory exists."""
@@ -40,31 +104,185 @@ def ensure_directory(path):
         os.makedirs(path)
     return path
 
-def copy_file(src, dest_dir, overwrite=False):
-    """Copy a file to a destination directory."""
+def _reflink(src_file, dest_file):
+    import fcntl
+    fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+
+def _copy_file_range(src_file, dest_file, size):
+    remaining = size
+    while remaining > 0:
+        copied = os.copy_file_range(src_file.fileno(), dest_file.fileno(), min(remaining, COPY_CHUNK_SIZE))
+        if copied == 0:
+            break
+        remaining -= copied
+    if remaining:
+        raise OSError(f"copy_file_range stopped with {remaining} bytes left")
+
+def _hashed_copy(src_file, dest_file, hasher):
+    """Buffered copy feeding every chunk to hasher, so the source is read once for both."""
+    buffer = bytearray(BUFFER_SIZE)
+    view = memoryview(buffer)
+    while True:
+        read = src_file.readinto(buffer)
+        if not read:
+            break
+        hasher.update(view[:read])
+        dest_file.write(view[:read])
+
+def _sendfile(src_file, dest_file, size):
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(dest_file.fileno(), src_file.fileno(), offset, min(size - offset, COPY_CHUNK_SIZE))
+        if sent == 0:
+            break
+        offset += sent
+    if offset < size:
+        raise OSError(f"sendfile stopped with {size - offset} bytes left")
+
+def transfer_file(src, dest_path, allow_hardlink=False, hasher=None):
+    """
+    Copy src to dest_path using the cheapest strategy available:
+    FICLONE reflink, hardlink (only if allowed), copy_file_range, sendfile, then a buffered copy.
+    Metadata is preserved like shutil.copy2. Returns (strategy, reason).
+    hasher: hashlib object fed with the content of src. The in-kernel copies are
+    then skipped for a buffered copy that hashes what it reads; a reflink or
+    hardlink reads nothing, so the source is hashed on its own.
+    """
+    strategy, reason = _transfer_file(src, dest_path, allow_hardlink, hasher)
+    if strategy != "hardlink":
+        shutil.copystat(src, dest_path)
+    return strategy, reason
+
+def _transfer_file(src, dest_path, allow_hardlink, hasher=None):
+    is_linux = sys.platform.startswith("linux")
+    fallbacks = []
+
+    with open(src, "rb") as src_file:
+        size = os.fstat(src_file.fileno()).st_size
+        dest_file = open(dest_path, "wb")
+        try:
+            if is_linux:
+                try:
+                    _reflink(src_file, dest_file)
+                    if hasher:
+                        _hash_stream(src_file, hasher)
+                    return "reflink", "FICLONE clone on the same volume"
+                except OSError as e:
+                    fallbacks.append(f"reflink: {e.strerror or e}")
+            else:
+                fallbacks.append("reflink: Linux only")
+
+            if allow_hardlink:
+                dest_file.close()
+                os.remove(dest_path)
+                try:
+                    os.link(src, dest_path)
+                    if hasher:
+                        _hash_stream(src_file, hasher)
+                    return "hardlink", "; ".join(fallbacks + ["hardlinks allowed in preferences"])
+                except OSError as e:
+                    fallbacks.append(f"hardlink: {e.strerror or e}")
+                dest_file = open(dest_path, "wb")
+
+            if hasher:
+                _hashed_copy(src_file, dest_file, hasher)
+                return "buffered", "; ".join(fallbacks + ["hashed while copying"])
+
+            strategies = []
+            if is_linux and hasattr(os, "copy_file_range"):
+                strategies.append(("copy_file_range", _copy_file_range))
+            if is_linux and hasattr(os, "sendfile"):
+                strategies.append(("sendfile", _sendfile))
+            for name, copy_func in strategies:
+                try:
+                    copy_func(src_file, dest_file, size)
+                    return name, "; ".join(fallbacks) or "in-kernel copy"
+                except OSError as e:
+                    fallbacks.append(f"{name}: {e.strerror or e}")
+                    src_file.seek(0)
+                    dest_file.seek(0)
+                    dest_file.truncate()
+
+            shutil.copyfileobj(src_file, dest_file, BUFFER_SIZE)
+            return "buffered", "; ".join(fallbacks) or "no fast path on this platform"
+        finally:
+            dest_file.close()
+
+def copy_file(src, dest_dir, overwrite=False, filename=None, allow_hardlink=False, on_transfer=None, hasher=None):
+    """
+    Copy a file to a destination directory, optionally under a different filename.
+    An existing destination is only kept if it is up to date with the source.
+    The file is written to a temporary name and atomically renamed when complete.
+    on_transfer: optional callback receiving (strategy, reason) of the transfer.
+    hasher: optional hashlib object fed with the copied content (see transfer_file).
+    """
     if not os.path.exists(src):
         print(f"Source file not found: {src}")
         return None
     
-    filename = os.path.basename(src)
+    filename = filename or os.path.basename(src)
     dest_path = os.path.join(dest_dir, filename)
     
-    if os.path.exists(dest_path) and not overwrite:
+    if not overwrite and is_up_to_date(src, dest_path):
         return dest_path
         
+    # Renaming over the destination never writes through it: it may be a hardlink shared with another asset
+    # Per process, so background Blender processes localizing into the same pack never share a partial copy
+    partial_path = f"{dest_path}.{os.getpid()}{PARTIAL_SUFFIX}"
     try:
-        shutil.copy2(src, dest_path)
+        strategy, reason = transfer_file(src, partial_path, allow_hardlink=allow_hardlink, hasher=hasher)
+        os.replace(partial_path, dest_path)
+        if on_transfer:
+            on_transfer(strategy, reason)
         return dest_path
     except Exception as e:
         print(f"Error copying {src} to {dest_path}: {e}")
+        try:
+            if os.path.lexists(partial_path):
+                os.remove(partial_path)
+        except OSError:
+            pass
         return None
 
+def link_file(src, dest_path):
+    """Hardlink dest_path to src, replacing any existing file. Returns False if hardlinks are not possible."""
+    try:
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+        os.link(src, dest_path)
+        return True
+    except (OSError, AttributeError, NotImplementedError):
+        return False
+
 def get_blend_dir():
     """Get the directory of the current blend file."""
     if not bpy.data.filepath:
         return None
     return os.path.dirname(bpy.data.filepath)
 
+def get_blend_suffix():
+    """Blend suffix preference, always starting with an underscore."""
+    suffix = get_preference("blend_suffix", "_packed")
+    if not suffix.startswith('_'):
+        suffix = '_' + suffix
+    return suffix
+
+def get_pack_directory(suffix=None, output_dir=None):
+    """
+    Pack directory used by Pack Project for the current blend file, created
+    next to it unless output_dir is given.
+    Example: "scn010.blend" -> "scn010_packed/"
+    """
+    if not bpy.data.filepath:
+        return None
+    if suffix is None:
+        suffix = get_blend_suffix()
+    elif not suffix.startswith('_'):
+        suffix = '_' + suffix
+    directory = output_dir or os.path.dirname(bpy.data.filepath)
+    name = os.path.splitext(os.path.basename(bpy.data.filepath))[0]
+    return os.path.join(directory, f"{name}{suffix}")
+
 def save_blend_with_suffix(suffix, copy=True):
     """Save current blend file with a suffix. Example: scene.blend -> scene_packed.blend"""
     current_filepath = bpy.data.filepath
@@ -116,9 +334,44 @@ def save_blend_to_pack_directory(suffix, copy=True):
         print(f"ERROR: Failed to save file: {e}")
         return None
 
+def save_packed_file(filepath, as_copy=False):
+    """
+    Save the final packed blend file. With as_copy the open file stays the
+    original: the copy is written as is, since its relative paths already
+    point inside the pack directory. Returns True on success.
+    """
+    try:
+        if as_copy:
+            bpy.ops.wm.save_as_mainfile(filepath=filepath, copy=True, relative_remap=False)
+            print(f"  - Packed copy saved: {filepath}")
+        else:
+            bpy.ops.wm.save_mainfile()
+        return True
+    except Exception as e:
+        print(f"ERROR: Failed to save file: {e}")
+        return False
+
+@contextmanager
+def preference_overrides(**overrides):
+    """
+    Force addon preference values for the duration of the block, e.g. for a
+    headless pack where bpy.context.preferences cannot be edited. None values are ignored.
+    """
+    previous = dict(_preference_overrides)
+    _preference_overrides.update({name: value for name, value in overrides.items() if value is not None})
+    try:
+        yield
+    finally:
+        _preference_overrides.clear()
+        _preference_overrides.update(previous)
+
 @contextmanager
 def log_to_file(log_path):
-    """Context manager to log prints to both console and file."""
+    """
+    Context manager to log prints to both console and file.
+    Yields the logger; its paused() context restores the console output,
+    e.g. while a modal pack hands control back to the UI.
+    """
     class Logger:
         def __init__(self, log_file):
             self.terminal = sys.stdout
@@ -129,12 +382,20 @@ def log_to_file(log_path):
         def flush(self):
             self.terminal.flush()
             self.log.flush()
+        @contextmanager
+        def paused(self):
+            sys.stdout = self.terminal
+            try:
+                yield
+            finally:
+                sys.stdout = self
     
     with open(log_path, "w") as f:
         old_stdout = sys.stdout
-        sys.stdout = Logger(f)
+        logger = Logger(f)
+        sys.stdout = logger
         try:
-            yield
+            yield logger
         finally:
             sys.stdout = old_stdout
 
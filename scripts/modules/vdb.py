@@ -1,27 +1,43 @@
 import bpy
-import os
-import glob
-import re
-from . import utils
+from . import utils, copy_engine, sequence_index, frame_range, assets, path_index, layout
 
-def set_absolute_path_vdb():
+def collect_vdb(index=None, paths=None, folders=None):
     """
-    Converts the filepath of all VDB volumes to an absolute path.
-    Works for both static files and sequences.
+    Resolve the VDB files to localize without modifying anything. Sequences are
+    expanded to every matching frame, and placed by folders (layout.SequenceFolders).
+    Returns a list of assets.Asset.
     """
-    volumes_to_process = []
-    for volume in bpy.data.volumes:
-        if not volume.filepath:
+    index = index or sequence_index.DirectoryIndex()
+    paths = paths or path_index.get_index()
+    folders = folders or layout.get_folders()
+    limit_frames = frame_range.is_enabled()
+    collected = []
+
+    for entry in paths.localizable("volumes"):
+        volume = entry.datablock
+        abs_path = entry.abs_path
+        subfolder = folders.subfolder("vdb", volume.name, abs_path) if volume.is_sequence else folders.folder("vdb")
+        # A single file can be relinked to whichever copy it resolves to (renamed or deduplicated)
+        asset = assets.Asset(volume, "Volume", abs_path, subfolder, relinkable=not volume.is_sequence, entry=entry)
+        collected.append(asset)
+
+        # Check if it's a sequence, using the shared directory index
+        if asset.missing or asset.remapped or not volume.is_sequence:
             continue
-            
-        # Convert to absolute path
-        abs_path = utils.get_absolute_path(volume.filepath)
-        if volume.filepath != abs_path:
-            volume.filepath = abs_path
-            
-        volumes_to_process.append(volume)
-    
-    return volumes_to_process
+
+        found_files = index.find_sequence(abs_path)
+        if found_files:
+            asset.files = found_files
+
+            # Only copy the frames the scene can sample
+            frames = frame_range.volume_frames(volume, bpy.context.scene) if limit_frames else None
+            if frames is not None:
+                asset.files = frame_range.filter_frames(found_files, frames, abs_path)
+                print(f"  - Frame range: copying {len(asset.files)} of {len(found_files)} frames for volume: {volume.name}")
+        elif found_files is not None:
+            print(f"WARNING: No files found for sequence pattern: {sequence_index.sequence_pattern(asset.filename)}")
+
+    return collected
 
 def localize_vdb(base_path=None):
     """
@@ -34,81 +50,36 @@ def localize_vdb(base_path=None):
         print("ERROR: Blend file must be saved before localizing VDB files.")
         return {'CANCELLED'}
 
-    # Check if there are any VDB volumes with filepaths to process
-    volumes_to_process = []
-    for volume in bpy.data.volumes:
-        if not volume.filepath:
-            continue
-        volumes_to_process.append(volume)
+    batch = copy_engine.new_batch()
+    collected = collect_vdb(index=batch.engine.directory_index)
     
     # Early exit if no VDB files to localize
-    if not volumes_to_process:
+    if not collected:
+        batch.wait()
         print("No VDB files found to localize.")
         return {'FINISHED'}
 
-    # Only create directory if we have VDB files to process
-    vdb_dir = os.path.join(base_path, "vdb")
-    utils.ensure_directory(vdb_dir)
-    
     processed_files = set()
+    relinks = []
     count = 0
 
-    for volume in volumes_to_process:
-        abs_path = utils.get_absolute_path(volume.filepath)
-        abs_path = os.path.normpath(abs_path)
-        
-        if not os.path.exists(abs_path):
-            print(f"WARNING: Source file not found: {abs_path} (Volume: {volume.name})")
+    for asset in collected:
+        if asset.missing:
+            print(f"WARNING: Source file not found: {asset.source} (Volume: {asset.name})")
             continue
+        asset.submit(batch, base_path, processed_files)
+        relinks.append(asset)
 
-        dir_name = os.path.dirname(abs_path)
-        file_name = os.path.basename(abs_path)
-        
-        files_to_copy = []
-
-        # Check if it's a sequence
-        match = re.search(r'(\d+)(?!.*\d)', file_name)
-        
-        if volume.is_sequence and match:
-            prefix = file_name[:match.start()]
-            suffix = file_name[match.end():]
-            glob_pattern = prefix + "*" + suffix
-            search_path = os.path.join(dir_name, glob_pattern)
-            
-            regex_pattern = re.escape(prefix) + r'\d+' + re.escape(suffix) + "$"
-            regex = re.compile(regex_pattern, re.IGNORECASE)
-            
-            candidates = glob.glob(search_path)
-            found_files = []
-            
-            for cand in candidates:
-                cand_name = os.path.basename(cand)
-                if regex.match(cand_name):
-                    found_files.append(cand)
-            
-            if found_files:
-                files_to_copy = found_files
-            else:
-                print(f"WARNING: No files found for sequence pattern: {glob_pattern}")
-                files_to_copy = [abs_path]
-        else:
-            files_to_copy = [abs_path]
-
-        # Copy files
-        for src_file in files_to_copy:
-            src_file = os.path.normpath(src_file)
-            if src_file in processed_files:
-                continue
-                
-            utils.copy_file(src_file, vdb_dir)
-            processed_files.add(src_file)
-
-        # Relink
-        relative_path = f"//vdb/{file_name}"
-        if volume.filepath != relative_path:
-            volume.filepath = relative_path
+    results = batch.wait()
+
+    # Relink on the main thread once all copies have finished
+    for asset in relinks:
+        relative_path = asset.relative_path(base_path, results)
+        if asset.datablock.filepath != relative_path:
+            asset.datablock.filepath = relative_path
             count += 1
 
+    batch.record_assets(collected, base_path)
     print(f"VDB localization complete. Relinked {count} volumes.")
     return {'FINISHED'}
 
@@ -118,6 +89,10 @@ class DY_PACK_MASTER_OT_localize_vdb(bpy.types.Operator):
     bl_label = "Localize VDB Files"
     bl_description = "Copy VDB files to //vdb and relink"
 
+    @classmethod
+    def poll(cls, context):
+        return copy_engine.idle()
+
     def execute(self, context):
         return localize_vdb()
 
@@ -0,0 +1,205 @@
+import bpy
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from . import utils, manifest
+
+REPORT_FILENAME = "pack_verify.json"
+
+# Files a pack writes next to its localized assets; never reported as extra
+PACK_FILES = {manifest.MANIFEST_FILENAME, manifest.JOURNAL_FILENAME, REPORT_FILENAME,
+              "references_report.txt", "missing_files_report.txt"}
+
+class VerifyResult:
+    """
+    Outcome of a pack verification: mismatched, missing, extra and unhashed files, with totals.
+    Unhashed files (packed without Hash files in pack manifest) fail the check unless
+    size_only accepts a check of their sizes.
+    """
+
+    def __init__(self, pack_dir, size_only=False):
+        self.pack_dir = pack_dir
+        self.size_only = size_only
+        self.verified = 0
+        self.bytes_verified = 0
+        self.mismatched = []  # {"destination", "reason"}
+        self.missing = []     # Relative destinations
+        self.extra = []       # Relative paths not listed in the manifest
+        self.unhashed = []    # Relative destinations only checked by size
+        self.seconds = 0.0
+        self.error = None
+
+    @property
+    def ok(self):
+        if self.unhashed and not self.size_only:
+            return False
+        return self.error is None and not (self.mismatched or self.missing or self.extra)
+
+    def to_dict(self):
+        return {
+            "pack_dir": utils.normalize_path(self.pack_dir),
+            "ok": self.ok,
+            "error": self.error,
+            "verified": self.verified,
+            "bytes_verified": self.bytes_verified,
+            "seconds": self.seconds,
+            "mismatched": self.mismatched,
+            "missing": self.missing,
+            "extra": self.extra,
+            "unhashed": self.unhashed,
+            "size_only": self.size_only,
+        }
+
+    def write_json(self, path=None):
+        path = path or os.path.join(self.pack_dir, REPORT_FILENAME)
+        try:
+            with open(path, "w") as f:
+                json.dump(self.to_dict(), f, indent=2)
+            print(f"Verify report written: {path}")
+        except OSError as e:
+            print(f"WARNING: Failed to write verify report: {e}")
+
+    def summary(self):
+        if self.error:
+            return f"Verify failed: {self.error}"
+        mb = self.bytes_verified / (1024 * 1024)
+        rate = mb / self.seconds if self.seconds > 0 else 0.0
+        return (f"Verified {self.verified} files ({mb:.1f} MB) in {self.seconds:.1f}s at {rate:.1f} MB/s: "
+                f"{len(self.mismatched)} mismatched, {len(self.missing)} missing, {len(self.extra)} extra, "
+                f"{len(self.unhashed)} {'checked by size only' if self.size_only else 'without hash (content not checked)'}")
+
+    def print_report(self):
+        print("\n" + "=" * 50)
+        print(f"dy Pack Master - Verify Pack: {self.pack_dir}")
+        print("=" * 50)
+        for entry in self.mismatched:
+            print(f"[MISMATCH] {entry['destination']} ({entry['reason']})")
+        for destination in self.missing:
+            print(f"[MISSING] {destination}")
+        for path in self.extra:
+            print(f"[EXTRA] {path}")
+        if self.unhashed and not self.size_only:
+            print(f"[UNHASHED] {len(self.unhashed)} files have no hash in the manifest, so their content was not "
+                  f"checked. Re-pack with 'Hash files in pack manifest', or accept a size-only check.")
+        print(self.summary())
+        print("=" * 50)
+
+def _verify_file(pack_dir, entry, algorithm):
+    """Worker: check one manifest entry. Returns (status, reason, bytes read)."""
+    path = os.path.join(pack_dir, entry["destination"])
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return "missing", None, 0
+    if entry.get("size") is not None and size != entry["size"]:
+        return "mismatched", f"size {size}, expected {entry['size']}", 0
+    if not entry.get("hash"):
+        return "unhashed", None, 0
+    try:
+        content_hash = utils.hash_file(path, algorithm)
+    except OSError as e:
+        return "mismatched", f"unreadable: {e}", 0
+    if content_hash != entry["hash"]:
+        return "mismatched", "checksum differs", size
+    return "ok", None, size
+
+def _find_extra(pack_dir, listed):
+    """Files in the asset folders of the pack that the manifest does not list."""
+    folders = {destination.split('/', 1)[0] for destination in listed if '/' in destination}
+    extra = []
+    for folder in sorted(folders):
+        for root, _, files in os.walk(os.path.join(pack_dir, folder)):
+            for file in files:
+                relative = utils.normalize_path(os.path.relpath(os.path.join(root, file), pack_dir))
+                if relative not in listed and file not in PACK_FILES:
+                    extra.append(relative)
+    return sorted(extra)
+
+def verify_pack(pack_dir, workers=None, size_only=False):
+    """
+    Check every file listed in the pack manifest of pack_dir against its
+    recorded size and hash. Files are hashed in parallel with streaming reads
+    (hashlib releases the GIL, so threads scale with the storage).
+    size_only: accept files the manifest has no hash for after checking their size.
+    Returns a VerifyResult.
+    """
+    result = VerifyResult(pack_dir, size_only)
+    manifest_path = os.path.join(pack_dir, manifest.MANIFEST_FILENAME)
+    try:
+        with open(manifest_path, "r") as f:
+            data = json.load(f)
+        entries = data["files"]
+    except (OSError, ValueError, KeyError) as e:
+        result.error = f"no readable pack manifest in {pack_dir} ({e})"
+        return result
+
+    algorithm = data.get("hash_algorithm") or utils.HASH_ALGORITHM
+    workers = max(1, workers or utils.get_preference("copy_workers", 4))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dy_pack_verify") as executor:
+        checks = [(entry, executor.submit(_verify_file, pack_dir, entry, algorithm)) for entry in entries]
+        for entry, future in checks:
+            status, reason, size = future.result()
+            destination = entry["destination"]
+            if status == "missing":
+                result.missing.append(destination)
+            elif status == "mismatched":
+                result.mismatched.append({"destination": destination, "reason": reason})
+            else:
+                result.verified += 1
+                result.bytes_verified += size
+                if status == "unhashed":
+                    result.unhashed.append(destination)
+
+    result.extra = _find_extra(pack_dir, {entry["destination"] for entry in entries})
+    result.seconds = time.perf_counter() - start
+    return result
+
+class DY_PACK_MASTER_OT_verify_pack(bpy.types.Operator):
+    """Hash every file of a pack directory and compare it with the pack manifest"""
+    bl_idname = "dy_pack_master.verify_pack"
+    bl_label = "Verify Pack"
+    bl_description = "Check a pack directory against its pack manifest: mismatched, missing and extra files"
+
+    directory: bpy.props.StringProperty(
+        name="Pack Directory",
+        subtype='DIR_PATH',
+    )
+
+    size_only: bpy.props.BoolProperty(
+        name="Accept Size-Only Check",
+        description="Pass files packed without 'Hash files in pack manifest' after checking their size only, "
+                    "instead of reporting that their content could not be verified",
+        default=False,
+    )
+
+    def invoke(self, context, event):
+        # The open file may be the packed file itself, or the original next to its pack
+        pack_dir = utils.get_blend_dir()
+        if not pack_dir or not os.path.exists(os.path.join(pack_dir, manifest.MANIFEST_FILENAME)):
+            pack_dir = utils.get_pack_directory()
+        if pack_dir and os.path.isdir(pack_dir):
+            self.directory = pack_dir
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        if not self.directory:
+            self.report({'ERROR'}, "Select a pack directory")
+            return {'CANCELLED'}
+
+        result = verify_pack(os.path.normpath(bpy.path.abspath(self.directory)), size_only=self.size_only)
+        result.print_report()
+        if result.error:
+            self.report({'ERROR'}, result.error)
+            return {'CANCELLED'}
+        result.write_json()
+        self.report({'INFO'} if result.ok else {'WARNING'}, result.summary())
+        return {'FINISHED'}
+
+def register():
+    bpy.utils.register_class(DY_PACK_MASTER_OT_verify_pack)
+
+def unregister():
+    bpy.utils.unregister_class(DY_PACK_MASTER_OT_verify_pack)
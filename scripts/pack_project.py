@@ -1,38 +1,100 @@
 import bpy
 import os
+import time
 import platform
 from datetime import datetime
-from .modules import mesh_sequence_cache, vdb, references, render_settings, report, utils, images, movies
+from .modules import mesh_sequence_cache, vdb, references, render_settings, report, utils, images, movies, copy_engine, session_state, manifest, archive, timing, planner, prefetch, resources
 
 # Get the addon package name for preferences lookup
 ADDON_NAME = __package__.rsplit('.', 1)[0] if '.' in __package__ else __package__
 
-def pack_project():
-    """Main packing function that executes all localization steps."""
+# Seconds between two progress updates of the modal Pack Project
+MODAL_INTERVAL = 0.2
+
+# Events the modal Pack Project lets through: view navigation and Blender's own timers.
+# Everything else (edits, undo, file loads, other operators) waits for the pack to end.
+PASS_THROUGH_EVENTS = {
+    'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE',
+    'WHEELINMOUSE', 'WHEELOUTMOUSE', 'TRACKPADPAN', 'TRACKPADZOOM', 'MOUSEROTATE', 'MOUSESMARTZOOM',
+    'NDOF_MOTION', 'WINDOW_DEACTIVATE', 'TIMER_REPORT', 'TIMER_JOBS', 'TIMERREGION',
+}
+
+def pack_project(output_dir=None, save_original=True):
+    """
+    Main packing function that executes all localization steps.
+    output_dir: folder the pack directory is created in (defaults to the blend file folder).
+    save_original: save the open blend file before packing (headless packs leave sources untouched).
+    Settings are read with utils.get_preference, so they can be overridden with utils.preference_overrides.
+    """
+    steps = pack_project_steps(output_dir, save_original)
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            status, new_filepath, reopen_filepath = done.value
+            break
+    after_pack(new_filepath, reopen_filepath)
+    return status, new_filepath
+
+def after_pack(new_filepath, reopen_filepath=None):
+    """Reopen the original file and open the pack folder, as set in the preferences."""
+    if reopen_filepath:
+        print(f"\nReopening original file: {reopen_filepath}")
+        bpy.ops.wm.open_mainfile(filepath=reopen_filepath)
+
+    if new_filepath and utils.get_preference("open_directory_after_pack", True):
+        pack_dir = os.path.dirname(new_filepath)
+        utils.open_directory(pack_dir)
+
+def pack_project_steps(output_dir=None, save_original=True, background=False):
+    """
+    Generator running the steps of pack_project().
+    background: first queue every asset on the copy engine and yield
+    (engine, total bytes, None) while the copies run, then (engine, total bytes,
+    step) before each step and while it waits for background processes, so a
+    modal operator can keep the UI responsive and cancel by closing the
+    generator. The open file is only modified once the copies completed.
+    Returns (status, packed file, original file to reopen or None).
+    """
     if not bpy.data.filepath:
         print("ERROR: Blend file must be saved before packing.")
-        return {'CANCELLED'}, None
+        return {'CANCELLED'}, None, None
     
-    prefs = bpy.context.preferences.addons[ADDON_NAME].preferences
-    blend_suffix = prefs.blend_suffix
-    if not blend_suffix.startswith('_'):
-        blend_suffix = '_' + blend_suffix
+    blend_suffix = utils.get_blend_suffix()
     
     # Store original filepath to potentially reopen later
     original_filepath = bpy.data.filepath
     
     # Determine pack directory and log path
-    directory = os.path.dirname(bpy.data.filepath)
     filename = os.path.basename(bpy.data.filepath)
     name = os.path.splitext(filename)[0]
-    packed_dir = os.path.join(directory, f"{name}{blend_suffix}")
+    packed_dir = utils.get_pack_directory(blend_suffix, output_dir)
+    
+    # Keep the original open: snapshot the paths the pack changes and restore them after saving a copy
+    keep_original = utils.get_preference("keep_original_open", False)
+    
+    # Archive output: assets are streamed into the archive; Blender's own files are staged in a
+    # temporary directory appended at the end, so the original file must stay open
+    output_format = utils.get_preference("pack_output", 'DIRECTORY')
+    archive_path = None
+    if output_format != 'DIRECTORY':
+        archive_path = packed_dir + archive.EXTENSIONS[output_format]
+        packed_dir = archive.staging_directory(archive_path)
+        keep_original = True
+    
     log_path = os.path.join(packed_dir, "pack_log.txt")
     new_filepath = os.path.join(packed_dir, f"{name}{blend_suffix}.blend")
     
     # Create pack directory first (needed for log file)
     utils.ensure_directory(packed_dir)
     
-    with utils.log_to_file(log_path):
+    with archive.output(output_format, archive_path, packed_dir,
+                        volume_size=utils.get_preference("archive_volume_size", 0) * 1024 * 1024,
+                        prefix=f"{name}{blend_suffix}", last=(new_filepath, log_path)) as archive_writer, \
+            utils.log_to_file(log_path) as log, \
+            copy_engine.session(utils.get_preference("copy_workers"), pack_dir=packed_dir, source=original_filepath,
+                                archive=archive_writer) as engine, \
+            timing.PackTimer(engine) as timer:
         # Log header with system info
         print("Pack Log - dy Pack Master")
         print("=" * 50)
@@ -40,7 +102,7 @@ def pack_project():
         print(f"OS: {platform.system()} {platform.release()}")
         print(f"Blender: {bpy.app.version_string}")
         print(f"Source File: {original_filepath}")
-        print(f"Pack Directory: {packed_dir}")
+        print(f"Pack Directory: {archive_path or packed_dir}")
         print(f"OCIO Config: {os.environ.get('OCIO', 'Default (Blender built-in)')}")
         print("=" * 50)
         print()
@@ -49,63 +111,155 @@ def pack_project():
         print("dy Pack Master - Pack Project")
         print("=" * 50)
 
-        print("\n[0/11] Saving current blend file...")
-        bpy.ops.wm.save_mainfile()
+        if save_original:
+            with timer.step("[0/11] Saving current blend file"):
+                bpy.ops.wm.save_mainfile()
+
+        def hand_over(step, waiting=()):
+            """
+            Background packs: yield (engine, total bytes, step) to the modal operator
+            once and as long as copies run, then whenever the waiting generator
+            waits, so it can redraw and cancel. The UI runs until the next step
+            resumes: its output is not logged to the pack.
+            """
+            while background:
+                with log.paused():
+                    yield engine, total_bytes, step
+                if not engine.busy():
+                    break
+            for _ in waiting:
+                if background:
+                    with log.paused():
+                        yield engine, total_bytes, step
+
+        total_bytes = 0
+        if background:
+            with timer.step("Copying assets in the background"):
+                batch, total_bytes = prefetch.queue_assets(engine, packed_dir, planner.PACK_PROJECT_STEPS)
+                print(f"  - Queued {engine.files_queued} files ({total_bytes / (1024 * 1024):.1f} MB)")
+                while engine.busy():
+                    with log.paused():
+                        yield engine, total_bytes, None
+                batch.wait()
         
-        print("\n[1/11] Converting asset paths to absolute...")
-        utils.convert_all_paths_to_absolute()
+        # Snapshot the paths once the copies completed, so edits made while they ran are kept too
+        with session_state.preserve(keep_original):
+            with timer.step("[1/11] Converting asset paths to absolute") as step:
+                yield from hand_over(step)
+                utils.convert_all_paths_to_absolute(reload_libraries=not keep_original, defer_reload=True)
         
-        print("\n[2/11] Saving to pack directory (switching to packed file)...")
-        try:
-            bpy.ops.wm.save_as_mainfile(filepath=new_filepath, copy=False)
-            print(f"  - Now working in: {new_filepath}")
-        except Exception as e:
-            print(f"ERROR: Failed to save file: {e}")
-            return {'CANCELLED'}, None
+            if keep_original:
+                print("\n[2/11] Keeping original file open (packed copy is saved at the end)...")
+            else:
+                with timer.step("[2/11] Saving to pack directory (switching to packed file)") as step:
+                    yield from hand_over(step)
+                    try:
+                        bpy.ops.wm.save_as_mainfile(filepath=new_filepath, copy=False)
+                        print(f"  - Now working in: {new_filepath}")
+                    except Exception as e:
+                        print(f"ERROR: Failed to save file: {e}")
+                        return {'CANCELLED'}, None, None
         
-        print("\n[3/11] Packing blend file resources...")
-        bpy.ops.file.pack_all()
+            with timer.step("[3/11] Packing blend file resources") as step:
+                yield from hand_over(step)
+                resources.pack_resources(base_path=packed_dir)
         
-        print("\n[4/11] Localizing Images (Sequences & Movies)...")
-        images.localize_images(base_path=packed_dir)
+            with timer.step("[4/11] Localizing Images (Sequences & Movies)") as step:
+                yield from hand_over(step)
+                images.localize_images(base_path=packed_dir)
 
-        print("\n[5/11] Localizing Movie Clips...")
-        movies.localize_movieclips(base_path=packed_dir)
+            with timer.step("[5/11] Localizing Movie Clips") as step:
+                yield from hand_over(step)
+                movies.localize_movieclips(base_path=packed_dir)
         
-        print("\n[6/11] Localizing Mesh Caches (ABC/USD)...")
-        mesh_sequence_cache.localize_mesh_cache(base_path=packed_dir)
+            with timer.step("[6/11] Localizing Mesh Caches (ABC/USD)") as step:
+                yield from hand_over(step)
+                mesh_sequence_cache.localize_mesh_cache(base_path=packed_dir)
         
-        print("\n[7/11] Localizing References...")
-        references.localize_references(base_path=packed_dir)
+            with timer.step("[7/11] Localizing References") as step:
+                yield from hand_over(step, references.localize_references_steps(
+                    base_path=packed_dir, reload_libraries=not keep_original))
         
-        print("\n[8/11] Localizing VDBs...")
-        vdb.localize_vdb(base_path=packed_dir)
+            with timer.step("[8/11] Localizing VDBs") as step:
+                yield from hand_over(step)
+                vdb.localize_vdb(base_path=packed_dir)
         
-        print("\n[9/11] Setting relative output path...")
-        render_settings.set_relative_output()
+            with timer.step("[9/11] Setting relative output path") as step:
+                yield from hand_over(step)
+                render_settings.set_relative_output()
         
-        print("\n[10/11] Generating missing files report...")
-        report.missing_files_report(base_path=packed_dir)
+            with timer.step("[10/11] Generating missing files report") as step:
+                yield from hand_over(step)
+                report.missing_files_report(base_path=packed_dir, archive=archive_writer)
         
-        print("\n[11/11] Saving final packed blend file...")
-        bpy.ops.wm.save_mainfile()
+            with timer.step("[11/11] Saving final packed blend file") as step:
+                yield from hand_over(step)
+                if not utils.save_packed_file(new_filepath, keep_original):
+                    return {'CANCELLED'}, None, None
+                engine.finalize()
         
-        print("\n" + "=" * 50)
-        print("Pack Project Complete!")
-        print(f"Packed project: {new_filepath}")
-        print("=" * 50)
+            print("\n" + "=" * 50)
+            print("Pack Project Complete!")
+            print(engine.summary())
+            print(f"Packed project: {archive_path or new_filepath}")
+            print("=" * 50)
+            print("\nStep Timings")
+            print(timer.summary_table())
+            timer.write_json(packed_dir)
+            if archive_writer:
+                archive_writer.completed = True
+    
+    if archive_writer:
+        if archive_writer.error:
+            return {'CANCELLED'}, None, None
+        new_filepath = archive_path
     
     # Optionally reopen original file
-    if prefs.reopen_original_file:
-        print(f"\nReopening original file: {original_filepath}")
-        bpy.ops.wm.open_mainfile(filepath=original_filepath)
-
-    # Optionally open directory after pack
-    if prefs.open_directory_after_pack:
-        pack_dir = os.path.dirname(new_filepath)
-        utils.open_directory(pack_dir)
+    reopen_filepath = None
+    if not keep_original and utils.get_preference("reopen_original_file", True):
+        reopen_filepath = original_filepath
     
-    return {'FINISHED'}, new_filepath
+    return {'FINISHED'}, new_filepath, reopen_filepath
+
+def find_interrupted_pack():
+    """
+    Pack directory and source blend file of an interrupted pack of the open file.
+    The open file may be the source, or the packed file a crashed pack had switched to.
+    Returns (pack_dir, source) or (None, None).
+    """
+    for pack_dir in (utils.get_pack_directory(), utils.get_blend_dir()):
+        if not pack_dir:
+            continue
+        header = manifest.read_journal_header(pack_dir)
+        if header:
+            return pack_dir, header.get("source") or bpy.data.filepath
+    return None, None
+
+def resume_pack():
+    """
+    Resume an interrupted Pack Project: files recorded in the pack journal are
+    skipped without being copied or checked again.
+    """
+    pack_dir, source = find_interrupted_pack()
+    if not pack_dir:
+        print("ERROR: No interrupted pack found for this blend file.")
+        return {'CANCELLED'}, None
+
+    if os.path.normpath(source) != os.path.normpath(bpy.data.filepath):
+        if not os.path.isfile(source):
+            print(f"ERROR: Source file of the interrupted pack not found: {source}")
+            return {'CANCELLED'}, None
+        print(f"Reopening source file of the interrupted pack: {source}")
+        bpy.ops.wm.open_mainfile(filepath=source)
+
+    # The pack directory must be the one Pack Project would create (default location or CLI --output-dir)
+    output_dir = os.path.dirname(pack_dir)
+    if os.path.normpath(utils.get_pack_directory(output_dir=output_dir)) != os.path.normpath(pack_dir):
+        print(f"ERROR: {pack_dir} was not created by Pack Project with the current suffix. "
+              "Run Custom Pack Project into the same folder to resume it.")
+        return {'CANCELLED'}, None
+
+    return pack_project(output_dir=output_dir)
 
 class DY_PACK_MASTER_OT_pack_project(bpy.types.Operator):
     """Pack and localize entire project for render farm"""
@@ -120,6 +274,10 @@ class DY_PACK_MASTER_OT_pack_project(bpy.types.Operator):
             return f"One-click: Convert paths, create '{suffix}' folder, pack resources, and localize all assets"
         return "One-click: Pack resources, localize assets, and save blend file"
 
+    @classmethod
+    def poll(cls, context):
+        return copy_engine.idle()
+
     def execute(self, context):
         result, new_filepath = pack_project()
         if new_filepath:
@@ -128,8 +286,145 @@ class DY_PACK_MASTER_OT_pack_project(bpy.types.Operator):
             self.report({'ERROR'}, "Pack project failed")
         return result
 
+    def invoke(self, context, event):
+        """Pack from the UI without freezing it: copies run in the background, Esc cancels."""
+        if bpy.app.background:
+            return self.execute(context)
+        self._source = bpy.data.filepath
+        self._steps = pack_project_steps(background=True)
+        self._progress = None  # (engine, total bytes, step or None while copying) yielded by the steps
+        self._start = time.perf_counter()
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(MODAL_INTERVAL, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, 100)
+        # The pack holds references to datablocks: an undo would invalidate them
+        self._undo_handler = lambda *args: self.abort_pack("undo")
+        bpy.app.handlers.undo_pre.append(self._undo_handler)
+        bpy.app.handlers.redo_pre.append(self._undo_handler)
+        self._aborted = None
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if self._aborted:
+            self.end_modal(context)
+            self.reopen_source()
+            self.report({'WARNING'}, f"Pack cancelled by {self._aborted}")
+            return {'CANCELLED'}
+        if event.type == 'ESC':
+            return self.cancel_pack(context)
+        # The view can be navigated; any other event would let the file change under the pack
+        if event.type in PASS_THROUGH_EVENTS:
+            return {'PASS_THROUGH'}
+        if event.type != 'TIMER':
+            return {'RUNNING_MODAL'}
+
+        try:
+            self._progress = next(self._steps)
+        except StopIteration as done:
+            self.end_modal(context)
+            result, new_filepath, reopen_filepath = done.value
+            if new_filepath:
+                self.report({'INFO'}, f"Project packed: {new_filepath}")
+                # Loading a file from inside a modal handler is unsafe: do it once the operator has ended
+                bpy.app.timers.register(lambda: after_pack(new_filepath, reopen_filepath), first_interval=0.1)
+            else:
+                self.report({'ERROR'}, "Pack project failed")
+            return result
+        except Exception:
+            self.end_modal(context)
+            self.report({'ERROR'}, "Pack project failed (see system console)")
+            raise
+
+        self.update_progress(context)
+        return {'RUNNING_MODAL'}
+
+    def update_progress(self, context):
+        engine, total_bytes, step = self._progress
+        if step:
+            context.workspace.status_text_set(f"Packing: {step} (Esc to cancel)")
+            return
+        mb = 1024 * 1024
+        elapsed = time.perf_counter() - self._start
+        rate = engine.bytes_done / elapsed if elapsed > 0 else 0.0
+        eta = f"{(total_bytes - engine.bytes_done) / rate:.0f}s" if rate > 0 else "-"
+        if total_bytes:
+            context.window_manager.progress_update(min(100.0, 100.0 * engine.bytes_done / total_bytes))
+        context.workspace.status_text_set(
+            f"Packing: {engine.files_done}/{engine.files_queued} files, "
+            f"{engine.bytes_done / mb:.0f}/{total_bytes / mb:.0f} MB at {rate / mb:.1f} MB/s, "
+            f"ETA {eta} (Esc to cancel)"
+        )
+
+    def cancel_pack(self, context):
+        """Stop the pack; once the open file was switched to the packed file, the original is reopened."""
+        self.stop_pack()
+        self.end_modal(context)
+        self.reopen_source()
+        self.report({'WARNING'}, "Pack cancelled")
+        return {'CANCELLED'}
+
+    def stop_pack(self):
+        engine, _, step = self._progress or (None, 0, None)
+        if engine:
+            engine.cancel()
+            if step:
+                print(f"\nPack cancelled during {step}: the pack is incomplete.")
+            else:
+                print("\nPack cancelled: the open file was not modified.")
+            if not engine.archive:
+                print("Completed copies are kept in the pack journal; run Resume Pack to continue.")
+        # Exits the pack's context managers: waits for running copies, closes the log, discards an archive
+        self._steps.close()
+
+    def reopen_source(self):
+        """Once the pack switched to the packed file, go back to the original after the operator ended."""
+        if bpy.data.filepath != self._source:
+            source = self._source
+            bpy.app.timers.register(lambda: after_pack(None, source), first_interval=0.1)
+
+    def abort_pack(self, reason):
+        """Stop the pack before an undo run from a script; the modal ends on its next event."""
+        if not self._aborted:
+            print(f"\nPack interrupted by {reason}.")
+            self._aborted = reason
+            self.stop_pack()
+
+    def cancel(self, context):
+        """Called by Blender when it ends the operator itself, e.g. when another file is loaded."""
+        self.abort_pack("file load")
+        self.end_modal(context)
+
+    def end_modal(self, context):
+        for handlers in (bpy.app.handlers.undo_pre, bpy.app.handlers.redo_pre):
+            if self._undo_handler in handlers:
+                handlers.remove(self._undo_handler)
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+class DY_PACK_MASTER_OT_resume_pack(bpy.types.Operator):
+    """Resume an interrupted pack of this file, skipping the files it already completed"""
+    bl_idname = "dy_pack_master.resume_pack"
+    bl_label = "Resume Pack"
+
+    @classmethod
+    def poll(cls, context):
+        return bool(bpy.data.filepath) and copy_engine.idle()
+
+    def execute(self, context):
+        result, new_filepath = resume_pack()
+        if new_filepath:
+            self.report({'INFO'}, f"Project packed: {new_filepath}")
+        else:
+            self.report({'ERROR'}, "Resume pack failed (see system console)")
+        return result
+
 def register():
     bpy.utils.register_class(DY_PACK_MASTER_OT_pack_project)
+    bpy.utils.register_class(DY_PACK_MASTER_OT_resume_pack)
 
 def unregister():
+    bpy.utils.unregister_class(DY_PACK_MASTER_OT_resume_pack)
     bpy.utils.unregister_class(DY_PACK_MASTER_OT_pack_project)
\ No newline at end of file
@@ -67,6 +67,9 @@ class DY_PACK_MASTER_PT_main(bpy.types.Panel):
         if scene.dy_pack_master_expand_tools:
             col = box.column(align=True)
             col.operator("dy_pack_master.custom_pack_project", icon='FILEBROWSER')
+            col.operator("dy_pack_master.plan_pack", icon='VIEWZOOM')
+            col.operator("dy_pack_master.resume_pack", icon='RECOVER_LAST')
+            col.operator("dy_pack_master.verify_pack", icon='CHECKMARK')
             col.operator("dy_pack_master.localize_ocio", icon='COLOR', text="Localize OCIO")
             col.operator("dy_pack_master.missing_files_report", icon='ERROR', text="Missing Files Report")            
 
@@ -83,6 +86,9 @@ def menu_func_export(self, context):
     layout.label(text="dy Pack Master", icon='PACKAGE')
     layout.operator("dy_pack_master.pack_project", text="Pack Project", icon='EXPORT')
     layout.operator("dy_pack_master.custom_pack_project", text="Custom Pack Project", icon='FILEBROWSER')
+    layout.operator("dy_pack_master.plan_pack", text="Plan Pack (Dry Run)", icon='VIEWZOOM')
+    layout.operator("dy_pack_master.resume_pack", text="Resume Pack", icon='RECOVER_LAST')
+    layout.operator("dy_pack_master.verify_pack", text="Verify Pack", icon='CHECKMARK')
     # File > Export uses the popup dialog version
     layout.operator("dy_pack_master.addons_tool", text="Localize Add-ons", icon='PREFERENCES')
     layout.operator("dy_pack_master.localize_ocio", text="Localize OCIO", icon='COLOR')